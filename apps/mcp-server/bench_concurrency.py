@@ -0,0 +1,195 @@
+"""Concurrency benchmark for the MCP tools — blocking vs. async data access.
+
+Simulates N parallel MCP sessions calling get_pasal / search_laws /
+get_law_status / list_laws against a fake PostgREST that answers every
+request after a fixed network latency. Two modes run the exact same tool
+code:
+
+- blocking: queries execute synchronously on the event loop (how the
+  server behaved before the async access layer — one slow call stalls
+  every other session)
+- async:    queries go through the pooled httpx.AsyncClient
+
+Each session issues a call every --interval-ms; latency is measured from the
+moment the call was due, so queueing behind a blocked event loop shows up in
+p50/p99.
+
+Usage:
+    python bench_concurrency.py [--sessions 50] [--calls 10] [--latency-ms 40] [--interval-ms 500]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import time
+
+import httpx
+
+os.environ.setdefault("SUPABASE_URL", "https://bench.supabase.co")
+os.environ.setdefault("SUPABASE_ANON_KEY", "bench-key")
+
+import server  # noqa: E402
+from supabase import AsyncClient, AsyncClientOptions, Client, ClientOptions  # noqa: E402
+
+_WORK = {
+    "id": 1, "frbr_uri": "/akn/id/act/uu/2003/13", "title_id": "UU 13/2003",
+    "number": "13", "year": 2003, "status": "berlaku", "regulation_type_id": 1,
+    "source_url": "", "date_enacted": None,
+    "regulation_types": {"code": "UU", "name_id": "Undang-Undang"},
+}
+
+
+def _respond(request: httpx.Request) -> httpx.Response:
+    """Canned PostgREST responses keyed on the request path."""
+    path = request.url.path
+    if path.endswith("/rpc/get_pasal_bundle"):
+        body = {
+            "type_known": True, "work": _WORK,
+            "node": {"id": 10, "number": "81", "content_text": "Isi pasal.", "parent_id": None},
+            "ayat": [{"number": "1", "content_text": "Ayat satu."}], "chapter": None,
+        }
+    elif path.endswith("/rpc/search_legal_chunks"):
+        body = [{"id": 10, "work_id": 1, "content": "Isi pasal.", "score": 0.5,
+                 "snippet": "Isi", "metadata": {"pasal": "81"}}]
+    elif path.endswith("/regulation_types"):
+        body = [{"id": 1, "code": "UU"}]
+    elif path.endswith("/works"):
+        body = [_WORK]
+    else:
+        body = []
+    return httpx.Response(200, json=body, headers={"content-range": "0-0/1"})
+
+
+def _blocking_client(latency: float) -> "_Blocking":
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(latency)
+        return _respond(request)
+
+    client = Client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_ANON_KEY"], ClientOptions())
+    client.postgrest.session = httpx.Client(transport=httpx.MockTransport(handler))
+    return _Blocking(client)
+
+
+def _async_client(latency: float, sessions: int) -> AsyncClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        return _respond(request)
+
+    pool = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        limits=httpx.Limits(max_connections=sessions),
+    )
+    return AsyncClient(
+        os.environ["SUPABASE_URL"], os.environ["SUPABASE_ANON_KEY"],
+        AsyncClientOptions(httpx_client=pool),
+    )
+
+
+class _Blocking:
+    """Expose a sync query builder through the async ``await ...execute()`` API.
+
+    ``execute`` runs the blocking request directly on the event loop, which is
+    exactly what the synchronous tools used to do.
+    """
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name == "execute":
+            async def execute():
+                return attr()
+            return execute
+        if callable(attr):
+            return lambda *args, **kwargs: _Blocking(attr(*args, **kwargs))
+        return attr
+
+
+def _is_error(result) -> bool:
+    first = result[0] if isinstance(result, list) and result else result
+    return isinstance(first, dict) and "error" in first
+
+
+async def _session(sid: int, calls: int, interval: float, start: float, stats: dict) -> None:
+    loop = asyncio.get_running_loop()
+    for i in range(calls):
+        # Open-loop arrivals: latency is measured from when the request was due,
+        # so time spent waiting for a blocked event loop is counted.
+        due = start + i * interval + (sid / max(1, stats["sessions"])) * interval
+        await asyncio.sleep(max(0.0, due - loop.time()))
+
+        # Unique arguments per call so the in-process caches never short-circuit
+        key = f"{sid}-{i}"
+        tool = (sid + i) % 4
+        if tool == 0:
+            result = await server.get_pasal.fn("UU", "13", 2003, key)
+        elif tool == 1:
+            result = await server.search_laws.fn(f"upah minimum {key}")
+        elif tool == 2:
+            result = await server.get_law_status.fn("UU", key, 2003)
+        else:
+            result = await server.list_laws.fn(search=key)
+        stats["latencies"].append((loop.time() - due) * 1000)
+        stats["errors"] += _is_error(result)
+
+
+def _reset_server() -> None:
+    """Drop every cache, in-flight map and index so each mode starts cold."""
+    for cache in (server._pasal_cache, server._status_cache, server._law_count_cache, server._search_cache):
+        cache.clear()
+    server._search_flight = server.SingleFlight()
+    server._pasal_flight = server.SingleFlight()
+    server._status_flight = server.SingleFlight()
+    server._works_index = server.WorksIndex()
+    server._relationship_graph = server.RelationshipGraph()
+    server._revision_watermark = None
+    server._rate_limiters.clear()
+    server._reg_types, server._reg_types_by_id = {}, {}
+    for metric in server._METRICS:
+        metric.reset()
+
+
+async def _run(mode: str, sessions: int, calls: int, latency: float, interval: float) -> dict:
+    _reset_server()
+    server.sb = _blocking_client(latency) if mode == "blocking" else _async_client(latency, sessions)
+
+    stats: dict = {"sessions": sessions, "latencies": [], "errors": 0}
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(*(_session(s, calls, interval, start, stats) for s in range(sessions)))
+    wall = loop.time() - start
+
+    latencies = sorted(stats["latencies"])
+    return {
+        "mode": mode,
+        "calls": len(latencies),
+        "errors": stats["errors"],
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 1),
+        "throughput_rps": round(len(latencies) / wall, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MCP tool latency under concurrent sessions")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=10, help="Tool calls per session")
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="Simulated Supabase round-trip")
+    parser.add_argument("--interval-ms", type=float, default=500.0, help="Think time between a session's calls")
+    args = parser.parse_args()
+
+    logging.getLogger("pasal.mcp").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results = [
+        asyncio.run(_run(mode, args.sessions, args.calls, args.latency_ms / 1000, args.interval_ms / 1000))
+        for mode in ("blocking", "async")
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Import-time and cold-start benchmark for the MCP server.
+
+Each run starts a fresh interpreter, as a Railway scale-from-zero does, and
+times the phases up to the first tool response:
+
+- interpreter: bare ``python -c pass`` startup (baseline, not the server's)
+- import:      ``import server``
+- client:      building the Supabase client (first use / lifespan startup)
+- startup:     the rest of the lifespan — disk cache, feeds, prewarm
+- first_call:  one get_pasal call on the warmed server
+
+PostgREST is replaced by an in-process fake that answers immediately, so the
+numbers are the server's own CPU cost; add real network round-trips on top.
+time_to_first_response_ms is measured by the parent from process spawn.
+
+Usage:
+    python bench_startup.py [--runs 5] [--target-ms 2500]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _child() -> None:
+    t0 = time.perf_counter()
+    import server
+
+    t_import = time.perf_counter()
+
+    import httpx
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/rpc/get_pasal_bundle"):
+            body = {
+                "type_known": True,
+                "work": {"id": 1, "title_id": "UU 13/2003", "frbr_uri": "/akn/id/act/uu/2003/13",
+                         "status": "berlaku"},
+                "node": {"id": 10, "number": "81", "content_text": "Isi pasal.", "parent_id": None},
+                "ayat": [], "chapter": None,
+            }
+        elif path.endswith("/regulation_types"):
+            body = [{"id": 1, "code": "UU"}]
+        else:
+            body = []
+        return httpx.Response(200, json=body)
+
+    server.sb = server._create_client(transport=httpx.MockTransport(respond))
+    t_client = time.perf_counter()
+
+    async def serve() -> tuple[float, float, float]:
+        await server._startup()
+        t_startup = time.perf_counter()
+        result = await server.get_pasal.fn("UU", "13", 2003, "81")
+        t_first, first_wall = time.perf_counter(), time.time()
+        assert "error" not in result, result
+        await server._shutdown()
+        return t_startup, t_first, first_wall
+
+    t_startup, t_first, first_wall = asyncio.run(serve())
+    print(json.dumps({
+        "first_response_wall": first_wall,
+        "import_ms": (t_import - t0) * 1000,
+        "client_ms": (t_client - t_import) * 1000,
+        "startup_ms": (t_startup - t_client) * 1000,
+        "first_call_ms": (t_first - t_startup) * 1000,
+    }))
+
+
+def _run_once(env: dict) -> dict:
+    spawned = time.time()
+    out = subprocess.run(
+        [sys.executable, __file__, "--child"], cwd=_HERE, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    phases = json.loads(out.strip().splitlines()[-1])
+    phases["time_to_first_response_ms"] = (phases.pop("first_response_wall") - spawned) * 1000
+    return phases
+
+
+def main():
+    if "--child" in sys.argv:
+        _child()
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark MCP server import time and cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=2500.0,
+                        help="Time-to-first-response target for scale-from-zero")
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "SUPABASE_URL": "https://bench.supabase.co",
+        "SUPABASE_ANON_KEY": "bench-key",
+        "MCP_TRACE_SAMPLE_RATE": "0",
+    }
+    env.pop("MCP_CACHE_PATH", None)  # measure the in-memory tier only
+
+    interpreter = []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        interpreter.append((time.perf_counter() - t0) * 1000)
+
+    runs = [_run_once(env) for _ in range(args.runs)]
+    report = {"interpreter_ms": round(statistics.median(interpreter), 1)}
+    for phase in ("import_ms", "client_ms", "startup_ms", "first_call_ms", "time_to_first_response_ms"):
+        values = [run[phase] for run in runs]
+        report[phase] = {"median": round(statistics.median(values), 1), "max": round(max(values), 1)}
+    ttfr = report["time_to_first_response_ms"]["median"]
+    report["target_ms"] = args.target_ms
+    report["meets_target"] = ttfr <= args.target_ms
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,40 @@
 """Pasal.id MCP Server — Indonesian Legal Database (v0.3).
 
-Provides Claude with grounded access to Indonesian legislation through 4 tools:
+Provides Claude with grounded access to Indonesian legislation through 8 tools:
 - search_laws: Full-text search across Indonesian legal provisions
 - get_pasal: Get exact text of a specific article
+- get_pasals: Get several articles (or a range) in one call
+- resolve_citations: Verify every article citation in a text
+- get_citing_pasals: Find the articles that cite a given article
 - get_law_status: Check if a law is still in force
 - list_laws: Browse available regulations
+- get_law_text: Read a whole regulation, page by page
 """
+import asyncio
+import bisect
+import contextvars
+import functools
+import inspect
+import json
 import logging
+import math
 import os
+import random
 import re
+import sqlite3
 import time
-from typing import Any
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable, Iterator
 
+import httpx
+from pydantic import Field
 from dotenv import load_dotenv
 from fastmcp import FastMCP
-from supabase import create_client
+from fastmcp.server.dependencies import get_http_request
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from typing_extensions import TypedDict
 
 load_dotenv()
 
@@ -38,8 +58,20 @@ STATUS_EXPLANATIONS: dict[str, str] = {
 
 AMENDMENT_REL_CODES = frozenset({"mengubah", "diubah_oleh", "mencabut", "dicabut_oleh"})
 
+
+@asynccontextmanager
+async def _lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Run startup work before the transport accepts requests; clean up on exit."""
+    await _startup()
+    try:
+        yield
+    finally:
+        await _shutdown()
+
+
 mcp = FastMCP(
     "Pasal.id — Indonesian Legal Database",
+    lifespan=_lifespan,
     instructions=(
         "Search, read, and analyze Indonesian laws and regulations. "
         "Provides grounded legal information with exact article citations "
@@ -55,9 +87,14 @@ mcp = FastMCP(
         "KEPMEN (Ministerial Decision) → SE (Circular Letter)\n\n"
         "WORKFLOW — Follow this order for best results:\n"
         "1. search_laws → Find relevant provisions by topic keyword\n"
-        "2. get_pasal → Get exact article text for citation\n"
+        "2. get_pasal → Get exact article text for citation "
+        "(get_pasals for several articles or a range such as Pasal 81-88)\n"
         "3. get_law_status → Verify the law is still in force before citing\n"
-        "4. list_laws → Browse available regulations if search is too narrow\n\n"
+        "4. list_laws → Browse available regulations if search is too narrow\n"
+        "OTHER TOOLS:\n"
+        "- resolve_citations → Check every 'Pasal ...' citation in a draft answer at once\n"
+        "- get_citing_pasals → Find the articles that refer to a given article\n"
+        "- get_law_text → Read a whole regulation in order, page by page\n\n"
         "CITATION FORMAT: Always cite as 'Pasal X UU No. Y Tahun Z'\n"
         "Example: 'Pasal 81 UU No. 13 Tahun 2003 tentang Ketenagakerjaan'\n\n"
         "SEARCH TIPS:\n"
@@ -68,44 +105,378 @@ mcp = FastMCP(
     ),
 )
 
-# Require anon key (read-only via RLS) — never fall back to service role key
-_supabase_key = os.environ.get("SUPABASE_ANON_KEY")
-if not _supabase_key:
-    raise RuntimeError(
-        "SUPABASE_ANON_KEY is required. The MCP server must not use the service role key. "
-        "Set SUPABASE_ANON_KEY in your .env file."
-    )
-sb = create_client(
-    os.environ["SUPABASE_URL"],
-    _supabase_key,
+# ---------------------------------------------------------------------------
+# Metrics (Prometheus text format, served on /metrics)
+# ---------------------------------------------------------------------------
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _label(name: str, value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'{name}="{escaped}"'
+
+
+class Histogram:
+    """Prometheus histogram with one label; bucket bounds are inclusive upper limits."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: tuple[float, ...]):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self._buckets = buckets
+        # label value -> [count per bucket..., count above last bucket, sum]
+        self._series: dict[str, list[float]] = {}
+
+    def observe(self, label_value: str, value: float) -> None:
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = [0] * (len(self._buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self._buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, label_value: str) -> int:
+        series = self._series.get(label_value)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value, series in sorted(self._series.items()):
+            label = _label(self.label, value)
+            cumulative = 0
+            for bound, n in zip((*self._buckets, "+Inf"), series):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+    def reset(self) -> None:
+        self._series.clear()
+
+
+class Counter:
+    """Prometheus counter with one label."""
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self._values: dict[str, float] = {}
+
+    def inc(self, label_value: str, amount: float = 1) -> None:
+        self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def get(self, label_value: str) -> float:
+        return self._values.get(label_value, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for value, total in sorted(self._values.items()):
+            lines.append(f"{self.name}{{{_label(self.label, value)}}} {total}")
+        return lines
+
+    def reset(self) -> None:
+        self._values.clear()
+
+
+_tool_latency = Histogram(
+    "mcp_tool_duration_seconds", "Tool call latency.", "tool", _LATENCY_BUCKETS,
+)
+_tool_payload = Histogram(
+    "mcp_tool_response_bytes", "Tool response size as UTF-8 JSON.", "tool", _SIZE_BUCKETS,
+)
+_db_latency = Histogram(
+    "mcp_db_request_duration_seconds", "Supabase round-trip latency by query kind.", "kind", _LATENCY_BUCKETS,
+)
+_db_payload = Histogram(
+    "mcp_db_response_bytes", "Supabase response body size by query kind.", "kind", _SIZE_BUCKETS,
+)
+_rate_limited = Counter(
+    "mcp_rate_limited_total", "Tool calls rejected by the rate limiter.", "tool",
 )
+_METRICS = (_tool_latency, _tool_payload, _db_latency, _db_payload, _rate_limited)
+
+
+# ---------------------------------------------------------------------------
+# Tracing
+# ---------------------------------------------------------------------------
+
+# Fraction of tool calls whose trace tree is logged; slow calls are always logged
+_TRACE_SAMPLE_RATE = float(os.getenv("MCP_TRACE_SAMPLE_RATE", "0.01"))
+_TRACE_SLOW_MS = float(os.getenv("MCP_TRACE_SLOW_MS", "1000"))
+_trace_logger = logging.getLogger("pasal.mcp.trace")
+
+
+class Span:
+    """One timed step of a tool call. Database round trips also record rows and bytes."""
+
+    __slots__ = ("name", "start", "end", "rows", "bytes", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: float | None = None
+        self.rows: int | None = None
+        self.bytes: int | None = None
+        self.children: list[Span] = []
+
+    def finish(self) -> None:
+        self.end = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_dict(self, origin: float | None = None) -> dict:
+        origin = self.start if origin is None else origin
+        node: dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2),
+        }
+        if self.rows is not None:
+            node["rows"] = self.rows
+        if self.bytes is not None:
+            node["bytes"] = self.bytes
+        if self.children:
+            node["spans"] = [child.to_dict(origin) for child in self.children]
+        return node
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("mcp_span", default=None)
+
+
+@contextmanager
+def _span(name: str) -> Iterator[Span | None]:
+    """Time a step as a child of the current span; a no-op outside a tool call."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    span = Span(name)
+    parent.children.append(span)
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        span.finish()
+        _current_span.reset(token)
+
+
+def _with_trace(result: Any, trace: dict) -> Any:
+    """Attach a trace tree to a tool response without touching the (possibly cached) original."""
+    if isinstance(result, dict):
+        return {**result, "_trace": trace}
+    if isinstance(result, list):
+        return [*result, {"_trace": trace}]
+    return f"{result}\n\n{json.dumps({'_trace': trace})}"
+
+
+def _metered(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Record a tool's latency and response size, and trace its steps.
+
+    Every call runs under a root span; database round trips and ``_span``
+    blocks nest beneath it. Slow and sampled calls log the tree as one JSON
+    line on the pasal.mcp.trace logger. The tool also gains an opt-in
+    ``debug`` argument that returns the tree in the response as ``_trace``.
+    """
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, debug: bool = False, **kwargs):
+        root = Span(name)
+        token = _current_span.set(root)
+        try:
+            result = await fn(*args, **kwargs)
+        finally:
+            root.finish()
+            _current_span.reset(token)
+            _tool_latency.observe(name, root.duration)
+        _tool_payload.observe(name, _json_size(result))
+        if debug or root.duration * 1000 >= _TRACE_SLOW_MS or random.random() < _TRACE_SAMPLE_RATE:
+            trace = {"trace_id": os.urandom(8).hex(), **root.to_dict()}
+            _trace_logger.info(json.dumps(trace))
+            if debug:
+                return _with_trace(result, trace)
+        return result
+
+    debug_param = inspect.Parameter(
+        "debug",
+        inspect.Parameter.KEYWORD_ONLY,
+        default=False,
+        annotation=Annotated[bool, Field(description="Include a timing trace of the call (_trace) in the response")],
+    )
+    signature = inspect.signature(fn)
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), debug_param])
+    wrapper.__annotations__ = {**fn.__annotations__, "debug": debug_param.annotation}
+    return wrapper
+
+
+def _content_range_rows(content_range: str | None) -> int | None:
+    """Row count from a PostgREST Content-Range header ("0-24/*" -> 25, "*/0" -> 0)."""
+    if not content_range:
+        return None
+    span = content_range.split("/")[0]
+    if span == "*":
+        return 0
+    first, _, last = span.partition("-")
+    try:
+        return int(last) - int(first) + 1
+    except ValueError:
+        return None
+
+
+def _query_kind(url: httpx.URL) -> str:
+    """Query kind of a PostgREST URL: rpc:<function> or table:<table>."""
+    path = url.path.removeprefix("/rest/v1/")
+    if path.startswith("rpc/"):
+        return f"rpc:{path[4:]}"
+    return f"table:{path}"
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """HTTP transport that times every Supabase round trip by query kind.
+
+    The body is read here so the latency covers the whole response and its
+    wire size is known; the client gets the same raw bytes back. Inside a
+    tool call each round trip is also a span of the call's trace.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        kind = _query_kind(request.url)
+        t0 = time.perf_counter()
+        with _span(kind) as span:
+            try:
+                response = await self._inner.handle_async_request(request)
+                try:
+                    raw = b"".join([chunk async for chunk in response.stream])
+                finally:
+                    await response.aclose()
+            finally:
+                _db_latency.observe(kind, time.perf_counter() - t0)
+            if span is not None:
+                span.rows = _content_range_rows(response.headers.get("content-range"))
+                span.bytes = len(raw)
+        _db_payload.observe(kind, len(raw))
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=httpx.ByteStream(raw),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+# ---------------------------------------------------------------------------
+# Supabase client (built lazily)
+# ---------------------------------------------------------------------------
+
+# One pooled, keep-alive HTTP client shared by every PostgREST request. Tools are
+# async so a slow query never blocks other sessions on the streamable-http loop.
+_http_pool: httpx.AsyncClient | None = None
+
+
+def _create_client(transport: httpx.AsyncBaseTransport | None = None) -> Any:
+    """Build the Supabase client on its pooled HTTP client.
+
+    Importing supabase (auth, storage, realtime, ...) is a large share of
+    module import time, so it happens here rather than at import. The
+    server calls this from _startup, so a missing key still stops it before
+    it accepts requests. ``transport`` replaces the network (benchmarks).
+    """
+    global _http_pool
+    # Require anon key (read-only via RLS) — never fall back to service role key
+    key = os.environ.get("SUPABASE_ANON_KEY")
+    if not key:
+        raise RuntimeError(
+            "SUPABASE_ANON_KEY is required. The MCP server must not use the service role key. "
+            "Set SUPABASE_ANON_KEY in your .env file."
+        )
+    from supabase import AsyncClient, AsyncClientOptions
+
+    _http_pool = httpx.AsyncClient(
+        transport=MeteredTransport(transport or httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", "50")),
+                max_keepalive_connections=int(os.getenv("SUPABASE_MAX_KEEPALIVE", "20")),
+                keepalive_expiry=30.0,
+            ),
+        )),
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        follow_redirects=True,
+    )
+    return AsyncClient(os.environ["SUPABASE_URL"], key, AsyncClientOptions(httpx_client=_http_pool))
+
+
+class LazyClient:
+    """Stands in for the Supabase client and builds it on first use."""
+
+    def __init__(self):
+        self._client = None
+
+    def connect(self) -> Any:
+        if self._client is None:
+            self._client = _create_client()
+        return self._client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.connect(), name)
+
+
+sb: Any = LazyClient()
 
 _reg_types: dict[str, int] = {}
 _reg_types_by_id: dict[int, str] = {}
 
 
-def _ensure_reg_types() -> None:
+async def _ensure_reg_types() -> None:
     """Populate the regulation type caches on first call."""
     global _reg_types, _reg_types_by_id
     if _reg_types:
         return
-    result = sb.table("regulation_types").select("id, code").execute()
-    _reg_types = {r["code"]: r["id"] for r in result.data}
-    _reg_types_by_id = {r["id"]: r["code"] for r in result.data}
-
-
-def _get_law_count() -> int:
-    """Return cached count of laws in the database (5-min TTL)."""
-    cached = _law_count_cache.get("count")
+    found = _disk_cache.get("reg_types", "all") if _disk_cache else None
+    if found is not None:
+        rows = found[0]
+    else:
+        result = await sb.table("regulation_types").select("id, code").execute()
+        rows = result.data
+        if _disk_cache:
+            _disk_cache.set("reg_types", "all", rows, 86400)
+    _reg_types = {r["code"]: r["id"] for r in rows}
+    _reg_types_by_id = {r["id"]: r["code"] for r in rows}
+
+
+async def _get_corpus_stats() -> dict | None:
+    """Pre-aggregated corpus stats row (migration 064), cached 5 min; None if the DB is unreachable."""
+    cached = _law_count_cache.get("stats")
     if cached is not None:
         return cached
     try:
-        result = sb.table("works").select("id", count="exact").execute()
-        count = result.count or 0
-    except Exception:
-        count = 0
-    _law_count_cache.set("count", count)
-    return count
+        result = await sb.rpc("get_landing_stats").execute()
+    except Exception as e:
+        logger.warning("corpus stats unavailable: %s", e)
+        return None
+    rows = result.data or []
+    stats = rows[0] if isinstance(rows, list) and rows else None
+    if stats:
+        _law_count_cache.set("stats", stats)
+    return stats
+
+
+async def _get_law_count() -> int:
+    """Number of laws in the database, never via COUNT: the works index, else corpus stats."""
+    if _works_index.loaded:
+        return len(_works_index)
+    stats = await _get_corpus_stats()
+    return stats["total_works"] if stats else 0
 
 
 def _with_disclaimer(result: dict | list) -> dict | list:
@@ -119,9 +490,41 @@ def _with_disclaimer(result: dict | list) -> dict | list:
     return result
 
 
-def _no_results_message(context: str) -> str:
+# Per-work keys that repeat on every row of a list response
+_COMPACT_WORK_FIELDS = ("law_title", "frbr_uri", "regulation_type", "year", "status", "source_url")
+
+
+def _compact(items: list[dict]) -> dict:
+    """Compact form of a list response: one disclaimer, rows grouped by work.
+
+    Each work appears once, in order of its first row, with the shared
+    _COMPACT_WORK_FIELDS as a header and its rows under "results". Rows that
+    belong to no work (errors, messages) go to "notices". Builds new dicts, so
+    cached rows are left untouched.
+    """
+    laws: dict[str, dict] = {}
+    notices = []
+    for item in items:
+        row = {k: v for k, v in item.items() if k != "disclaimer"}
+        uri = row.get("frbr_uri")
+        if not uri:
+            notices.append(row)
+            continue
+        group = laws.get(uri)
+        if group is None:
+            group = laws[uri] = {k: row[k] for k in _COMPACT_WORK_FIELDS if k in row}
+            group["results"] = []
+        group["results"].append({k: v for k, v in row.items() if k not in _COMPACT_WORK_FIELDS})
+    envelope: dict = {"laws": list(laws.values())}
+    if notices:
+        envelope["notices"] = notices
+    envelope["disclaimer"] = DISCLAIMER
+    return envelope
+
+
+async def _no_results_message(context: str) -> str:
     """Build a 'not in DB' caveat message."""
-    n = _get_law_count()
+    n = await _get_law_count()
     return (
         f"No results found for {context} in our database of {n} laws. "
         "This does NOT mean no such law exists — our database covers "
@@ -138,16 +541,24 @@ CROSS_REF_PATTERN = re.compile(
     r'Pasal\s+(\d+[A-Z]?)'
     r'(?:\s+ayat\s+\((\d+)\))?'
     r'(?:\s+(?:huruf\s+([a-z])\.?))?'
-    r'(?:\s+(?:Undang-Undang|UU)\s+(?:Nomor\s+)?(\d+)\s+Tahun\s+(\d{4}))?',
+    r'(?:\s+(?:Undang-Undang|UU)\s+(?:(?:Nomor|No\.?)\s*)?(\d+)\s+Tahun\s+(\d{4})'
+    # Any other law named after the article ("UU ITE", "PP No. 35 Tahun 2021"),
+    # but not "Undang-Undang ini" / "Peraturan Pemerintah ini" (this law)
+    r'|\s+((?:Undang-Undang|UU|Peraturan|PP|Perppu|Perpres|Permen\w*|Perda|KUHP\w*)\b'
+    r'(?:\s+(?:Nomor|No\.?|Tahun|\d[\w/.]*|(?-i:[A-Z][\w.-]*)))*+)(?!\s+ini\b))?',
     re.IGNORECASE,
 )
 
 
 def extract_cross_references(text: str) -> list[dict]:
-    """Extract cross-references to other articles from legal text."""
+    """Extract cross-references to other articles from legal text.
+
+    A law named in a form other than "UU Nomor X Tahun Y" is kept verbatim as
+    ``law``, so callers can tell it apart from a bare "Pasal N" (same law).
+    """
     refs, seen = [], set()
     for m in CROSS_REF_PATTERN.finditer(text):
-        key = (m.group(1), m.group(2), m.group(4), m.group(5))
+        key = (m.group(1), m.group(2), m.group(4), m.group(5), m.group(6))
         if key in seen:
             continue
         seen.add(key)
@@ -159,6 +570,8 @@ def extract_cross_references(text: str) -> list[dict]:
         if m.group(4) and m.group(5):
             ref["law_number"] = m.group(4)
             ref["law_year"] = int(m.group(5))
+        elif m.group(6):
+            ref["law"] = m.group(6).rstrip(" .,")
         refs.append(ref)
     return refs
 
@@ -167,44 +580,318 @@ def extract_cross_references(text: str) -> list[dict]:
 # TTL Cache
 # ---------------------------------------------------------------------------
 
+def _json_size(value: Any) -> int:
+    """Approximate in-memory footprint of a cached tool response (UTF-8 JSON bytes)."""
+    return len(json.dumps(value, default=str, ensure_ascii=False).encode())
+
+
 class TTLCache:
-    """Simple in-memory cache with per-key TTL expiration and max size."""
+    """In-memory LRU cache with a TTL, O(1) get/set and optional byte budget.
 
-    def __init__(self, ttl_seconds: int = 3600, maxsize: int = 1000):
+    Entries are kept in recency order in an OrderedDict: a hit moves the key to
+    the end and eviction pops from the front, so neither path scans the cache.
+    Expiry is lazy — a stale entry is dropped when it is read or when it reaches
+    the LRU end. When ``max_bytes`` is set each entry is sized with ``sizeof``
+    (default: JSON byte length) and the cache is bounded by total bytes as well
+    as by entry count.
+
+    A ``DiskCache`` can be attached as a second tier: memory misses fall
+    through to it and every ``set`` writes through.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        maxsize: int = 1000,
+        max_bytes: int | None = None,
+        sizeof: Callable[[Any], int] | None = None,
+    ):
         self._ttl = ttl_seconds
         self._maxsize = maxsize
-        self._data: dict[str, tuple[float, Any]] = {}
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof or _json_size
+        # key -> (expires_at, size_bytes, value), least recently used first
+        self._data: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.disk_hits = 0
+        self._backing: DiskCache | None = None
+        self._namespace = ""
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def attach(self, backing: "DiskCache", namespace: str) -> None:
+        """Put a persistent tier behind this cache under ``namespace``."""
+        self._backing = backing
+        self._namespace = namespace
 
     def get(self, key: str) -> Any | None:
         entry = self._data.get(key)
         if entry is None:
+            if self._backing is not None:
+                found = self._backing.get(self._namespace, key)
+                if found is not None:
+                    value, ttl_left = found
+                    self._store(key, value, ttl_left)
+                    self.disk_hits += 1
+                    self.hits += 1
+                    return value
+            self.misses += 1
             return None
-        ts, value = entry
-        if time.time() - ts > self._ttl:
-            del self._data[key]
+        expires_at, _, value = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
             return None
+        self._data.move_to_end(key)
+        self.hits += 1
         return value
 
     def set(self, key: str, value: Any) -> None:
-        # Evict expired entries when at capacity
-        if len(self._data) >= self._maxsize:
-            now = time.time()
-            expired = [k for k, (ts, _) in self._data.items() if now - ts > self._ttl]
-            for k in expired:
-                del self._data[k]
-        # If still at capacity, evict oldest entry
-        if len(self._data) >= self._maxsize:
-            oldest_key = min(self._data, key=lambda k: self._data[k][0])
-            del self._data[oldest_key]
-        self._data[key] = (time.time(), value)
+        self._store(key, value, self._ttl)
+        if self._backing is not None:
+            self._backing.set(self._namespace, key, value, self._ttl)
+
+    def _store(self, key: str, value: Any, ttl: float) -> None:
+        size = self._sizeof(value) if self._max_bytes is not None else 0
+        if self._max_bytes is not None and size > self._max_bytes:
+            # Never cache a single entry larger than the whole budget
+            self.delete(key)
+            return
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+        while len(self._data) > self._maxsize or (
+            self._max_bytes is not None and self._bytes > self._max_bytes
+        ):
+            oldest_key, (expires_at, _, _) = next(iter(self._data.items()))
+            self._remove(oldest_key)
+            if time.monotonic() >= expires_at:
+                self.expirations += 1
+            else:
+                self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        """Drop ``key``; True if it was held in memory."""
+        present = key in self._data
+        if present:
+            self._remove(key)
+        if self._backing is not None:
+            self._backing.delete(self._namespace, key)
+        return present
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Drop every key starting with ``prefix``. O(n); meant for rare invalidations."""
+        doomed = [key for key in self._data if key.startswith(prefix)]
+        for key in doomed:
+            self._remove(key)
+        if self._backing is not None:
+            self._backing.delete_prefix(self._namespace, prefix)
+        return len(doomed)
 
     def clear(self) -> None:
+        """Drop every entry. Counters keep counting — /metrics exports them as totals."""
         self._data.clear()
+        self._bytes = 0
+        if self._backing is not None:
+            self._backing.clear(self._namespace)
+
+    def reset_stats(self) -> None:
+        """Zero the hit/miss/eviction counters (tests only)."""
+        self.hits = self.misses = self.evictions = self.expirations = self.disk_hits = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """Return hit/miss/eviction counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "disk_hits": self.disk_hits,
+        }
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+
+# ---------------------------------------------------------------------------
+# Persistent cache tier (optional, MCP_CACHE_PATH)
+# ---------------------------------------------------------------------------
 
+# Bump when a cached tool response changes shape, so old disk entries are dropped
+_CACHE_FORMAT_VERSION = 2
 
-_pasal_cache = TTLCache(ttl_seconds=3600, maxsize=2000)
-_status_cache = TTLCache(ttl_seconds=3600, maxsize=2000)
+
+class DiskCache:
+    """SQLite-backed cache tier that survives MCP server restarts.
+
+    Every entry is stamped with the data version it was built from (see
+    ``_fetch_data_version``). ``set_version`` drops entries from any other
+    version, so a new extraction run invalidates the whole tier. Revisions and
+    reloads are evicted per work by the invalidation feeds, whose watermarks
+    are kept here (``get_meta``/``set_meta``) so a restarted server catches up
+    on what it missed. Nothing is bulk-loaded: entries are read on a memory miss.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, version TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, value TEXT NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.version = ""
+
+    def get_meta(self, name: str) -> Any | None:
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, name: str, value: Any) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, json.dumps(value)))
+
+    def set_version(self, version: str) -> int:
+        """Adopt ``version`` and drop entries built from any other. Returns rows dropped."""
+        self.version = version
+        cur = self._conn.execute("DELETE FROM entries WHERE version != ?", (version,))
+        return cur.rowcount
+
+    def get(self, namespace: str, key: str) -> tuple[Any, float] | None:
+        """Return ``(value, seconds_until_expiry)`` or None."""
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ? AND version = ?",
+            (namespace, key, self.version),
+        ).fetchone()
+        if row is None:
+            return None
+        ttl_left = row[1] - time.time()
+        if ttl_left <= 0:
+            self.delete(namespace, key)
+            return None
+        return json.loads(row[0]), ttl_left
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, version, expires_at, value)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, self.version, time.time() + ttl,
+                 json.dumps(value, default=str, ensure_ascii=False)),
+            )
+        except sqlite3.Error as e:
+            logger.warning("disk cache write failed (%s/%s): %s", namespace, key, e)
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def delete_prefix(self, namespace: str, prefix: str) -> None:
+        self._conn.execute(
+            "DELETE FROM entries WHERE namespace = ? AND substr(key, 1, ?) = ?",
+            (namespace, len(prefix), prefix),
+        )
+
+    def clear(self, namespace: str) -> None:
+        self._conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_disk_cache: DiskCache | None = None
+
+
+# Pasal text and law status change only through revisions (_poll_revisions)
+# and reloads (_refresh_works_index, _poll_loaded_jobs), which evict them as
+# they are seen, so they can live for a day.
+_pasal_cache = TTLCache(ttl_seconds=86400, maxsize=2000, max_bytes=32 * 1024 * 1024)
+_status_cache = TTLCache(ttl_seconds=86400, maxsize=2000, max_bytes=8 * 1024 * 1024)
+# Corpus stats row behind ping, /readyz and no-results messages
 _law_count_cache = TTLCache(ttl_seconds=300, maxsize=10)
+_search_cache = TTLCache(ttl_seconds=300, maxsize=1000, max_bytes=16 * 1024 * 1024)
+
+# search_laws fetches at least this many ranked rows so follow-up pages and
+# smaller limits are served from the cached list; never more than the max.
+_SEARCH_PREFETCH = 20
+_SEARCH_MAX_RESULTS = 100
+
+
+# ---------------------------------------------------------------------------
+# Request coalescing (single-flight)
+# ---------------------------------------------------------------------------
+
+class SingleFlight:
+    """Share one in-flight fetch between concurrent callers with the same key.
+
+    The first caller for a key starts the fetch as its own task; callers
+    arriving while it is still pending await the same task instead of hitting
+    Supabase again. Every caller awaits it through ``asyncio.shield``, so a
+    cancelled caller (e.g. a disconnected client) never cancels the fetch for
+    the others. ``deduplicated`` counts how many calls were served this way.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.deduplicated = 0
+
+    async def do(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.deduplicated += 1
+        else:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved — every caller may have gone
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._inflight),
+        }
+
+
+def _search_key(
+    query: str,
+    regulation_type: str | None,
+    year_from: int | None,
+    year_to: int | None,
+    language: str,
+) -> str:
+    """Normalized search_laws key: case- and whitespace-insensitive query + filters.
+
+    The limit/offset are deliberately not part of the key — one cached ranked
+    list serves every page and every smaller limit.
+    """
+    norm_query = " ".join(query.lower().split())
+    return f"{norm_query}|{(regulation_type or '').upper()}|{year_from}|{year_to}|{language}"
+
+
+_search_flight = SingleFlight()
+_pasal_flight = SingleFlight()
+_status_flight = SingleFlight()
 
 
 # ---------------------------------------------------------------------------
@@ -212,43 +899,98 @@ _law_count_cache = TTLCache(ttl_seconds=300, maxsize=10)
 # ---------------------------------------------------------------------------
 
 class RateLimiter:
-    """Simple sliding window rate limiter per tool."""
+    """Token bucket per client for one tool.
+
+    Each client may burst ``max_calls`` calls; tokens refill continuously at
+    ``max_calls`` per ``window_seconds`` on the monotonic clock. A check is one
+    dict lookup. Buckets are kept in LRU order and capped at ``max_clients`` —
+    the least recently seen client is dropped, which at worst hands an idle
+    client a full bucket early.
+    """
 
-    def __init__(self, max_calls: int, window_seconds: int = 60):
+    def __init__(self, max_calls: int, window_seconds: int = 60, max_clients: int = 10_000):
         self._max = max_calls
-        self._window = window_seconds
-        self._calls: list[float] = []
+        self._rate = max_calls / window_seconds
+        self._max_clients = max_clients
+        # client -> (tokens, monotonic time of last update)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
 
-    def check(self) -> int | None:
+    def _tokens(self, client: str, now: float) -> float:
+        tokens, updated = self._buckets.get(client, (self._max, now))
+        return min(self._max, tokens + (now - updated) * self._rate)
+
+    def check(self, client: str = "") -> int | None:
         """Return None if allowed, or seconds to wait if rate-limited."""
-        now = time.time()
-        cutoff = now - self._window
-        self._calls = [t for t in self._calls if t > cutoff]
-        if len(self._calls) >= self._max:
-            oldest = self._calls[0]
-            return int(oldest + self._window - now) + 1
-        self._calls.append(now)
-        return None
+        now = time.monotonic()
+        tokens = self._tokens(client, now)
+        allowed = tokens >= 1
+        self._buckets[client] = (tokens - 1 if allowed else tokens, now)
+        self._buckets.move_to_end(client)
+        if len(self._buckets) > self._max_clients:
+            self._buckets.popitem(last=False)
+        if allowed:
+            return None
+        return math.ceil((1 - tokens) / self._rate)
+
+    def remaining(self, client: str = "") -> int:
+        """Calls ``client`` can make right now."""
+        return int(self._tokens(client, time.monotonic()))
 
     def reset(self) -> None:
-        self._calls.clear()
+        self._buckets.clear()
 
 
 _rate_limiters = {
     "search_laws": RateLimiter(30),
     "get_pasal": RateLimiter(60),
+    "get_pasals": RateLimiter(30),
+    "resolve_citations": RateLimiter(30),
+    "get_citing_pasals": RateLimiter(30),
+    "get_law_text": RateLimiter(60),
     "get_law_status": RateLimiter(60),
     "list_laws": RateLimiter(30),
 }
 
 
+# Reverse proxies in front of the server that append to X-Forwarded-For
+# (Railway's edge is one). 0 ignores the header and keys on the socket peer.
+_TRUSTED_PROXY_HOPS = int(os.getenv("MCP_TRUSTED_PROXY_HOPS", "1"))
+
+
+def _request_client(headers: dict | Any, peer: str | None) -> str:
+    """Rate-limit identity from request headers.
+
+    The MCP session comes first: hosted clients share egress IPs, so keying
+    on IP alone would pool unrelated users. Before a session exists, use the
+    address the outermost trusted proxy saw, then the socket peer. Entries to
+    the left of that one are client-supplied and cannot be trusted.
+    """
+    session = headers.get("mcp-session-id")
+    if session:
+        return f"session:{session}"
+    forwarded = [hop.strip() for hop in (headers.get("x-forwarded-for") or "").split(",")]
+    if _TRUSTED_PROXY_HOPS and len(forwarded) >= _TRUSTED_PROXY_HOPS and forwarded[-_TRUSTED_PROXY_HOPS]:
+        return f"ip:{forwarded[-_TRUSTED_PROXY_HOPS]}"
+    return f"ip:{peer or 'unknown'}"
+
+
+def _client_id() -> str:
+    """Rate-limit identity of the caller of the current tool ("local" outside HTTP)."""
+    try:
+        request = get_http_request()
+    except RuntimeError:
+        return "local"
+    return _request_client(request.headers, request.client.host if request.client else None)
+
+
 def _check_rate_limit(tool_name: str) -> dict | None:
     """Return rate limit error dict if exceeded, else None."""
     limiter = _rate_limiters.get(tool_name)
     if not limiter:
         return None
-    wait = limiter.check()
+    wait = limiter.check(_client_id())
     if wait is not None:
+        _rate_limited.inc(tool_name)
         return _with_disclaimer({
             "error": "Rate limit exceeded",
             "retry_after_seconds": wait,
@@ -256,21 +998,380 @@ def _check_rate_limit(tool_name: str) -> dict | None:
     return None
 
 
+class RateLimitHeaders:
+    """ASGI middleware adding the caller's remaining budget to HTTP responses.
+
+    X-RateLimit-Remaining is a structured-field dictionary of tool=calls left,
+    e.g. ``search_laws=29, get_pasal=60``. Streamed (SSE) responses send their
+    headers before the tool runs, so the figures are as of the response start.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        client = _request_client(headers, scope["client"][0] if scope.get("client") else None)
+
+        async def send_with_budget(message):
+            if message["type"] == "http.response.start":
+                budget = ", ".join(
+                    f"{name}={limiter.remaining(client)}" for name, limiter in _rate_limiters.items()
+                )
+                message["headers"] = [*message.get("headers", []), (b"x-ratelimit-remaining", budget.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_budget)
+
+
 # ---------------------------------------------------------------------------
 # Shared database helpers
 # ---------------------------------------------------------------------------
 
-def _find_work(law_type: str, law_number: str, year: int) -> dict | None:
+# Work metadata the tools read; everything else (tags, ...) stays in the DB
+_WORK_COLUMNS = (
+    "id, frbr_uri, title_id, tentang, number, year, status, regulation_type_id,"
+    " source_url, date_enacted, updated_at"
+)
+# Title prefix lookups return at most this many works before ranking
+_TITLE_MATCH_SCAN = 200
+
+
+def _normalize_law_name(text: str) -> str:
+    """Lowercase, with every run of punctuation/whitespace collapsed to one space."""
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+def _title_keys(work: dict) -> set[str]:
+    """Normalized subject phrases a work can be found by (tentang, or the title after "tentang")."""
+    keys = {_normalize_law_name(work.get("tentang") or "")}
+    keys.add(_normalize_law_name(work["title_id"]).partition(" tentang ")[2])
+    keys.discard("")
+    return keys
+
+
+_WORKS_PAGE_SIZE = 1000
+
+
+class WorksIndex:
+    """In-process index of work metadata for identity lookups.
+
+    Holds the compact columns of every work keyed three ways — id,
+    (regulation_type_id, number, year) and frbr_uri — and is refreshed
+    incrementally by keyset over (updated_at, id). Until the first full load
+    (``loaded``) callers fall back to the DB.
+
+    Subject phrases (see ``_title_keys``) are kept in a sorted key array, so a
+    prefix lookup is a bisect plus a short scan. The array is built once, after
+    the first full load, and then kept sorted by ``add`` with bisect inserts
+    and removals, so a refresh never triggers a full re-sort.
+    """
+
+    def __init__(self):
+        self._by_id: dict[int, dict] = {}
+        self._by_key: dict[tuple[int, str, int], dict] = {}
+        self._by_uri: dict[str, dict] = {}
+        self._titles: list[tuple[str, int]] | None = None
+        self.cursor: tuple[str, int] | None = None
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    @staticmethod
+    def _key(row: dict) -> tuple[int, str, int]:
+        return (row["regulation_type_id"], str(row["number"]), row["year"])
+
+    def add(self, row: dict) -> None:
+        old = self._by_id.get(row["id"])
+        if old is not None:
+            # Identity columns may have changed; drop the stale aliases
+            if self._by_key.get(self._key(old)) is old:
+                del self._by_key[self._key(old)]
+            if self._by_uri.get(old["frbr_uri"]) is old:
+                del self._by_uri[old["frbr_uri"]]
+        self._by_id[row["id"]] = row
+        self._by_key[self._key(row)] = row
+        self._by_uri[row["frbr_uri"]] = row
+        if self._titles is not None:
+            if old is not None:
+                for key in _title_keys(old):
+                    i = bisect.bisect_left(self._titles, (key, old["id"]))
+                    if i < len(self._titles) and self._titles[i] == (key, old["id"]):
+                        del self._titles[i]
+            for key in _title_keys(row):
+                bisect.insort(self._titles, (key, row["id"]))
+
+    def build_titles(self) -> None:
+        """Sort every subject phrase into the key array (once, after a bulk load)."""
+        self._titles = sorted({(key, w["id"]) for w in self._by_id.values() for key in _title_keys(w)})
+
+    def get(self, work_id: int) -> dict | None:
+        return self._by_id.get(work_id)
+
+    def find(self, regulation_type_id: int, number: str, year: int) -> dict | None:
+        return self._by_key.get((regulation_type_id, str(number), year))
+
+    def by_uri(self, frbr_uri: str) -> dict | None:
+        return self._by_uri.get(frbr_uri)
+
+    def match_title(self, prefix: str, regulation_type_id: int | None = None) -> list[dict]:
+        """Works whose normalized subject starts with ``prefix``, best match first.
+
+        Exact phrase matches rank first, then laws in force, then higher in
+        the regulation hierarchy, then newest.
+        """
+        if self._titles is None:
+            self.build_titles()
+        exact: set[int] = set()
+        found: dict[int, dict] = {}
+        i = bisect.bisect_left(self._titles, (prefix,))
+        while i < len(self._titles) and len(found) < _TITLE_MATCH_SCAN:
+            key, work_id = self._titles[i]
+            if not key.startswith(prefix):
+                break
+            work = self._by_id[work_id]
+            if regulation_type_id is None or work["regulation_type_id"] == regulation_type_id:
+                found[work_id] = work
+                if key == prefix:
+                    exact.add(work_id)
+            i += 1
+        return sorted(found.values(), key=lambda w: (
+            w["id"] not in exact, w["status"] != "berlaku", w["regulation_type_id"], -w["year"],
+        ))
+
+    def count(
+        self, regulation_type_id: int | None = None, year: int | None = None, status: str | None = None,
+    ) -> int:
+        """Number of indexed works matching the given filters (as of the last refresh)."""
+        return sum(
+            1 for w in self._by_id.values()
+            if (regulation_type_id is None or w["regulation_type_id"] == regulation_type_id)
+            and (year is None or w["year"] == year)
+            and (status is None or w["status"] == status)
+        )
+
+
+_works_index = WorksIndex()
+
+
+def _work_cache_prefix(work: dict) -> str:
+    """``TYPE:number:year`` — a work's get_law_status key and get_pasal key prefix."""
+    return f"{_reg_types_by_id.get(work['regulation_type_id'], '')}:{work['number']}:{work['year']}"
+
+
+def _evict_work(work: dict) -> int:
+    """Drop every cached get_pasal and get_law_status entry of ``work`` (memory and disk)."""
+    prefix = _work_cache_prefix(work)
+    return _pasal_cache.delete_prefix(f"{prefix}:") + _status_cache.delete(prefix)
+
+
+async def _refresh_works_index() -> int:
+    """Pull works changed since the index cursor (every work on the first call).
+
+    A known work whose updated_at moved forward was re-upserted — typically a
+    reprocess that rewrites its document_nodes without writing revisions — so
+    its cached pasals and status are evicted.
+    """
+    fetched = 0
+    while True:
+        query = sb.table("works").select(_WORK_COLUMNS).order("updated_at").order("id")
+        if _works_index.cursor is not None:
+            ts, work_id = _works_index.cursor
+            query = query.or_(f'updated_at.gt."{ts}",and(updated_at.eq."{ts}",id.gt.{work_id})')
+        page = (await query.limit(_WORKS_PAGE_SIZE).execute()).data or []
+        changed = []
+        for row in page:
+            old = _works_index.get(row["id"])
+            if old is not None and old.get("updated_at") != row.get("updated_at"):
+                changed.extend((old, row))
+            _works_index.add(row)
+        if changed:
+            await _ensure_reg_types()
+            evicted = sum(_evict_work(w) for w in changed)
+            logger.info("works index: %d works changed, %d cache entries evicted",
+                        len(changed) // 2, evicted)
+        if page:
+            _works_index.cursor = (page[-1]["updated_at"], page[-1]["id"])
+        fetched += len(page)
+        if len(page) < _WORKS_PAGE_SIZE:
+            break
+    if not _works_index.loaded:
+        _works_index.build_titles()
+        logger.info("works index: loaded %d works", len(_works_index))
+    _works_index.loaded = True
+    return fetched
+
+
+# ---------------------------------------------------------------------------
+# Relationship graph
+# ---------------------------------------------------------------------------
+
+# (edge direction seen from the older law, relationship code) -> how it is superseded
+_SUPERSEDED_BY = {
+    ("source", "diubah_oleh"): "amended",
+    ("target", "mengubah"): "amended",
+    ("source", "dicabut_oleh"): "revoked",
+    ("target", "mencabut"): "revoked",
+}
+_SUPERSESSION_LABELS = {"amended": "Amended by", "revoked": "Revoked by"}
+
+
+class RelationshipGraph:
+    """Work relationships as adjacency lists keyed by work id.
+
+    Each row is stored under both endpoints in the shape the work_relationships
+    select returns (with the embedded ``relationship_types``), so get_law_status
+    reads it exactly like a query result. Rows arrive by id watermark: the
+    loader only inserts, and deleting a work cascades its rows away.
+    """
+
+    def __init__(self):
+        self._adj: dict[int, list[dict]] = {}
+        self.watermark = 0
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self._adj.values()) // 2
+
+    def add(self, row: dict) -> None:
+        for work_id in {row["source_work_id"], row["target_work_id"]}:
+            self._adj.setdefault(work_id, []).append(row)
+
+    def edges(self, work_id: int) -> list[dict]:
+        return self._adj.get(work_id, [])
+
+
+_relationship_graph = RelationshipGraph()
+_relationship_types: dict[int, dict] = {}
+
+
+async def _refresh_relationship_graph() -> int:
+    """Pull relationship rows past the graph watermark (all of them on the first call)."""
+    if not _relationship_types:
+        types = await sb.table("relationship_types").select("id, code, name_id, name_en").execute()
+        _relationship_types.update({t["id"]: t for t in types.data or []})
+
+    fetched = 0
+    while True:
+        page = (await sb.table("work_relationships").select(
+            "id, source_work_id, target_work_id, relationship_type_id"
+        ).gt("id", _relationship_graph.watermark).order("id").limit(_WORKS_PAGE_SIZE).execute()).data or []
+        for row in page:
+            row["relationship_types"] = _relationship_types.get(row["relationship_type_id"], {})
+            _relationship_graph.add(row)
+        if page:
+            _relationship_graph.watermark = page[-1]["id"]
+        fetched += len(page)
+        if len(page) < _WORKS_PAGE_SIZE:
+            break
+
+    if _relationship_graph.loaded and fetched:
+        # A new edge can extend the chain of every law upstream of it
+        _status_cache.clear()
+    _relationship_graph.loaded = True
+    return fetched
+
+
+def _superseding_laws(work_id: int, rows: list[dict]) -> set[tuple[int, str]]:
+    """Newer laws that amend or revoke ``work_id``, as ``(work_id, "amended"|"revoked")``."""
+    found = set()
+    for r in rows:
+        code = r.get("relationship_types", {}).get("code")
+        if r["source_work_id"] == work_id:
+            kind = _SUPERSEDED_BY.get(("source", code))
+            other = r["target_work_id"]
+        elif r["target_work_id"] == work_id:
+            kind = _SUPERSEDED_BY.get(("target", code))
+            other = r["source_work_id"]
+        else:
+            continue
+        if kind and other != work_id:
+            found.add((other, kind))
+    return found
+
+
+def _supersession_links(
+    work_id: int, rows_for: Callable[[int], list[dict]],
+) -> list[tuple[int, int, str]]:
+    """Transitive amend/revoke edges reachable from ``work_id`` as ``(older, newer, kind)``."""
+    links: list[tuple[int, int, str]] = []
+    seen = {work_id}
+    queue = [work_id]
+    while queue:
+        current = queue.pop(0)
+        for other, kind in sorted(_superseding_laws(current, rows_for(current))):
+            links.append((current, other, kind))
+            if other not in seen:
+                seen.add(other)
+                queue.append(other)
+    return links
+
+
+def _current_version(
+    work_id: int, links: list[tuple[int, int, str]], works: dict[int, dict],
+) -> tuple[int, int | None]:
+    """Follow revocations to the law in force, then its newest transitive amendment.
+
+    Returns ``(current_work_id, latest_amending_work_id | None)``.
+    """
+    def newest(ids):
+        known = [i for i in ids if i in works]
+        return max(known, key=lambda i: (works[i]["year"], i)) if known else None
+
+    current, visited = work_id, {work_id}
+    while True:
+        revoker = newest(n for o, n, k in links if o == current and k == "revoked" and n not in visited)
+        if revoker is None:
+            break
+        current = revoker
+        visited.add(current)
+
+    amenders, frontier = set(), [current]
+    while frontier:
+        node = frontier.pop()
+        for o, n, k in links:
+            if o == node and k == "amended" and n not in amenders and n != current:
+                amenders.add(n)
+                frontier.append(n)
+    return current, newest(amenders)
+
+
+async def _get_works(work_ids: set[int] | list[int]) -> dict[int, dict]:
+    """Work rows by id from the index; ids it doesn't hold yet come from the DB."""
+    found: dict[int, dict] = {}
+    missing = []
+    for work_id in work_ids:
+        row = _works_index.get(work_id)
+        if row is None:
+            missing.append(work_id)
+        else:
+            found[work_id] = row
+    if missing:
+        result = await sb.table("works").select(_WORK_COLUMNS).in_("id", missing).execute()
+        for row in result.data or []:
+            found[row["id"]] = row
+    return found
+
+
+async def _find_work(law_type: str, law_number: str, year: int) -> dict | None:
     """Look up a work by regulation type code, number, and year.
 
     Returns the work row dict, or None if not found.
     Populates the regulation type caches as a side effect.
     """
-    _ensure_reg_types()
+    await _ensure_reg_types()
     reg_type_id = _reg_types.get(law_type.upper())
     if not reg_type_id:
         return None
-    result = sb.table("works").select("*").match({
+    work = _works_index.find(reg_type_id, law_number, year)
+    if work is not None:
+        return work
+    # Not indexed (index still loading, or loaded since the last refresh)
+    result = await sb.table("works").select(_WORK_COLUMNS).match({
         "regulation_type_id": reg_type_id,
         "number": law_number,
         "year": year,
@@ -280,124 +1381,208 @@ def _find_work(law_type: str, law_number: str, year: int) -> dict | None:
     return result.data[0]
 
 
-def _get_chapter_info(node: dict) -> str:
-    """Retrieve the parent chapter (BAB) heading for a document node."""
-    if not node.get("parent_id"):
-        return ""
-    parent = sb.table("document_nodes").select(
-        "node_type, number, heading"
-    ).eq("id", node["parent_id"]).execute()
-    if not parent.data:
+# ---------------------------------------------------------------------------
+# Law name resolution
+# ---------------------------------------------------------------------------
+
+# Common short names that don't appear in the title (normalized keys)
+_LAW_ALIASES: dict[str, tuple[str, str, int]] = {
+    "kuhp": ("UU", "1", 2023),
+    "kuhap": ("UU", "8", 1981),
+    "uu cipta kerja": ("UU", "6", 2023),
+    "uu ciptaker": ("UU", "6", 2023),
+    "perppu cipta kerja": ("PERPPU", "2", 2022),
+    "uu ite": ("UU", "11", 2008),
+    "uu pdp": ("UU", "27", 2022),
+    "uu tipikor": ("UU", "31", 1999),
+    "uu kpk": ("UU", "30", 2002),
+    "uu minerba": ("UU", "4", 2009),
+    "uu hpp": ("UU", "7", 2021),
+    "uu tpks": ("UU", "12", 2022),
+    "uu kip": ("UU", "14", 2008),
+    "uu asn": ("UU", "20", 2023),
+    "uu ikn": ("UU", "3", 2022),
+    "uu pt": ("UU", "40", 2007),
+    "uu sisdiknas": ("UU", "20", 2003),
+}
+
+# Spelled-out type names; codes themselves ("pp", "tap mpr") are added from _reg_types
+_LAW_TYPE_NAMES = {
+    "undang undang": "UU",
+    "peraturan pemerintah pengganti undang undang": "PERPPU",
+    "perpu": "PERPPU",
+    "peraturan pemerintah": "PP",
+    "peraturan presiden": "PERPRES",
+}
+
+# "<type> [nomor|no] <number> [tahun] <year>" after normalization
+_LAW_IDENTIFIER = re.compile(r"^(.+?) (?:nomor |no )?([0-9]+[a-z]?) (?:tahun )?([0-9]{4})$")
+
+
+def _split_law_type(name: str) -> tuple[str | None, str]:
+    """Split a leading regulation type (code or spelled-out name) off a normalized name."""
+    prefixes = {code.lower().replace("_", " "): code for code in _reg_types}
+    prefixes.update(_LAW_TYPE_NAMES)
+    for prefix in sorted(prefixes, key=len, reverse=True):
+        if name == prefix or name.startswith(prefix + " "):
+            return prefixes[prefix], name[len(prefix):].strip()
+    return None, name
+
+
+def _law_candidate(law_type: str, law_number: str, year: int) -> dict:
+    work = _works_index.find(_reg_types.get(law_type, 0), law_number, year)
+    return {
+        "law_type": law_type,
+        "law_number": law_number,
+        "year": year,
+        "title": work["title_id"] if work else None,
+    }
+
+
+async def _resolve_law(law: str, limit: int = 5) -> list[dict]:
+    """Candidate identities for a free-form law name such as "UU ITE" or "UU 13/2003", best first.
+
+    Resolved locally: the alias table, then an explicit type/number/year,
+    then a subject prefix lookup in the works index.
+    """
+    await _ensure_reg_types()
+    name = _normalize_law_name(law)
+    for key in (name, f"uu {name}"):
+        if key in _LAW_ALIASES:
+            return [_law_candidate(*_LAW_ALIASES[key])]
+
+    law_type, rest = _split_law_type(name)
+    m = _LAW_IDENTIFIER.match(name)
+    if m:
+        id_type, _ = _split_law_type(m.group(1))
+        if id_type and _reg_types.get(id_type):
+            return [_law_candidate(id_type, m.group(2).upper(), int(m.group(3)))]
+
+    rest = rest.removeprefix("tentang ")
+    if len(rest) < 3:
+        return []
+    type_id = _reg_types.get(law_type) if law_type else None
+    if law_type and not type_id:
+        return []
+    return [
+        _law_candidate(_reg_types_by_id.get(w["regulation_type_id"], ""), w["number"], w["year"])
+        for w in _works_index.match_title(rest, type_id)[:limit]
+    ]
+
+
+async def _law_identity(
+    law: str | None, law_type: str | None, law_number: str | None, year: int | None,
+) -> tuple[str, str, int] | dict:
+    """(law_type, law_number, year) from explicit arguments or a ``law`` name, else an error dict."""
+    if law_type and law_number and year:
+        return law_type, law_number, year
+    if law:
+        candidates = await _resolve_law(law)
+        if candidates:
+            top = candidates[0]
+            return top["law_type"], top["law_number"], top["year"]
+        return _with_disclaimer({
+            "error": f"Could not identify law {law!r}. Use search_laws or list_laws to find it.",
+        })
+    return _with_disclaimer({"error": 'Provide law_type, law_number and year, or law (e.g. "UU ITE").'})
+
+
+def _format_chapter(parent: dict | None) -> str:
+    """Format the parent chapter (BAB) heading of a document node."""
+    if not parent:
         return ""
-    p = parent.data[0]
-    info = f"{p['node_type'].upper()} {p['number']}"
-    if p.get("heading"):
-        info += f" - {p['heading']}"
+    info = f"{parent['node_type'].upper()} {parent['number']}"
+    if parent.get("heading"):
+        info += f" - {parent['heading']}"
     return info
 
 
-def _get_available_pasals(work_id: int) -> list[str]:
-    """Get list of available pasal numbers for a work."""
-    result = sb.table("document_nodes").select("number").match({
-        "work_id": work_id,
-        "node_type": "pasal",
-    }).order("sort_order").limit(200).execute()
-    return [r["number"] for r in (result.data or [])]
+async def _fetch_pasal_bundle(law_type: str, law_number: str, year: int, pasal_number: str) -> dict:
+    """Fetch work, pasal node, ayat, chapter and fallback pasals in one RPC.
+
+    See migration 056 for the payload shape.
+    """
+    result = await sb.rpc("get_pasal_bundle", {
+        "p_type_code": law_type.upper(),
+        "p_number": law_number,
+        "p_year": year,
+        "p_pasal": pasal_number,
+    }).execute()
+    return result.data or {}
+
+
+async def _fetch_pasals_bundle(work_id: int, pasal_numbers: list[str]) -> list[dict]:
+    """Fetch several pasals of one work (node, ayat, chapter each) in one RPC.
+
+    See migration 059 for the payload shape.
+    """
+    result = await sb.rpc("get_pasals_bundle", {
+        "p_work_id": work_id,
+        "p_pasals": pasal_numbers,
+    }).execute()
+    return result.data or []
 
 
 # ---------------------------------------------------------------------------
 # MCP Tool Endpoints
 # ---------------------------------------------------------------------------
 
-@mcp.tool
-def search_laws(
+async def _load_search(
     query: str,
-    regulation_type: str | None = None,
-    year_from: int | None = None,
-    year_to: int | None = None,
-    language: str = "id",
-    limit: int = 10,
-) -> list[dict]:
-    """Search Indonesian laws and regulations by keyword.
-
-    USE WHEN: User asks about a legal topic, right, obligation, or regulation.
-    This should be your FIRST tool call for any legal question.
-    DO NEXT: Use get_pasal to retrieve the full text of relevant articles for citation.
-
-    Uses PostgreSQL full-text search with Indonesian stemming.
-    Returns relevant legal provisions with exact citations.
-    IMPORTANT: Search in Indonesian for best results (e.g., "upah minimum" not "minimum wage").
+    regulation_type: str | None,
+    year_from: int | None,
+    year_to: int | None,
+    language: str,
+    fetch_size: int,
+    cache_key: str,
+) -> dict:
+    """Run the search RPC, enrich rows with work metadata and cache the ranked list.
 
-    Args:
-        query: Search query in Indonesian (e.g., "upah minimum pekerja", "korupsi", "perkawinan")
-        regulation_type: Filter by type code — UU, PP, PERPRES, PERMEN, PERPPU, KEPPRES, INPRES, PENPRES, PERBAN, PERMENKUMHAM, PERMENKUM, PERDA, PERDA_PROV, PERDA_KAB, KEPMEN, SE, TAP_MPR, PERMA, PBI, UUDRT, UUDS
-        year_from: Only return laws enacted after this year
-        year_to: Only return laws enacted before this year
-        language: Language filter — "id" (Indonesian, default) or "en" (English translations)
-        limit: Maximum number of results (default 10)
+    Returns ``{"rows": [...], "exhausted": bool}``, or ``{"error": ...}``.
+    ``exhausted`` means the RPC had no more matches, so the list answers any
+    offset/limit without another round-trip.
     """
-    rate_err = _check_rate_limit("search_laws")
-    if rate_err:
-        return [rate_err]
-
     t0 = time.time()
-    logger.info("search_laws called: query=%r type=%s year_from=%s year_to=%s limit=%s",
-                query, regulation_type, year_from, year_to, limit)
-
-    if not query or not query.strip():
-        return _with_disclaimer(
-            [{"error": "Query cannot be empty", "suggestion": "Provide a search term in Indonesian"}]
-        )
-
-    limit = min(limit, 50)
 
     metadata_filter: dict = {}
     if regulation_type:
         metadata_filter["type"] = regulation_type.upper()
     if language != "id":
         metadata_filter["language"] = language
+    # Year range is applied inside the RPC (migrations 055/057), so every
+    # returned row is usable and we request exactly what we need.
+    if year_from:
+        metadata_filter["year_from"] = year_from
+    if year_to:
+        metadata_filter["year_to"] = year_to
 
     try:
-        result = sb.rpc("search_legal_chunks", {
+        result = await sb.rpc("search_legal_chunks", {
             "query_text": query.strip(),
-            "match_count": limit * 3,  # fetch extra to filter
+            "match_count": fetch_size,
             "metadata_filter": metadata_filter,
         }).execute()
     except Exception as e:
         logger.error("search_laws RPC failed: %s", e)
-        return _with_disclaimer([{"error": "Search failed. Please try again later."}])
+        return {"error": "Search failed. Please try again later."}
 
-    if not result.data:
-        logger.info("search_laws: no results for %r (%.0fms)", query, (time.time() - t0) * 1000)
-        return _with_disclaimer([{
-            "message": _no_results_message(f"'{query}'"),
-            "suggestion": "Try simpler keywords or remove filters",
-        }])
+    rows = result.data or []
+    works_map: dict[int, dict] = {}
+    if rows:
+        try:
+            works_map = await _get_works({r["work_id"] for r in rows})
+        except Exception as e:
+            logger.error("search_laws metadata fetch failed: %s", e)
+            return {"error": "Failed to fetch law metadata. Please try again later."}
 
-    try:
-        work_ids = list(set(r["work_id"] for r in result.data))
-        works_result = sb.table("works").select(
-            "id, frbr_uri, title_id, number, year, status, regulation_type_id"
-        ).in_("id", work_ids).execute()
-        works_map = {w["id"]: w for w in works_result.data}
-    except Exception as e:
-        logger.error("search_laws metadata fetch failed: %s", e)
-        return _with_disclaimer([{"error": "Failed to fetch law metadata. Please try again later."}])
-
-    _ensure_reg_types()
+        await _ensure_reg_types()
 
     enriched = []
-    for r in result.data:
+    for r in rows:
         work = works_map.get(r["work_id"])
         if not work:
             continue
 
-        # Apply year filter
-        if year_from and work["year"] < year_from:
-            continue
-        if year_to and work["year"] > year_to:
-            continue
-
         reg_code = _reg_types_by_id.get(work["regulation_type_id"], "")
         meta = r.get("metadata", {})
 
@@ -412,20 +1597,199 @@ def search_laws(
             "relevance_score": round(r["score"], 4),
         })
 
-        if len(enriched) >= limit:
+        if len(enriched) >= fetch_size:
             break
 
-    logger.info("search_laws: %d results for %r (%.0fms)",
+    ranked = {"rows": enriched, "exhausted": len(rows) < fetch_size}
+    _search_cache.set(cache_key, ranked)
+    logger.info("search_laws: fetched %d ranked results for %r (%.0fms)",
                 len(enriched), query, (time.time() - t0) * 1000)
-    return _with_disclaimer(enriched)
+    return ranked
+
+
+def _search_covers(ranked: dict, needed: int) -> bool:
+    """Whether a cached ranked list can answer a request for ``needed`` rows."""
+    return ranked["exhausted"] or len(ranked["rows"]) >= min(needed, _SEARCH_MAX_RESULTS)
 
 
 @mcp.tool
-def get_pasal(
-    law_type: str,
-    law_number: str,
-    year: int,
-    pasal_number: str,
+@_metered
+async def search_laws(
+    query: str,
+    regulation_type: str | None = None,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    language: str = "id",
+    limit: int = 10,
+    offset: int = 0,
+    compact: bool = False,
+) -> list[dict] | dict:
+    """Search Indonesian laws and regulations by keyword.
+
+    USE WHEN: User asks about a legal topic, right, obligation, or regulation.
+    This should be your FIRST tool call for any legal question.
+    DO NEXT: Use get_pasal to retrieve the full text of relevant articles for citation.
+
+    Uses PostgreSQL full-text search with Indonesian stemming.
+    Returns relevant legal provisions with exact citations.
+    IMPORTANT: Search in Indonesian for best results (e.g., "upah minimum" not "minimum wage").
+
+    Args:
+        query: Search query in Indonesian (e.g., "upah minimum pekerja", "korupsi", "perkawinan")
+        regulation_type: Filter by type code — UU, PP, PERPRES, PERMEN, PERPPU, KEPPRES, INPRES, PENPRES, PERBAN, PERMENKUMHAM, PERMENKUM, PERDA, PERDA_PROV, PERDA_KAB, KEPMEN, SE, TAP_MPR, PERMA, PBI, UUDRT, UUDS
+        year_from: Only return laws enacted after this year
+        year_to: Only return laws enacted before this year
+        language: Language filter — "id" (Indonesian, default) or "en" (English translations)
+        limit: Maximum number of results (default 10)
+        offset: Number of results to skip, to page through more results (default 0)
+        compact: Group results by law, with each law's title/URI/status and the
+            disclaimer stated once instead of on every result (default false)
+    """
+    rate_err = _check_rate_limit("search_laws")
+    if rate_err:
+        return [rate_err]
+
+    results = await _search_page(query, regulation_type, year_from, year_to, language, limit, offset)
+    return _compact(results) if compact else results
+
+
+async def _search_page(
+    query: str,
+    regulation_type: str | None,
+    year_from: int | None,
+    year_to: int | None,
+    language: str,
+    limit: int,
+    offset: int,
+) -> list[dict]:
+    """One page of search_laws results, each row carrying the disclaimer."""
+    logger.info("search_laws called: query=%r type=%s year_from=%s year_to=%s limit=%s offset=%s",
+                query, regulation_type, year_from, year_to, limit, offset)
+
+    if not query or not query.strip():
+        return _with_disclaimer(
+            [{"error": "Query cannot be empty", "suggestion": "Provide a search term in Indonesian"}]
+        )
+
+    limit = max(1, min(limit, 50))
+    # Offsets past the cap fall through to the "no more results" notice below
+    offset = max(0, offset)
+    needed = offset + limit
+
+    cache_key = _search_key(query, regulation_type, year_from, year_to, language)
+    ranked = _search_cache.get(cache_key)
+    if ranked is not None and _search_covers(ranked, needed):
+        logger.info("search_laws cache hit: %s", cache_key)
+    else:
+        # Round small requests up so later pages / larger limits reuse one list.
+        # Outgrowing a cached list means the caller is paging: fetch the whole
+        # ranked list once rather than one more page per call.
+        prefetch = _SEARCH_MAX_RESULTS if ranked is not None else _SEARCH_PREFETCH
+        fetch_size = min(max(needed, prefetch), _SEARCH_MAX_RESULTS)
+        ranked = await _search_flight.do(
+            f"{cache_key}|{fetch_size}",
+            lambda: _load_search(
+                query, regulation_type, year_from, year_to, language, fetch_size, cache_key,
+            ),
+        )
+
+    if "error" in ranked:
+        return _with_disclaimer([{"error": ranked["error"]}])
+
+    if not ranked["rows"]:
+        return _with_disclaimer([{
+            "message": await _no_results_message(f"'{query}'"),
+            "suggestion": "Try simpler keywords or remove filters",
+        }])
+
+    page = ranked["rows"][offset:needed]
+    if not page:
+        return _with_disclaimer([{
+            "message": f"No more results — '{query}' has {len(ranked['rows'])} results.",
+            "suggestion": "Use a smaller offset, or refine the query",
+        }])
+
+    # Copy rows so the cached ranked list is never mutated by the disclaimer
+    return _with_disclaimer([dict(r) for r in page])
+
+
+def _build_pasal_result(
+    work: dict, node: dict, ayat_data: list[dict], chapter: dict | None, pasal_number: str,
+    cross_refs: list[dict] | None = None,
+) -> dict:
+    """Shape a found pasal (node + ayat children + parent) into the get_pasal response.
+
+    ``cross_refs`` are the references resolved at load time (migration 060);
+    works loaded before that have none stored, so they are extracted here.
+    """
+    content = node["content_text"] or ""
+    if cross_refs is None:
+        cross_refs = extract_cross_references(content)
+    if len(content) > 3000:
+        content = (
+            content[:3000]
+            + f"\n\n[...truncated. Full: {len(node['content_text'])} chars. "
+            f"This article has {len(ayat_data)} ayat.]"
+        )
+
+    return _with_disclaimer({
+        "law_title": work["title_id"],
+        "frbr_uri": work["frbr_uri"],
+        "pasal_number": pasal_number,
+        "chapter": _format_chapter(chapter),
+        "content_id": content,
+        "ayat": [{"number": a["number"], "text": a["content_text"]} for a in ayat_data],
+        "cross_references": cross_refs,
+        "status": work["status"],
+        "source_url": work.get("source_url", ""),
+    })
+
+
+async def _load_pasal(
+    law_type: str, law_number: str, year: int, pasal_number: str, cache_key: str,
+) -> dict:
+    """Fetch, build and cache a get_pasal response (once per in-flight key)."""
+    t0 = time.time()
+    try:
+        bundle = await _fetch_pasal_bundle(law_type, law_number, year, pasal_number)
+        if not bundle.get("type_known"):
+            return _with_disclaimer({"error": f"Unknown regulation type: {law_type}"})
+
+        work = bundle.get("work")
+        if not work:
+            return _with_disclaimer({
+                "error": await _no_results_message(f"'{law_type} {law_number}/{year}'"),
+                "suggestion": "Use list_laws to check available regulations, or verify type/number/year.",
+            })
+
+        node = bundle.get("node")
+        if not node:
+            return _with_disclaimer({
+                "error": f"Pasal {pasal_number} not found in {law_type} {law_number}/{year}",
+                "suggestion": "Check available_pasals below, or use search_laws to find the right article.",
+                "available_pasals": bundle.get("available_pasals") or [],
+            })
+
+        logger.info("get_pasal: found pasal %s (%.0fms)", pasal_number, (time.time() - t0) * 1000)
+        result = _build_pasal_result(
+            work, node, bundle.get("ayat") or [], bundle.get("chapter"), pasal_number,
+            bundle.get("cross_references"),
+        )
+        _pasal_cache.set(cache_key, result)
+        return result
+    except Exception as e:
+        logger.error("get_pasal failed: %s", e)
+        return _with_disclaimer({"error": "Failed to retrieve pasal. Please try again later."})
+
+
+@mcp.tool
+@_metered
+async def get_pasal(
+    law_type: str | None = None,
+    law_number: str | None = None,
+    year: int | None = None,
+    pasal_number: str | None = None,
+    law: str | None = None,
 ) -> dict:
     """Get the exact text of a specific article (Pasal) from an Indonesian regulation.
 
@@ -437,166 +1801,427 @@ def get_pasal(
         law_number: The number of the law, e.g., "13"
         year: Year the law was enacted, e.g., 2003
         pasal_number: Article number, e.g., "81" or "81A"
+        law: Instead of type/number/year, a law name or nickname, e.g., "UU ITE", "KUHP",
+            "UU Ketenagakerjaan", "UU 13/2003"
     """
     rate_err = _check_rate_limit("get_pasal")
     if rate_err:
         return rate_err
 
+    if not pasal_number:
+        return _with_disclaimer({"error": "pasal_number is required."})
+    identity = await _law_identity(law, law_type, law_number, year)
+    if isinstance(identity, dict):
+        return identity
+    law_type, law_number, year = identity
+
     cache_key = f"{law_type.upper()}:{law_number}:{year}:{pasal_number}"
     cached = _pasal_cache.get(cache_key)
     if cached is not None:
         logger.info("get_pasal cache hit: %s", cache_key)
         return cached
 
-    t0 = time.time()
     logger.info("get_pasal called: %s %s/%d pasal %s", law_type, law_number, year, pasal_number)
 
+    return await _pasal_flight.do(
+        cache_key, lambda: _load_pasal(law_type, law_number, year, pasal_number, cache_key),
+    )
+
+
+class PasalRef(TypedDict):
+    law_type: str
+    law_number: str
+    year: int
+    pasal: str
+
+
+# get_pasals accepts at most this many articles once ranges are expanded
+_BATCH_MAX_PASALS = 50
+_PASAL_RANGE = re.compile(r"^\s*(\d+)\s*[-–]\s*(\d+)\s*$")
+
+
+def _pasal_range_size(pasal: str) -> int:
+    """Number of articles ``_expand_pasal_range`` would return, without building the list."""
+    m = _PASAL_RANGE.match(pasal)
+    return abs(int(m.group(2)) - int(m.group(1))) + 1 if m else 1
+
+
+def _expand_pasal_range(pasal: str) -> list[str]:
+    """"81-88" -> ["81", ..., "88"]; anything else is a single pasal number."""
+    m = _PASAL_RANGE.match(pasal)
+    if not m:
+        return [pasal.strip()]
+    start, end = int(m.group(1)), int(m.group(2))
+    if end < start:
+        start, end = end, start
+    return [str(n) for n in range(start, end + 1)]
+
+
+async def _load_pasal_group(
+    law_type: str, law_number: str, year: int, pasal_numbers: list[str],
+) -> dict[str, dict]:
+    """Resolve several pasals of one work with a single RPC; returns responses by cache key."""
+    prefix = f"{law_type}:{law_number}:{year}"
+
+    def missing(error: str) -> dict[str, dict]:
+        return {
+            f"{prefix}:{n}": _with_disclaimer({"error": error, "pasal_number": n})
+            for n in pasal_numbers
+        }
+
     try:
-        work = _find_work(law_type, law_number, year)
+        work = await _find_work(law_type, law_number, year)
         if not work:
-            # Distinguish "unknown type" from "work not found"
-            _ensure_reg_types()
-            if not _reg_types.get(law_type.upper()):
-                return _with_disclaimer({"error": f"Unknown regulation type: {law_type}"})
-            return _with_disclaimer({
-                "error": _no_results_message(f"'{law_type} {law_number}/{year}'"),
-                "suggestion": "Use list_laws to check available regulations, or verify type/number/year.",
-            })
+            if not _reg_types.get(law_type):
+                return missing(f"Unknown regulation type: {law_type}")
+            return missing(await _no_results_message(f"'{law_type} {law_number}/{year}'"))
+
+        found: dict[str, dict] = {}
+        for item in await _fetch_pasals_bundle(work["id"], pasal_numbers):
+            node = item["node"]
+            key = f"{prefix}:{node['number']}"
+            found[key] = _build_pasal_result(
+                work, node, item.get("ayat") or [], item.get("chapter"), node["number"],
+                item.get("cross_references"),
+            )
+            _pasal_cache.set(key, found[key])
+        for n in pasal_numbers:
+            found.setdefault(f"{prefix}:{n}", _with_disclaimer({
+                "error": f"Pasal {n} not found in {law_type} {law_number}/{year}",
+                "pasal_number": n,
+            }))
+        return found
+    except Exception as e:
+        logger.error("get_pasals failed for %s: %s", prefix, e)
+        return missing("Failed to retrieve pasal. Please try again later.")
 
-        node_result = sb.table("document_nodes").select("*").match({
-            "work_id": work["id"],
-            "node_type": "pasal",
-            "number": pasal_number,
-        }).execute()
 
-        if not node_result.data:
-            return _with_disclaimer({
-                "error": f"Pasal {pasal_number} not found in {law_type} {law_number}/{year}",
-                "suggestion": "Check available_pasals below, or use search_laws to find the right article.",
-                "available_pasals": _get_available_pasals(work["id"]),
-            })
+@mcp.tool
+@_metered
+async def get_pasals(pasals: list[PasalRef], compact: bool = False) -> list[dict] | dict:
+    """Get the text of several articles (Pasal) in one call, from one or more regulations.
 
-        node = node_result.data[0]
+    USE WHEN: You need more than one article — a block such as Pasal 81-88, or
+    articles from two or three laws to answer one question. Prefer this over
+    repeated get_pasal calls.
+    DO NEXT: Use get_law_status to verify each law is still in force.
 
-        ayat_result = sb.table("document_nodes").select("number, content_text").match({
-            "work_id": work["id"],
-            "parent_id": node["id"],
-            "node_type": "ayat",
-        }).order("sort_order").execute()
+    Args:
+        pasals: Articles to fetch, returned in this order. Each item has law_type
+            (e.g. "UU"), law_number (e.g. "13"), year (e.g. 2003) and pasal: one
+            article ("81", "81A") or a range of whole numbers ("81-88"; request
+            inserted articles like "81A" separately). At most 50 articles in total.
+        compact: Group articles by law, with each law's title/URI/status and the
+            disclaimer stated once instead of on every article (default false)
+    """
+    rate_err = _check_rate_limit("get_pasals")
+    if rate_err:
+        return [rate_err]
 
-        chapter_info = _get_chapter_info(node)
+    # Size ranges before expanding them, so "1-3000000" is rejected without building a list
+    requested = sum(_pasal_range_size(str(ref["pasal"])) for ref in pasals)
+    if requested > _BATCH_MAX_PASALS:
+        return [_with_disclaimer({
+            "error": f"Too many articles requested ({requested}); "
+                     f"the limit is {_BATCH_MAX_PASALS} per call.",
+        })]
 
-        content = node["content_text"] or ""
-        cross_refs = extract_cross_references(content)
-        ayat_data = ayat_result.data or []
-        if len(content) > 3000:
-            content = (
-                content[:3000]
-                + f"\n\n[...truncated. Full: {len(node['content_text'])} chars. "
-                f"This article has {len(ayat_data)} ayat.]"
-            )
+    wanted: list[tuple[str, str, int, str]] = []
+    for ref in pasals:
+        for n in _expand_pasal_range(str(ref["pasal"])):
+            wanted.append((ref["law_type"].upper(), str(ref["law_number"]), int(ref["year"]), n))
 
-        logger.info("get_pasal: found pasal %s (%.0fms)", pasal_number, (time.time() - t0) * 1000)
-        result = _with_disclaimer({
-            "law_title": work["title_id"],
-            "frbr_uri": work["frbr_uri"],
-            "pasal_number": pasal_number,
-            "chapter": chapter_info,
-            "content_id": content,
-            "ayat": [{"number": a["number"], "text": a["content_text"]} for a in ayat_data],
-            "cross_references": cross_refs,
-            "status": work["status"],
-            "source_url": work.get("source_url", ""),
-        })
-        _pasal_cache.set(cache_key, result)
-        return result
-    except Exception as e:
-        logger.error("get_pasal failed: %s", e)
-        return _with_disclaimer({"error": "Failed to retrieve pasal. Please try again later."})
+    results = await _resolve_pasals(wanted, "get_pasals")
+    return _compact(results) if compact else results
+
+
+async def _resolve_pasals(wanted: list[tuple[str, str, int, str]], tool_name: str) -> list[dict]:
+    """get_pasal responses for ``(TYPE, number, year, pasal)`` tuples, in order.
+
+    Served from _pasal_cache where possible; misses cost one RPC per work.
+    """
+    keys = [":".join(map(str, w)) for w in wanted]
+    results: dict[str, dict | None] = {key: _pasal_cache.get(key) for key in dict.fromkeys(keys)}
+
+    # Cache misses, grouped by work so each work costs one RPC
+    groups: dict[tuple[str, str, int], list[str]] = {}
+    for (law_type, law_number, year, n), key in zip(wanted, keys):
+        if results[key] is None and n not in groups.get((law_type, law_number, year), []):
+            groups.setdefault((law_type, law_number, year), []).append(n)
+
+    logger.info("%s: %d articles, %d cached, %d works to fetch", tool_name,
+                len(keys), sum(v is not None for v in results.values()), len(groups))
+    for loaded in await asyncio.gather(*(
+        _load_pasal_group(law_type, law_number, year, numbers)
+        for (law_type, law_number, year), numbers in groups.items()
+    )):
+        results.update(loaded)
+    return [results[key] for key in keys]
+
+
+def _citation_label(ref: dict) -> str:
+    label = f"Pasal {ref['pasal']}"
+    if ref.get("ayat"):
+        label += f" ayat ({ref['ayat']})"
+    if ref.get("huruf"):
+        label += f" huruf {ref['huruf']}"
+    if ref.get("law_number"):
+        label += f" UU {ref['law_number']}/{ref['law_year']}"
+    elif ref.get("law"):
+        label += f" {ref['law']}"
+    return label
+
+
+@mcp.tool
+@_metered
+async def resolve_citations(
+    text: str,
+    law_type: str | None = None,
+    law_number: str | None = None,
+    year: int | None = None,
+) -> list[dict]:
+    """Find every article citation in a text and return the verified article texts.
+
+    USE WHEN: You have a draft answer, contract clause or legal passage that cites
+    articles ("Pasal 81 ayat (2) UU Nomor 13 Tahun 2003") and want to check them
+    all at once instead of calling get_pasal for each.
+    DO NEXT: Use get_law_status to verify each cited law is still in force.
+
+    Args:
+        text: Free text containing citations
+        law_type: Optional law for bare citations like "Pasal 5" that name no law, e.g., "UU"
+        law_number: Number of that law, e.g., "13"
+        year: Year of that law, e.g., 2003
+    """
+    rate_err = _check_rate_limit("resolve_citations")
+    if rate_err:
+        return [rate_err]
+
+    default_law = (law_type.upper(), law_number, year) if law_type and law_number and year else None
+    refs = extract_cross_references(text)
+    if not refs:
+        return [_with_disclaimer({"error": "No article citations (\"Pasal ...\") found in the text."})]
+
+    # Laws named other than "UU Nomor X Tahun Y" ("UU ITE", "KUHP"), resolved locally once each
+    names = list(dict.fromkeys(ref["law"] for ref in refs if ref.get("law")))
+    named_laws = {
+        name: candidates[0] if candidates else None
+        for name, candidates in zip(names, await asyncio.gather(*(_resolve_law(n, limit=1) for n in names)))
+    }
+
+    wanted: list[tuple[str, str, int, str]] = []
+    unresolved: dict[int, dict] = {}
+    for i, ref in enumerate(refs):
+        if ref.get("law_number"):
+            wanted.append(("UU", ref["law_number"], ref["law_year"], ref["pasal"]))
+        elif ref.get("law"):
+            # A named law never falls back to default_law
+            found = named_laws[ref["law"]]
+            if found:
+                wanted.append((found["law_type"], found["law_number"], found["year"], ref["pasal"]))
+            else:
+                unresolved[i] = _with_disclaimer({
+                    "citation": _citation_label(ref),
+                    "error": f"Could not identify the law '{ref['law']}'. "
+                             "Use search_laws or list_laws to find it, then get_pasal.",
+                })
+        elif default_law is not None:
+            wanted.append((*default_law, ref["pasal"]))
+        else:
+            unresolved[i] = _with_disclaimer({
+                "citation": _citation_label(ref),
+                "error": "Citation names no law. Pass law_type, law_number and year to resolve "
+                         "bare article references.",
+            })
+    if len(set(wanted)) > _BATCH_MAX_PASALS:
+        return [_with_disclaimer({
+            "error": f"Text cites more than {_BATCH_MAX_PASALS} distinct articles; split it up.",
+        })]
+
+    resolved = iter(await _resolve_pasals(wanted, "resolve_citations"))
+    results = []
+    for i, ref in enumerate(refs):
+        if i in unresolved:
+            results.append(unresolved[i])
+            continue
+        pasal = next(resolved)
+        entry = {"citation": _citation_label(ref), **pasal}
+        if ref.get("ayat") and "ayat" in pasal:
+            entry["cited_ayat"] = next(
+                (a for a in pasal["ayat"] if a["number"] == ref["ayat"]), None,
+            )
+        results.append(entry)
+    return results
 
 
 @mcp.tool
-def get_law_status(
+@_metered
+async def get_citing_pasals(
     law_type: str,
     law_number: str,
     year: int,
+    pasal_number: str,
+    ayat: str | None = None,
+    limit: int = 20,
+    cursor: int | None = None,
 ) -> dict:
-    """Check whether an Indonesian regulation is still in force, has been amended, or was revoked.
+    """List the articles that cite a given article (reverse cross-references).
 
-    USE WHEN: You need to verify a law's validity before citing it to the user.
-    ALWAYS check status before presenting legal information — a revoked law is misleading.
-    Returns the full amendment/revocation chain.
+    USE WHEN: You need to know what else depends on an article — e.g. which
+    articles refer to Pasal 81 of UU 13/2003, within the same law or from others.
+    DO NEXT: Use get_pasals to read the citing articles.
 
     Args:
-        law_type: Regulation type code, e.g., "UU"
-        law_number: The number of the law, e.g., "1"
-        year: Year the law was enacted, e.g., 1974
+        law_type: Regulation type code of the cited law, e.g., "UU"
+        law_number: Number of the cited law, e.g., "13"
+        year: Year of the cited law, e.g., 2003
+        pasal_number: The cited article, e.g., "81"
+        ayat: Only citations of this ayat, e.g., "2" (default: any ayat or the whole article)
+        limit: Max results per page (default 20, max 100)
+        cursor: next_cursor from the previous page
     """
-    rate_err = _check_rate_limit("get_law_status")
+    rate_err = _check_rate_limit("get_citing_pasals")
     if rate_err:
         return rate_err
 
-    cache_key = f"{law_type.upper()}:{law_number}:{year}"
-    cached = _status_cache.get(cache_key)
-    if cached is not None:
-        logger.info("get_law_status cache hit: %s", cache_key)
-        return cached
+    limit = min(max(limit, 1), 100)
+    try:
+        work = await _find_work(law_type, law_number, year)
+        if not work:
+            if not _reg_types.get(law_type.upper()):
+                return _with_disclaimer({"error": f"Unknown regulation type: {law_type}"})
+            return _with_disclaimer({
+                "error": await _no_results_message(f"'{law_type} {law_number}/{year}'"),
+            })
 
-    t0 = time.time()
-    logger.info("get_law_status called: %s %s/%d", law_type, law_number, year)
+        # Keyed on (target_work_id, target_pasal), which survives reloads of either work
+        query = sb.table("cross_references").select(
+            "id, work_id, source_ayat, target_ayat, target_huruf,"
+            " source:document_nodes!source_node_id(number)"
+        ).eq("target_work_id", work["id"]).eq("target_pasal", pasal_number)
+        if ayat:
+            query = query.eq("target_ayat", ayat)
+        if cursor:
+            query = query.gt("id", cursor)
+        rows = (await query.order("id").limit(limit + 1).execute()).data or []
+
+        page = rows[:limit]
+        works = await _get_works({r["work_id"] for r in page}) if page else {}
+        citing = []
+        for r in page:
+            source = works.get(r["work_id"])
+            if not source:
+                continue
+            cites = f"Pasal {pasal_number}"
+            if r.get("target_ayat"):
+                cites += f" ayat ({r['target_ayat']})"
+            if r.get("target_huruf"):
+                cites += f" huruf {r['target_huruf']}"
+            citing.append({
+                "law": f"{_reg_types_by_id.get(source['regulation_type_id'], '')} "
+                       f"{source['number']}/{source['year']}",
+                "law_title": source["title_id"],
+                "frbr_uri": source["frbr_uri"],
+                "pasal": (r.get("source") or {}).get("number"),
+                "ayat": r.get("source_ayat"),
+                "cites": cites,
+            })
+
+        logger.info("get_citing_pasals: %s %s/%d pasal %s -> %d rows",
+                    law_type, law_number, year, pasal_number, len(citing))
+        return _with_disclaimer({
+            "law_title": work["title_id"],
+            "frbr_uri": work["frbr_uri"],
+            "pasal_number": pasal_number,
+            "citing_pasals": citing,
+            "next_cursor": page[-1]["id"] if len(rows) > limit else None,
+        })
+    except Exception as e:
+        logger.error("get_citing_pasals failed: %s", e)
+        return _with_disclaimer({"error": "Failed to retrieve citing articles. Please try again later."})
 
+
+async def _load_law_status(law_type: str, law_number: str, year: int, cache_key: str) -> dict:
+    """Fetch, build and cache a get_law_status response (once per in-flight key)."""
+    t0 = time.time()
     try:
-        work = _find_work(law_type, law_number, year)
+        work = await _find_work(law_type, law_number, year)
         if not work:
-            _ensure_reg_types()
+            await _ensure_reg_types()
             if not _reg_types.get(law_type.upper()):
                 return _with_disclaimer({"error": f"Unknown regulation type: {law_type}"})
             return _with_disclaimer({
-                "error": _no_results_message(f"'{law_type} {law_number}/{year}'"),
+                "error": await _no_results_message(f"'{law_type} {law_number}/{year}'"),
             })
 
-        rels = sb.table("work_relationships").select(
-            "*, relationship_types(code, name_id, name_en)"
-        ).or_(
-            f"source_work_id.eq.{work['id']},target_work_id.eq.{work['id']}"
-        ).execute()
-
-        rel_rows = rels.data or []
+        if _relationship_graph.loaded:
+            rel_rows = _relationship_graph.edges(work["id"])
+            rows_for = _relationship_graph.edges
+        else:
+            rels = await sb.table("work_relationships").select(
+                "*, relationship_types(code, name_id, name_en)"
+            ).or_(
+                f"source_work_id.eq.{work['id']},target_work_id.eq.{work['id']}"
+            ).execute()
+            rel_rows = rels.data or []
+
+            def rows_for(work_id: int) -> list[dict]:
+                # Without the graph only direct neighbours are known
+                return rel_rows if work_id == work["id"] else []
+
+        with _span("supersession_links"):
+            links = _supersession_links(work["id"], rows_for)
         related_work_ids = {
             wid
             for r in rel_rows
             for wid in (r["source_work_id"], r["target_work_id"])
-        } - {work["id"]}
-
-        related_works: dict[int, dict] = {}
-        if related_work_ids:
-            rw = sb.table("works").select(
-                "id, frbr_uri, title_id, number, year, status, regulation_type_id"
-            ).in_("id", list(related_work_ids)).execute()
-            related_works = {w["id"]: w for w in rw.data}
-
-        amendments = []
-        related = []
-        for r in rel_rows:
-            rel_type = r.get("relationship_types", {})
-            other_id = r["target_work_id"] if r["source_work_id"] == work["id"] else r["source_work_id"]
-            other_work = related_works.get(other_id)
-            if not other_work:
-                continue
-
-            other_code = _reg_types_by_id.get(other_work["regulation_type_id"], "")
-            entry = {
-                "relationship": rel_type.get("name_en", ""),
-                "relationship_id": rel_type.get("name_id", ""),
-                "law": f"{other_code} {other_work['number']}/{other_work['year']}",
-                "full_title": other_work["title_id"],
-                "frbr_uri": other_work["frbr_uri"],
-            }
-
-            if rel_type.get("code") in AMENDMENT_REL_CODES:
-                amendments.append(entry)
-            else:
-                related.append(entry)
+        } | {wid for link in links for wid in link[:2]}
+        related_work_ids.discard(work["id"])
+
+        related_works = await _get_works(related_work_ids) if related_work_ids else {}
+        related_works[work["id"]] = work
+
+        def law_label(w: dict) -> str:
+            return f"{_reg_types_by_id.get(w['regulation_type_id'], '')} {w['number']}/{w['year']}"
+
+        with _span("enrich"):
+            amendments = []
+            related = []
+            for r in rel_rows:
+                rel_type = r.get("relationship_types", {})
+                other_id = r["target_work_id"] if r["source_work_id"] == work["id"] else r["source_work_id"]
+                other_work = related_works.get(other_id)
+                if not other_work:
+                    continue
+
+                entry = {
+                    "relationship": rel_type.get("name_en", ""),
+                    "relationship_id": rel_type.get("name_id", ""),
+                    "law": law_label(other_work),
+                    "full_title": other_work["title_id"],
+                    "frbr_uri": other_work["frbr_uri"],
+                }
+
+                if rel_type.get("code") in AMENDMENT_REL_CODES:
+                    amendments.append(entry)
+                else:
+                    related.append(entry)
+
+            chain = [
+                {
+                    "law": law_label(related_works[newer]),
+                    "full_title": related_works[newer]["title_id"],
+                    "frbr_uri": related_works[newer]["frbr_uri"],
+                    "relationship": _SUPERSESSION_LABELS[kind],
+                    "of": law_label(related_works[older]),
+                }
+                for older, newer, kind in sorted(
+                    links, key=lambda link: (related_works.get(link[1], {}).get("year", 0), link[1]),
+                )
+                if older in related_works and newer in related_works
+            ]
+            current_id, latest_id = _current_version(work["id"], links, related_works)
+            current = related_works[current_id]
 
         logger.info("get_law_status: %s %s/%d status=%s (%.0fms)",
                      law_type, law_number, year, work["status"], (time.time() - t0) * 1000)
@@ -608,6 +2233,14 @@ def get_law_status(
             "date_enacted": str(work["date_enacted"]) if work.get("date_enacted") else None,
             "amendments": amendments,
             "related_laws": related,
+            "amendment_chain": chain,
+            "current_version": {
+                "law": law_label(current),
+                "full_title": current["title_id"],
+                "frbr_uri": current["frbr_uri"],
+                "status": current["status"],
+                "latest_amendment": law_label(related_works[latest_id]) if latest_id else None,
+            },
         })
         _status_cache.set(cache_key, result)
         return result
@@ -617,13 +2250,59 @@ def get_law_status(
 
 
 @mcp.tool
-def list_laws(
+@_metered
+async def get_law_status(
+    law_type: str | None = None,
+    law_number: str | None = None,
+    year: int | None = None,
+    law: str | None = None,
+) -> dict:
+    """Check whether an Indonesian regulation is still in force, has been amended, or was revoked.
+
+    USE WHEN: You need to verify a law's validity before citing it to the user.
+    ALWAYS check status before presenting legal information — a revoked law is misleading.
+    Returns direct amendments, the full transitive amendment/revocation chain
+    (amendment_chain) and the law now in force with its latest amendment (current_version).
+
+    Args:
+        law_type: Regulation type code, e.g., "UU"
+        law_number: The number of the law, e.g., "1"
+        year: Year the law was enacted, e.g., 1974
+        law: Instead of type/number/year, a law name or nickname, e.g., "UU Perkawinan", "UU PDP"
+    """
+    rate_err = _check_rate_limit("get_law_status")
+    if rate_err:
+        return rate_err
+
+    identity = await _law_identity(law, law_type, law_number, year)
+    if isinstance(identity, dict):
+        return identity
+    law_type, law_number, year = identity
+
+    cache_key = f"{law_type.upper()}:{law_number}:{year}"
+    cached = _status_cache.get(cache_key)
+    if cached is not None:
+        logger.info("get_law_status cache hit: %s", cache_key)
+        return cached
+
+    logger.info("get_law_status called: %s %s/%d", law_type, law_number, year)
+
+    return await _status_flight.do(
+        cache_key, lambda: _load_law_status(law_type, law_number, year, cache_key),
+    )
+
+
+@mcp.tool
+@_metered
+async def list_laws(
     regulation_type: str | None = None,
     year: int | None = None,
     status: str | None = None,
     search: str | None = None,
     page: int = 1,
     per_page: int = 20,
+    cursor: str | None = None,
+    exact_total: bool = False,
 ) -> dict:
     """Browse available Indonesian regulations with optional filters.
 
@@ -634,9 +2313,12 @@ def list_laws(
         regulation_type: Filter by type — UU, PP, PERPRES, PERMEN, PERPPU, KEPPRES, INPRES, PENPRES, PERBAN, PERMENKUMHAM, PERMENKUM, PERDA, KEPMEN, SE, TAP_MPR, PERMA, PBI, UUDRT, UUDS, etc.
         year: Filter by year enacted
         status: Filter by status — "berlaku" (in force), "dicabut" (revoked), "diubah" (amended)
-        search: Keyword filter on law title
-        page: Page number (default 1)
+        search: Keywords matched against title and subject (tentang); results are ranked by relevance
+        page: Page number (default 1). Prefer cursor for paging deep into results.
         per_page: Results per page (default 20)
+        cursor: next_cursor from the previous response; continues after it (page is ignored).
+            Not used with search — ranked results page by page number.
+        exact_total: Count matches exactly (slower). By default total is an estimate.
     """
     rate_err = _check_rate_limit("list_laws")
     if rate_err:
@@ -647,18 +2329,39 @@ def list_laws(
                 regulation_type, year, status, search, page)
 
     try:
-        _ensure_reg_types()
+        await _ensure_reg_types()
 
         # Clamp pagination params to safe ranges
         page = max(1, page)
         per_page = max(1, min(100, per_page))
 
-        query = sb.table("works").select("*, regulation_types(code, name_id)", count="exact")
+        keyset = None
+        if cursor:
+            try:
+                cursor_year, cursor_id = (int(part) for part in cursor.split(":"))
+                keyset = (cursor_year, cursor_id)
+            except ValueError:
+                return _with_disclaimer({"error": f"Invalid cursor: {cursor!r}"})
 
+        reg_type_id = None
         if regulation_type:
             reg_type_id = _reg_types.get(regulation_type.upper())
-            if reg_type_id:
-                query = query.eq("regulation_type_id", reg_type_id)
+
+        if search and search.strip():
+            return await _search_works(search, reg_type_id, year, status, page, per_page, t0)
+
+        # Totals: exact COUNT only on request. The works index counts the
+        # filters for free; until it has loaded use the planner estimate.
+        if exact_total:
+            count_mode = "exact"
+        elif not _works_index.loaded:
+            count_mode = "estimated"
+        else:
+            count_mode = None
+        query = sb.table("works").select("*, regulation_types(code, name_id)", count=count_mode)
+
+        if reg_type_id:
+            query = query.eq("regulation_type_id", reg_type_id)
 
         if year:
             query = query.eq("year", year)
@@ -666,14 +2369,23 @@ def list_laws(
         if status:
             query = query.eq("status", status)
 
-        if search:
-            safe_search = search.replace("%", r"\%").replace("_", r"\_")
-            query = query.ilike("title_id", f"%{safe_search}%")
-
-        offset = (page - 1) * per_page
-        result = query.order("year", desc=True).range(offset, offset + per_page - 1).execute()
-
-        total = result.count or 0
+        # Keyset on (year, id) keeps deep pages as cheap as the first one
+        query = query.order("year", desc=True).order("id", desc=True)
+        if keyset:
+            query = query.or_(
+                f"year.lt.{keyset[0]},and(year.eq.{keyset[0]},id.lt.{keyset[1]})"
+            ).limit(per_page)
+        else:
+            offset = (page - 1) * per_page
+            query = query.range(offset, offset + per_page - 1)
+        result = await query.execute()
+
+        rows = result.data or []
+        if count_mode is None:
+            total = _works_index.count(reg_type_id, year, status)
+        else:
+            total = result.count or 0
+        last = rows[-1] if len(rows) == per_page else None
         laws = [
             {
                 "frbr_uri": w["frbr_uri"],
@@ -683,33 +2395,570 @@ def list_laws(
                 "year": w["year"],
                 "status": w["status"],
             }
-            for w in (result.data or [])
+            for w in rows
         ]
 
         logger.info("list_laws: %d/%d results (%.0fms)", len(laws), total, (time.time() - t0) * 1000)
         return _with_disclaimer({
             "total": total,
+            "total_is_exact": exact_total,
             "page": page,
             "per_page": per_page,
             "laws": laws,
+            "next_cursor": f"{last['year']}:{last['id']}" if last and "id" in last else None,
         })
     except Exception as e:
         logger.error("list_laws failed: %s", e)
         return _with_disclaimer({"error": "Failed to list laws. Please try again later."})
 
 
+async def _search_works(
+    search: str,
+    reg_type_id: int | None,
+    year: int | None,
+    status: str | None,
+    page: int,
+    per_page: int,
+    t0: float,
+) -> dict:
+    """list_laws title search via the trigram/FTS-indexed search_works RPC."""
+    result = await sb.rpc("search_works", {
+        "p_query": search.strip(),
+        "p_type_id": reg_type_id,
+        "p_year": year,
+        "p_status": status,
+        "p_limit": per_page,
+        "p_offset": (page - 1) * per_page,
+    }).execute()
+
+    rows = result.data or []
+    # total_count is counted over all matches before LIMIT/OFFSET
+    total = rows[0]["total_count"] if rows else 0
+    laws = [
+        {
+            "frbr_uri": w["frbr_uri"],
+            "title": w["title_id"],
+            "regulation_type": _reg_types_by_id.get(w["regulation_type_id"], ""),
+            "number": w["number"],
+            "year": w["year"],
+            "status": w["status"],
+            "score": round(w["score"], 4),
+        }
+        for w in rows
+    ]
+
+    logger.info("list_laws search: %d/%d results (%.0fms)", len(laws), total, (time.time() - t0) * 1000)
+    return _with_disclaimer({
+        "total": total,
+        "total_is_exact": bool(rows) or page == 1,
+        "page": page,
+        "per_page": per_page,
+        "laws": laws,
+        "next_cursor": None,
+    })
+
+
+# get_law_text: nodes fetched per round-trip and the default/max response budget
+_LAW_TEXT_FETCH = 100
+_LAW_TEXT_DEFAULT_BYTES = 20_000
+_LAW_TEXT_MAX_BYTES = 60_000
+# Ayat text is already part of its pasal's content_text
+_LAW_TEXT_SKIP_TYPES = frozenset({"ayat"})
+
+
+def _node_label(node: dict) -> str:
+    kind = "Pasal" if node["node_type"] == "pasal" else node["node_type"].upper()
+    label = f"{kind} {node.get('number') or ''}".strip()
+    if node.get("heading"):
+        label += f" - {node['heading']}"
+    return label
+
+
 @mcp.tool
-def ping() -> str:
-    """Health check — verify the MCP server is running and connected to the database."""
+@_metered
+async def get_law_text(
+    law_type: str,
+    law_number: str,
+    year: int,
+    cursor: int | None = None,
+    max_bytes: int = _LAW_TEXT_DEFAULT_BYTES,
+) -> dict:
+    """Read a whole regulation in order, one page at a time.
+
+    USE WHEN: You need the full text of a law or a long stretch of it (all of a
+    BAB, the whole structure), rather than a few known articles.
+    Each page has a table-of-contents slice (toc) and the text of its nodes.
+    Call again with next_cursor until it is null.
+
+    Args:
+        law_type: Regulation type code, e.g., "UU"
+        law_number: The number of the law, e.g., "6"
+        year: Year the law was enacted, e.g., 2023
+        cursor: next_cursor from the previous page (omit for the first page)
+        max_bytes: Approximate size budget for the page text (default 20000, max 60000)
+    """
+    rate_err = _check_rate_limit("get_law_text")
+    if rate_err:
+        return rate_err
+
+    t0 = time.time()
+    budget = min(max(max_bytes, 1000), _LAW_TEXT_MAX_BYTES)
     try:
-        result = sb.table("works").select("id", count="exact").execute()
-        count = result.count or 0
-        return f"Pasal.id MCP server is running. Database has {count} laws loaded."
+        work = await _find_work(law_type, law_number, year)
+        if not work:
+            if not _reg_types.get(law_type.upper()):
+                return _with_disclaimer({"error": f"Unknown regulation type: {law_type}"})
+            return _with_disclaimer({
+                "error": await _no_results_message(f"'{law_type} {law_number}/{year}'"),
+            })
+
+        toc: list[str] = []
+        nodes: list[dict] = []
+        used = 0
+        position = cursor or 0
+        next_cursor: int | None = None
+        # Keyset on (work_id, sort_order): each round-trip is an index range scan
+        while next_cursor is None:
+            batch = (await sb.table("document_nodes").select(
+                "node_type, number, heading, content_text, depth, sort_order"
+            ).eq("work_id", work["id"]).gt("sort_order", position).order("sort_order").limit(
+                _LAW_TEXT_FETCH
+            ).execute()).data or []
+
+            for node in batch:
+                if node["node_type"] in _LAW_TEXT_SKIP_TYPES:
+                    position = node["sort_order"]
+                    continue
+                label = _node_label(node)
+                text = node.get("content_text") or ""
+                size = len(label.encode()) + len(text.encode())
+                if used + size > budget:
+                    # Text already on the page, or only headings so far and this
+                    # node fits a fresh page: it starts the next page
+                    if nodes or (toc and size <= budget):
+                        next_cursor = position
+                        break
+                    # No page can hold it whole: send it cut to the room left
+                    room = max(budget - used - len(label.encode()), 0)
+                    raw = text.encode()
+                    if len(raw) > room:
+                        text = raw[:room].decode(errors="ignore") + "\n\n[...truncated]"
+                        size = len(label.encode()) + room
+                toc.append("  " * (node.get("depth") or 0) + label)
+                if text:
+                    nodes.append({"node": label, "text": text})
+                used += size
+                position = node["sort_order"]
+
+            if len(batch) < _LAW_TEXT_FETCH:
+                break
+            if next_cursor is None and used >= budget:
+                next_cursor = position
+
+        logger.info("get_law_text: %s %s/%d after %s -> %d nodes, %d bytes (%.0fms)",
+                    law_type, law_number, year, cursor, len(toc), used, (time.time() - t0) * 1000)
+        return _with_disclaimer({
+            "law_title": work["title_id"],
+            "frbr_uri": work["frbr_uri"],
+            "status": work["status"],
+            "toc": toc,
+            "nodes": nodes,
+            "next_cursor": next_cursor,
+        })
     except Exception as e:
-        logger.error("ping DB check failed: %s", e)
+        logger.error("get_law_text failed: %s", e)
+        return _with_disclaimer({"error": "Failed to retrieve law text. Please try again later."})
+
+
+@mcp.tool
+@_metered
+async def ping() -> str:
+    """Health check — verify the MCP server is running and connected to the database."""
+    count = await _get_law_count()
+    if not count:
         return "Server running but database connection failed."
+    return f"Pasal.id MCP server is running. Database has {count} laws loaded."
+
+
+# (metric suffix, stats key, type, help) exported for every TTLCache
+_CACHE_METRICS = (
+    ("hits_total", "hits", "counter", "Cache lookups served from memory or disk."),
+    ("misses_total", "misses", "counter", "Cache lookups that fell through to the database."),
+    ("hit_ratio", "hit_ratio", "gauge", "Hits divided by lookups since start."),
+    ("evictions_total", "evictions", "counter", "Entries evicted to stay within size bounds."),
+    ("entries", "entries", "gauge", "Entries currently held in memory."),
+    ("bytes", "bytes", "gauge", "Approximate bytes currently held in memory."),
+)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    caches = {"pasal": _pasal_cache, "status": _status_cache, "law_count": _law_count_cache, "search": _search_cache}
+    flights = {"search": _search_flight, "pasal": _pasal_flight, "status": _status_flight}
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    for suffix, key, kind, help_text in _CACHE_METRICS:
+        lines += [f"# HELP mcp_cache_{suffix} {help_text}", f"# TYPE mcp_cache_{suffix} {kind}"]
+        lines += [f"mcp_cache_{suffix}{{{_label('cache', name)}}} {s[key]}" for name, s in stats.items()]
+    lines += [
+        "# HELP mcp_singleflight_deduplicated_total Calls that shared an identical in-flight fetch.",
+        "# TYPE mcp_singleflight_deduplicated_total counter",
+    ]
+    lines += [
+        f"mcp_singleflight_deduplicated_total{{{_label('flight', name)}}} {flight.deduplicated}"
+        for name, flight in flights.items()
+    ]
+    return "\n".join(lines) + "\n"
+
+
+@mcp.custom_route("/healthz", methods=["GET"])
+async def healthz(request: Request) -> JSONResponse:
+    """Liveness: the process is serving HTTP. Never touches the database."""
+    return JSONResponse({"status": "ok"})
+
+
+@mcp.custom_route("/readyz", methods=["GET"])
+async def readyz(request: Request) -> JSONResponse:
+    """Readiness: the database answers, judged by the cached corpus stats row (no COUNT)."""
+    stats = await _get_corpus_stats()
+    body = {
+        "status": "ready" if stats else "unavailable",
+        "laws": len(_works_index) if _works_index.loaded else (stats or {}).get("total_works"),
+        "pasals": (stats or {}).get("pasal_count"),
+        "works_index_loaded": _works_index.loaded,
+        "relationship_graph_loaded": _relationship_graph.loaded,
+    }
+    return JSONResponse(body, status_code=200 if stats else 503)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint, served next to the streamable-http transport."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# ---------------------------------------------------------------------------
+# Lifecycle
+# ---------------------------------------------------------------------------
+
+async def _fetch_data_version() -> str:
+    """Disk-tier stamp: cache format + newest parser (extraction) version.
+
+    Deliberately excludes revisions and load times — the worker touches those on
+    every law it loads, and the feeds already evict those works one by one.
+    """
+    load = await sb.table("crawl_jobs").select("extraction_version").eq(
+        "status", "loaded"
+    ).order("extraction_version", desc=True).limit(1).execute()
+    extraction = load.data[0]["extraction_version"] if load.data else 0
+    return f"{_CACHE_FORMAT_VERSION}:x{extraction}"
+
+
+async def _open_disk_cache() -> None:
+    """Attach the SQLite tier behind the in-memory caches when MCP_CACHE_PATH is set."""
+    global _disk_cache
+    path = os.getenv("MCP_CACHE_PATH")
+    if not path or _disk_cache is not None:
+        return
+    try:
+        version = await _fetch_data_version()
+        disk = DiskCache(path)
+    except Exception as e:
+        logger.warning("disk cache disabled: %s", e)
+        return
+    dropped = disk.set_version(version)
+    for cache, namespace in (
+        (_pasal_cache, "pasal"), (_status_cache, "status"), (_search_cache, "search"),
+    ):
+        cache.attach(disk, namespace)
+    _disk_cache = disk
+    logger.info("disk cache at %s (version %s, dropped %d stale entries)", path, version, dropped)
+
+
+def _save_watermark(name: str, value: Any) -> None:
+    """Persist an invalidation feed position, so the disk tier is caught up after a restart."""
+    if _disk_cache is not None:
+        _disk_cache.set_meta(name, value)
+
+
+_revision_watermark: int | None = None
+_background_tasks: list[asyncio.Task] = []
+_REVISION_BATCH = 500
+
+
+async def _poll_revisions() -> int:
+    """Evict cache entries touched by revisions newer than the watermark.
+
+    The first call resumes from the watermark in the disk tier, or else only
+    records the latest revision id. A revision to a pasal
+    drops that pasal's key; any other node type (ayat, bab, ...) drops every
+    cached pasal of the work, since the parent pasal number isn't on the row.
+    The work's get_law_status entry is dropped either way. Returns entries evicted.
+    """
+    global _revision_watermark
+    if _revision_watermark is None:
+        _revision_watermark = _disk_cache.get_meta("revision_watermark") if _disk_cache else None
+    if _revision_watermark is None:
+        latest = await sb.table("revisions").select("id").order("id", desc=True).limit(1).execute()
+        _revision_watermark = latest.data[0]["id"] if latest.data else 0
+        _save_watermark("revision_watermark", _revision_watermark)
+        return 0
+
+    evicted = 0
+    while True:
+        result = await sb.table("revisions").select(
+            "id, work_id, node_type, node_number"
+        ).gt("id", _revision_watermark).order("id").limit(_REVISION_BATCH).execute()
+        revs = result.data or []
+        if not revs:
+            return evicted
+
+        await _ensure_reg_types()
+        works = await _get_works({r["work_id"] for r in revs})
+        prefixes = {w["id"]: _work_cache_prefix(w) for w in works.values()}
+        for r in revs:
+            prefix = prefixes.get(r["work_id"])
+            if prefix is None:
+                continue
+            if r["node_type"] == "pasal" and r.get("node_number"):
+                evicted += _pasal_cache.delete(f"{prefix}:{r['node_number']}")
+            else:
+                evicted += _pasal_cache.delete_prefix(f"{prefix}:")
+            evicted += _status_cache.delete(prefix)
+
+        _revision_watermark = revs[-1]["id"]
+        _save_watermark("revision_watermark", _revision_watermark)
+        logger.info("invalidation: %d revisions up to #%d, %d cache entries evicted",
+                    len(revs), _revision_watermark, evicted)
+        if len(revs) < _REVISION_BATCH:
+            return evicted
+
+
+_loaded_jobs_cursor: tuple[str, int] | None = None
+
+
+async def _poll_loaded_jobs() -> int:
+    """Evict works whose crawl job finished (re)loading since the last poll.
+
+    A reprocess bumps works.updated_at before it re-inserts document_nodes, so
+    the eviction in _refresh_works_index can be followed by a request that
+    caches partial text. The job turns status='loaded' only once the nodes are
+    in, so evicting again here closes that window. The first call resumes from
+    the cursor in the disk tier, or else only records the newest loaded job.
+    Returns entries evicted.
+    """
+    global _loaded_jobs_cursor
+    if _loaded_jobs_cursor is None and _disk_cache is not None:
+        stored = _disk_cache.get_meta("loaded_jobs_cursor")
+        _loaded_jobs_cursor = tuple(stored) if stored else None
+    if _loaded_jobs_cursor is None:
+        latest = await sb.table("crawl_jobs").select("id, updated_at").eq(
+            "status", "loaded"
+        ).order("updated_at", desc=True).order("id", desc=True).limit(1).execute()
+        _loaded_jobs_cursor = (
+            (latest.data[0]["updated_at"], latest.data[0]["id"]) if latest.data
+            else ("1970-01-01T00:00:00+00:00", 0)
+        )
+        _save_watermark("loaded_jobs_cursor", _loaded_jobs_cursor)
+        return 0
+
+    evicted = 0
+    while True:
+        ts, job_id = _loaded_jobs_cursor
+        result = await sb.table("crawl_jobs").select("id, work_id, updated_at").eq(
+            "status", "loaded"
+        ).or_(f'updated_at.gt."{ts}",and(updated_at.eq."{ts}",id.gt.{job_id})').order(
+            "updated_at"
+        ).order("id").limit(_REVISION_BATCH).execute()
+        jobs = result.data or []
+        if not jobs:
+            return evicted
+
+        await _ensure_reg_types()
+        works = await _get_works({j["work_id"] for j in jobs if j.get("work_id")})
+        evicted += sum(_evict_work(w) for w in works.values())
+
+        _loaded_jobs_cursor = (jobs[-1]["updated_at"], jobs[-1]["id"])
+        _save_watermark("loaded_jobs_cursor", _loaded_jobs_cursor)
+        logger.info("invalidation: %d loaded jobs, %d cache entries evicted", len(jobs), evicted)
+        if len(jobs) < _REVISION_BATCH:
+            return evicted
+
+
+async def _run_every(interval: float, poll: Callable[[], Awaitable[Any]], label: str) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await poll()
+        except Exception as e:
+            logger.warning("%s failed: %s", label, e)
+
+
+# Hot laws warmed into the caches at startup: Ketenagakerjaan, Perkawinan,
+# KUHP, PDP, ITE. Override with MCP_PREWARM_URIS (comma-separated, empty = off).
+_PREWARM_DEFAULT_URIS = (
+    "/akn/id/act/uu/2003/13",
+    "/akn/id/act/uu/1974/1",
+    "/akn/id/act/uu/2023/1",
+    "/akn/id/act/uu/2022/27",
+    "/akn/id/act/uu/2008/11",
+)
+_PREWARM_PAGE_SIZE = 1000
+
+
+def _prewarm_uris() -> list[str]:
+    raw = os.getenv("MCP_PREWARM_URIS")
+    if raw is None:
+        return list(_PREWARM_DEFAULT_URIS)
+    return [uri.strip() for uri in raw.split(",") if uri.strip()]
+
+
+async def _fetch_all(table: str, columns: str, work_id: int, *order: str) -> list[dict]:
+    """Every row of ``table`` for one work, paged past PostgREST's row cap."""
+    rows: list[dict] = []
+    while True:
+        query = sb.table(table).select(columns).eq("work_id", work_id)
+        for column in order:
+            query = query.order(column)
+        page = await query.range(len(rows), len(rows) + _PREWARM_PAGE_SIZE - 1).execute()
+        rows.extend(page.data or [])
+        if len(page.data or []) < _PREWARM_PAGE_SIZE:
+            return rows
+
+
+async def _fetch_work_nodes(work_id: int) -> list[dict]:
+    """All document nodes of a work in reading order."""
+    return await _fetch_all(
+        "document_nodes", "id, node_type, number, heading, content_text, parent_id, sort_order",
+        work_id, "sort_order", "id",
+    )
+
+
+async def _fetch_work_cross_references(work_id: int) -> dict[int, list[dict]] | None:
+    """Stored references of a work by citing node, shaped like get_pasal_bundle's.
+
+    None when the work has none stored (see migration 060).
+    """
+    rows = await _fetch_all(
+        "cross_references",
+        "id, source_node_id, target_pasal, target_ayat, target_huruf, target_law_number,"
+        " target_law_year, target_law, target_work_id, target_node_id, target_ayat_node_id",
+        work_id, "id",
+    )
+    if not rows:
+        return None
+    by_source: dict[int, list[dict]] = {}
+    for r in rows:
+        target = _works_index.get(r["target_work_id"]) if r["target_work_id"] else None
+        ref = {
+            "pasal": r["target_pasal"],
+            "ayat": r["target_ayat"],
+            "huruf": r["target_huruf"],
+            "law_number": r["target_law_number"],
+            "law_year": r["target_law_year"],
+            "law": r.get("target_law"),
+            "frbr_uri": target["frbr_uri"] if target else None,
+            "node_id": r["target_node_id"],
+            "ayat_node_id": r["target_ayat_node_id"],
+        }
+        by_source.setdefault(r["source_node_id"], []).append(
+            {k: v for k, v in ref.items() if v is not None}
+        )
+    return by_source
+
+
+async def _prewarm_work(work: dict) -> int:
+    """Warm get_law_status and every get_pasal entry of one work. Returns pasals cached."""
+    code = _reg_types_by_id.get(work["regulation_type_id"])
+    if not code:
+        return 0
+    prefix = f"{code}:{work['number']}:{work['year']}"
+    if _status_cache.get(prefix) is None:
+        await _load_law_status(code, work["number"], work["year"], prefix)
+
+    nodes, refs = await asyncio.gather(
+        _fetch_work_nodes(work["id"]), _fetch_work_cross_references(work["id"]),
+    )
+    by_id = {n["id"]: n for n in nodes}
+    ayat_by_parent: dict[int, list[dict]] = {}
+    for n in nodes:
+        if n["node_type"] == "ayat":
+            ayat_by_parent.setdefault(n["parent_id"], []).append(n)
+
+    # Same resolution as get_pasal_bundle: first pasal with a number in sort order wins
+    warmed: set[str] = set()
+    for n in nodes:
+        if n["node_type"] != "pasal" or n["number"] in warmed:
+            continue
+        warmed.add(n["number"])
+        _pasal_cache.set(f"{prefix}:{n['number']}", _build_pasal_result(
+            work, n, ayat_by_parent.get(n["id"], []), by_id.get(n["parent_id"]), n["number"],
+            refs.get(n["id"], []) if refs is not None else None,
+        ))
+    return len(warmed)
+
+
+async def _prewarm() -> None:
+    """Load the works index and relationship graph, then warm the caches for the hot laws."""
+    t0 = time.time()
+    await _ensure_reg_types()
+    await _refresh_works_index()
+    await _refresh_relationship_graph()
+    uris = _prewarm_uris()
+    if not uris:
+        return
+    works = [w for w in map(_works_index.by_uri, uris) if w is not None]
+    counts = await asyncio.gather(*(_prewarm_work(w) for w in works))
+    logger.info("prewarm: %d works, %d pasals (%.0fms)",
+                len(counts), sum(counts), (time.time() - t0) * 1000)
+
+
+async def _startup() -> None:
+    if isinstance(sb, LazyClient):
+        sb.connect()
+    await _open_disk_cache()
+    # Take the feed watermarks before warming, so nothing applied meanwhile is missed
+    for poll in (_poll_revisions, _poll_loaded_jobs):
+        try:
+            await poll()
+        except Exception as e:
+            logger.warning("invalidation feed unavailable: %s", e)
+    for env, default, poll, label in (
+        ("MCP_INVALIDATION_POLL_SECONDS", "30", _poll_revisions, "invalidation poll"),
+        ("MCP_INVALIDATION_POLL_SECONDS", "30", _poll_loaded_jobs, "loaded jobs poll"),
+        ("MCP_WORKS_REFRESH_SECONDS", "60", _refresh_works_index, "works index refresh"),
+        ("MCP_WORKS_REFRESH_SECONDS", "60", _refresh_relationship_graph, "relationship graph refresh"),
+    ):
+        interval = float(os.getenv(env, default))
+        if interval > 0:
+            _background_tasks.append(asyncio.create_task(_run_every(interval, poll, label)))
+
+    # Runs inside the lifespan, so the HTTP listener only opens once this returns
+    budget = float(os.getenv("MCP_PREWARM_BUDGET_SECONDS", "15"))
+    if budget <= 0:
+        return
+    try:
+        await asyncio.wait_for(_prewarm(), timeout=budget)
+    except asyncio.TimeoutError:
+        logger.warning("prewarm: %.0fs budget exhausted, serving with partially warm caches", budget)
+    except Exception as e:
+        logger.warning("prewarm failed: %s", e)
+
+
+async def _shutdown() -> None:
+    for task in _background_tasks:
+        task.cancel()
+    _background_tasks.clear()
+    if _disk_cache is not None:
+        _disk_cache.close()
+    if _http_pool is not None:
+        await _http_pool.aclose()
 
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", "8000"))
-    mcp.run(transport="streamable-http", host="0.0.0.0", port=port)
+    from starlette.middleware import Middleware
+
+    mcp.run(transport="streamable-http", host="0.0.0.0", port=port, middleware=[Middleware(RateLimitHeaders)])
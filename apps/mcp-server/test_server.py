@@ -1,22 +1,27 @@
 """Tests for Pasal.id MCP server — all Supabase calls are mocked."""
 
-import os
+import asyncio
+import json
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock
 
-# Env vars required by server module at import time
-os.environ.setdefault("SUPABASE_URL", "https://fake.supabase.co")
-os.environ.setdefault("SUPABASE_ANON_KEY", "fake-key")
+import server
+
+
+def _sync(fn):
+    """Run an async server callable to completion from a synchronous test."""
+    return lambda *args, **kwargs: asyncio.run(fn(*args, **kwargs))
 
-# Patch create_client before importing server so module-level init works
-with patch("supabase.create_client", return_value=MagicMock()):
-    import server
 
 # @mcp.tool wraps functions in FunctionTool; access the raw callables via .fn
-search_laws = server.search_laws.fn
-get_pasal = server.get_pasal.fn
-get_law_status = server.get_law_status.fn
-list_laws = server.list_laws.fn
+search_laws = _sync(server.search_laws.fn)
+get_pasal = _sync(server.get_pasal.fn)
+get_law_status = _sync(server.get_law_status.fn)
+get_pasals = _sync(server.get_pasals.fn)
+resolve_citations = _sync(server.resolve_citations.fn)
+get_citing_pasals = _sync(server.get_citing_pasals.fn)
+get_law_text = _sync(server.get_law_text.fn)
+list_laws = _sync(server.list_laws.fn)
 
 
 # ---------------------------------------------------------------------------
@@ -24,7 +29,7 @@ list_laws = server.list_laws.fn
 # ---------------------------------------------------------------------------
 
 _CHAINABLE = (
-    "select", "eq", "neq", "in_", "ilike", "or_", "match",
+    "select", "eq", "neq", "gt", "in_", "ilike", "or_", "match",
     "order", "range", "limit", "single",
 )
 
@@ -34,10 +39,18 @@ def _qm(data: list | None = None, count: int = 0):
     m = MagicMock()
     for attr in _CHAINABLE:
         getattr(m, attr).return_value = m
-    m.execute.return_value = MagicMock(data=data or [], count=count)
+    m.execute = AsyncMock(return_value=MagicMock(data=data or [], count=count))
     return m
 
 
+def _sb():
+    """Mock async Supabase client: ``await sb.rpc(...).execute()`` works."""
+    sb = MagicMock()
+    sb.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=[]))
+    sb.table.return_value = _qm()
+    return sb
+
+
 # ---------------------------------------------------------------------------
 # Fixtures
 # ---------------------------------------------------------------------------
@@ -49,11 +62,22 @@ def _reset():
     server._reg_types_by_id = {}
     server._law_count = None
     server._law_count_ts = 0.0
-    server._pasal_cache.clear()
-    server._status_cache.clear()
+    for cache in (server._pasal_cache, server._status_cache, server._law_count_cache, server._search_cache):
+        cache.clear()
+        cache.reset_stats()
+    server._search_flight = server.SingleFlight()
+    server._pasal_flight = server.SingleFlight()
+    server._status_flight = server.SingleFlight()
+    server._revision_watermark = None
+    server._loaded_jobs_cursor = None
+    server._works_index = server.WorksIndex()
+    server._relationship_graph = server.RelationshipGraph()
     for limiter in server._rate_limiters.values():
         limiter.reset()
-    server.sb.reset_mock()
+    for metric in server._METRICS:
+        metric.reset()
+    # Fresh client mock so side_effects from one test never leak into the next
+    server.sb = _sb()
     yield
 
 
@@ -84,29 +108,34 @@ class TestSearchLaws:
         server.sb.rpc.return_value.execute.return_value = MagicMock(data=[])
         search_laws("test", limit=100)
 
-        rpc_args = server.sb.rpc.call_args[0][1]
-        assert rpc_args["match_count"] == 50 * 3  # limit capped to 50, then *3
+        rpc_args = server.sb.rpc.call_args_list[0][0][1]  # later calls fetch corpus stats
+        assert rpc_args["match_count"] == 50  # limit capped to 50, no over-fetch
 
-    def test_year_filter_excludes_outside_range(self, reg_cache):
+    def test_year_range_pushed_into_rpc(self, reg_cache):
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=[])
+        search_laws("test", year_from=2014, year_to=2019)
+
+        rpc_args = server.sb.rpc.call_args_list[0][0][1]  # later calls fetch corpus stats
+        assert rpc_args["metadata_filter"]["year_from"] == 2014
+        assert rpc_args["metadata_filter"]["year_to"] == 2019
+
+    def test_rpc_rows_not_post_filtered_by_year(self, reg_cache):
+        """The RPC already applied the year range — every row it returns is kept."""
         server.sb.rpc.return_value.execute.return_value = MagicMock(data=[
             {"work_id": 1, "content": "a", "score": 0.9, "metadata": {"pasal": "1"}},
             {"work_id": 2, "content": "b", "score": 0.8, "metadata": {"pasal": "2"}},
-            {"work_id": 3, "content": "c", "score": 0.7, "metadata": {"pasal": "3"}},
         ])
-
         works_mock = _qm(data=[
             {"id": 1, "frbr_uri": "/a", "title_id": "T1", "number": "1",
-             "year": 2020, "status": "berlaku", "regulation_type_id": 1},
-            {"id": 2, "frbr_uri": "/b", "title_id": "T2", "number": "2",
              "year": 2015, "status": "berlaku", "regulation_type_id": 1},
-            {"id": 3, "frbr_uri": "/c", "title_id": "T3", "number": "3",
-             "year": 2010, "status": "berlaku", "regulation_type_id": 1},
+            {"id": 2, "frbr_uri": "/b", "title_id": "T2", "number": "2",
+             "year": 2019, "status": "berlaku", "regulation_type_id": 1},
         ])
         server.sb.table.side_effect = lambda n: works_mock if n == "works" else _qm()
 
-        result = search_laws("test", year_from=2014, year_to=2019)
-        assert len(result) == 1
-        assert result[0]["year"] == 2015
+        result = search_laws("test", year_from=2014, year_to=2019, limit=2)
+        assert [r["year"] for r in result] == [2015, 2019]
+        assert server.sb.rpc.call_args[0][1]["match_count"] == 20  # prefetch floor
 
     def test_unknown_regulation_type_still_searches(self, reg_cache):
         server.sb.rpc.return_value.execute.return_value = MagicMock(data=[])
@@ -135,40 +164,129 @@ class TestSearchLaws:
 
 
 # ===================================================================
-# get_pasal
+# search_laws result cache
 # ===================================================================
 
-class TestGetPasal:
+class TestSearchCache:
 
     @staticmethod
-    def _make_router(work: dict, node_responses: list):
-        """Build a table router for get_pasal tests.
+    def _setup(n_rows: int):
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=[
+            {"work_id": 1, "content": f"c{i}", "score": 1.0 - i / 100,
+             "metadata": {"pasal": str(i)}}
+            for i in range(n_rows)
+        ])
+        works_mock = _qm(data=[
+            {"id": 1, "frbr_uri": "/a", "title_id": "T", "number": "1",
+             "year": 2020, "status": "berlaku", "regulation_type_id": 1},
+        ])
+        server.sb.table.side_effect = lambda n: works_mock if n == "works" else _qm()
 
-        ``node_responses`` is an ordered list of _qm mocks returned by
-        successive ``sb.table("document_nodes")`` calls.
-        """
-        node_calls = iter(node_responses)
+    def test_repeat_query_skips_rpc(self, reg_cache):
+        self._setup(5)
+        first = search_laws("upah minimum")
+        second = search_laws("  Upah  MINIMUM ")
+        assert first == second
+        assert server.sb.rpc.call_count == 1
+
+    def test_smaller_limit_and_later_page_served_from_cache(self, reg_cache):
+        self._setup(20)  # 20 rows for match_count 20 → not exhausted
+        full = search_laws("korupsi", limit=20)
+        assert len(full) == 20
+
+        assert search_laws("korupsi", limit=5) == full[:5]
+        assert search_laws("korupsi", limit=10, offset=10) == full[10:20]
+        assert server.sb.rpc.call_count == 1
+
+    def test_larger_limit_refetches_when_not_exhausted(self, reg_cache):
+        self._setup(60)
+        search_laws("korupsi", limit=10)
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=[
+            {"work_id": 1, "content": f"c{i}", "score": 1.0, "metadata": {"pasal": str(i)}}
+            for i in range(50)
+        ])
+        result = search_laws("korupsi", limit=50)
+        assert len(result) == 50
+        assert server.sb.rpc.call_count == 2
+        assert server.sb.rpc.call_args[0][1]["match_count"] == server._SEARCH_MAX_RESULTS
+
+    def test_paging_refetches_at_most_once(self, reg_cache):
+        self._setup(server._SEARCH_MAX_RESULTS)
+        pages = [search_laws("korupsi", limit=10, offset=o) for o in range(0, 100, 10)]
+        assert all(len(p) == 10 for p in pages)
+        assert [c[0][1]["match_count"] for c in server.sb.rpc.call_args_list] == [
+            server._SEARCH_PREFETCH, server._SEARCH_MAX_RESULTS,
+        ]
 
-        def router(name):
-            if name == "works":
-                return _qm(data=[work])
-            if name == "document_nodes":
-                return next(node_calls)
-            return _qm()
-        return router
+    def test_exhausted_list_serves_any_limit(self, reg_cache):
+        self._setup(3)  # fewer rows than requested → RPC exhausted
+        search_laws("perkawinan", limit=10)
+        result = search_laws("perkawinan", limit=50)
+        assert len(result) == 3
+        assert server.sb.rpc.call_count == 1
+
+    def test_offset_past_end_returns_message(self, reg_cache):
+        self._setup(3)
+        result = search_laws("perkawinan", offset=10)
+        assert "message" in result[0]
+        assert "disclaimer" in result[0]
+
+    def test_offset_past_cap_returns_message(self, reg_cache):
+        self._setup(server._SEARCH_MAX_RESULTS)
+        result = search_laws("korupsi", offset=200)
+        assert len(result) == 1
+        assert "No more results" in result[0]["message"]
+        assert server.sb.rpc.call_args[0][1]["match_count"] == server._SEARCH_MAX_RESULTS
+
+    def test_cached_rows_not_mutated(self, reg_cache):
+        self._setup(3)
+        search_laws("perkawinan")
+        cached = server._search_cache.get(
+            server._search_key("perkawinan", None, None, None, "id"))
+        assert all("disclaimer" not in r for r in cached["rows"])
+
+    def test_filters_are_part_of_key(self, reg_cache):
+        self._setup(3)
+        search_laws("pajak")
+        search_laws("pajak", regulation_type="PP")
+        assert server.sb.rpc.call_count == 2
+
+
+# ===================================================================
+# get_pasal
+# ===================================================================
+
+class TestGetPasal:
+
+    @staticmethod
+    def _bundle(work: dict | None = None, node: dict | None = None, **extra):
+        """Mock a single ``get_pasal_bundle`` RPC response."""
+        data = {"type_known": True, "work": work, "node": node, **extra}
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=data)
 
     def test_unknown_law_type_returns_error(self, reg_cache):
+        server.sb.rpc.return_value.execute.return_value = MagicMock(
+            data={"type_known": False},
+        )
         result = get_pasal("FAKE", "1", 2003, "1")
         assert result["error"] == "Unknown regulation type: FAKE"
 
+    def test_single_rpc_round_trip(self, reg_cache):
+        work = {"id": 1, "title_id": "T", "frbr_uri": "/a", "status": "berlaku"}
+        node = {"id": 10, "content_text": "Text", "parent_id": None, "number": "5"}
+        self._bundle(work, node, ayat=[], chapter=None)
+
+        get_pasal("uu", "1", 2020, "5")
+
+        server.sb.rpc.assert_called_once_with("get_pasal_bundle", {
+            "p_type_code": "UU", "p_number": "1", "p_year": 2020, "p_pasal": "5",
+        })
+        server.sb.table.assert_not_called()
+
     def test_missing_pasal_returns_available_pasals(self, reg_cache):
         work = {"id": 1, "title_id": "T", "frbr_uri": "/a", "number": "13",
                 "year": 2003, "status": "berlaku", "regulation_type_id": 1}
-
-        server.sb.table.side_effect = self._make_router(work, [
-            _qm(data=[]),                                       # pasal not found
-            _qm(data=[{"number": "1"}, {"number": "2"}]),       # _get_available_pasals
-        ])
+        self._bundle(work, None, available_pasals=["1", "2"])
 
         result = get_pasal("UU", "13", 2003, "999")
         assert "error" in result
@@ -182,17 +300,12 @@ class TestGetPasal:
             "year": 2003, "status": "berlaku", "regulation_type_id": 1,
             "source_url": "https://example.com",
         }
-        node = {
-            "id": 10, "content_text": "Setiap pekerja berhak...",
-            "parent_id": 5, "number": "1", "node_type": "pasal",
-        }
+        node = {"id": 10, "content_text": "Setiap pekerja berhak...",
+                "parent_id": 5, "number": "1"}
         parent = {"node_type": "bab", "number": "I", "heading": "Ketentuan Umum"}
-
-        server.sb.table.side_effect = self._make_router(work, [
-            _qm(data=[node]),                                                   # pasal node
-            _qm(data=[{"number": "1", "content_text": "Ayat satu"},
-                       {"number": "2", "content_text": "Ayat dua"}]),           # ayat children
-            _qm(data=[parent]),                                                 # parent bab
+        self._bundle(work, node, chapter=parent, ayat=[
+            {"number": "1", "content_text": "Ayat satu"},
+            {"number": "2", "content_text": "Ayat dua"},
         ])
 
         result = get_pasal("UU", "13", 2003, "1")
@@ -202,29 +315,147 @@ class TestGetPasal:
         assert "Ketentuan Umum" in result["chapter"]
 
     def test_ayat_ordering_preserved(self, reg_cache):
-        """Server preserves the DB sort order (.order('sort_order'))."""
+        """Server preserves the order returned by the RPC (sort_order)."""
         work = {
             "id": 1, "title_id": "T", "frbr_uri": "/a", "number": "1",
             "year": 2020, "status": "berlaku", "regulation_type_id": 1,
             "source_url": "",
         }
-        node = {
-            "id": 10, "content_text": "Text", "parent_id": None,
-            "number": "5", "node_type": "pasal",
-        }
-
-        server.sb.table.side_effect = self._make_router(work, [
-            _qm(data=[node]),
-            _qm(data=[{"number": "2", "content_text": "Second"},
-                       {"number": "1", "content_text": "First"},
-                       {"number": "3", "content_text": "Third"}]),
-            # parent_id is None so no parent lookup
+        node = {"id": 10, "content_text": "Text", "parent_id": None, "number": "5"}
+        self._bundle(work, node, chapter=None, ayat=[
+            {"number": "2", "content_text": "Second"},
+            {"number": "1", "content_text": "First"},
+            {"number": "3", "content_text": "Third"},
         ])
 
         result = get_pasal("UU", "1", 2020, "5")
         assert [a["number"] for a in result["ayat"]] == ["2", "1", "3"]
 
 
+# ===================================================================
+# Async data access — concurrent sessions don't serialize
+# ===================================================================
+
+class TestAsyncConcurrency:
+
+    def test_concurrent_get_pasal_calls_overlap(self, reg_cache):
+        work = {"id": 1, "title_id": "T", "frbr_uri": "/a", "status": "berlaku"}
+        node = {"id": 10, "content_text": "Text", "parent_id": None, "number": "5"}
+
+        async def slow_execute():
+            await asyncio.sleep(0.1)
+            return MagicMock(data={"type_known": True, "work": work, "node": node,
+                                   "ayat": [], "chapter": None})
+
+        server.sb.rpc.return_value.execute = slow_execute
+
+        async def run_many():
+            return await asyncio.gather(*(
+                server.get_pasal.fn("UU", "1", 2020, str(i)) for i in range(10)
+            ))
+
+        import time as _time
+        t0 = _time.perf_counter()
+        results = asyncio.run(run_many())
+        elapsed = _time.perf_counter() - t0
+
+        assert all("error" not in r for r in results)
+        # Ten 100ms round-trips in parallel, not back-to-back (1s)
+        assert elapsed < 0.5
+
+
+# ===================================================================
+# Single-flight request coalescing
+# ===================================================================
+
+class TestSingleFlight:
+
+    def test_concurrent_identical_get_pasal_share_one_fetch(self, reg_cache):
+        work = {"id": 1, "title_id": "T", "frbr_uri": "/a", "status": "berlaku"}
+        node = {"id": 10, "content_text": "Text", "parent_id": None, "number": "81"}
+
+        async def slow_execute():
+            await asyncio.sleep(0.05)
+            return MagicMock(data={"type_known": True, "work": work, "node": node,
+                                   "ayat": [], "chapter": None})
+
+        server.sb.rpc.return_value.execute = AsyncMock(side_effect=slow_execute)
+
+        async def run_many():
+            return await asyncio.gather(*(
+                server.get_pasal.fn("UU", "13", 2003, "81") for _ in range(10)
+            ))
+
+        results = asyncio.run(run_many())
+        assert server.sb.rpc.return_value.execute.await_count == 1
+        assert all(r["content_id"] == "Text" for r in results)
+        assert server._pasal_flight.deduplicated == 9
+
+    def test_distinct_keys_not_coalesced(self):
+        flight = server.SingleFlight()
+        calls = []
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        async def run():
+            return await asyncio.gather(
+                flight.do("a", lambda: fetch("a")),
+                flight.do("b", lambda: fetch("b")),
+            )
+
+        assert asyncio.run(run()) == ["a", "b"]
+        assert calls == ["a", "b"]
+        assert flight.deduplicated == 0
+
+    def test_exception_shared_with_waiters(self):
+        flight = server.SingleFlight()
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise ValueError("db down")
+
+        async def run():
+            return await asyncio.gather(
+                flight.do("k", boom), flight.do("k", boom), return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.stats()["in_flight"] == 0
+
+    def test_cancelled_leader_does_not_cancel_followers(self):
+        flight = server.SingleFlight()
+        fetches = []
+
+        async def fetch():
+            fetches.append(1)
+            await asyncio.sleep(0.05)
+            return "value"
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do("k", fetch))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("k", fetch))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        assert asyncio.run(run()) == "value"
+        assert fetches == [1]
+        assert flight.deduplicated == 1
+        assert flight.stats()["in_flight"] == 0
+
+    def test_search_key_normalizes_query(self):
+        a = server._search_key("  Upah   Minimum ", "uu", None, None, "id")
+        b = server._search_key("upah minimum", "UU", None, None, "id")
+        assert a == b
+
+
 # ===================================================================
 # get_law_status
 # ===================================================================
@@ -333,13 +564,17 @@ class TestListLaws:
         assert result["page"] == 2
         assert result["per_page"] == 10
 
-    def test_search_produces_ilike(self, reg_cache):
+    def test_search_uses_search_works_rpc(self, reg_cache):
         works_mock = _qm(data=[], count=0)
         server.sb.table.side_effect = lambda n: works_mock if n == "works" else _qm()
 
-        list_laws(search="ketenagakerjaan")
+        list_laws(search=" ketenagakerjaan ")
 
-        works_mock.ilike.assert_called_once_with("title_id", "%ketenagakerjaan%")
+        works_mock.ilike.assert_not_called()
+        server.sb.rpc.assert_called_once_with("search_works", {
+            "p_query": "ketenagakerjaan", "p_type_id": None, "p_year": None,
+            "p_status": None, "p_limit": 20, "p_offset": 0,
+        })
 
     def test_no_args_does_not_crash(self, reg_cache):
         works_mock = _qm(data=[], count=0)
@@ -351,6 +586,100 @@ class TestListLaws:
         assert result["laws"] == []
 
 
+class TestListLawsKeyset:
+
+    def _rows(self, n, year=2020):
+        return [{"id": 100 - i, "frbr_uri": f"/a/{i}", "title_id": "T", "number": str(i), "year": year,
+                 "status": "berlaku", "regulation_types": {"code": "UU"}} for i in range(n)]
+
+    def test_full_page_returns_cursor(self, reg_cache):
+        works_mock = _qm(data=self._rows(2), count=9)
+        server.sb.table.side_effect = lambda n: works_mock if n == "works" else _qm()
+
+        result = list_laws(per_page=2)
+        assert result["next_cursor"] == "2020:99"
+        works_mock.order.assert_any_call("id", desc=True)
+
+    def test_cursor_uses_keyset_not_offset(self, reg_cache):
+        works_mock = _qm(data=self._rows(1), count=9)
+        server.sb.table.side_effect = lambda n: works_mock if n == "works" else _qm()
+
+        result = list_laws(per_page=2, cursor="2020:99", page=50)
+        works_mock.or_.assert_called_once_with("year.lt.2020,and(year.eq.2020,id.lt.99)")
+        works_mock.limit.assert_called_once_with(2)
+        works_mock.range.assert_not_called()
+        assert result["next_cursor"] is None
+
+    def test_invalid_cursor(self, reg_cache):
+        assert "Invalid cursor" in list_laws(cursor="abc")["error"]
+
+    def test_total_from_works_index_without_count(self, reg_cache):
+        for i, (year, status) in enumerate([(2020, "berlaku"), (2020, "dicabut"), (2021, "berlaku")]):
+            server._works_index.add({**_work(i + 1, str(i), year), "status": status})
+        server._works_index.loaded = True
+        works_mock = _qm(data=[], count=0)
+        server.sb.table.side_effect = lambda n: works_mock if n == "works" else _qm()
+
+        result = list_laws(year=2020)
+        works_mock.select.assert_called_once_with("*, regulation_types(code, name_id)", count=None)
+        assert result["total"] == 2
+        assert result["total_is_exact"] is False
+
+    def test_exact_total_opt_in(self, reg_cache):
+        works_mock = _qm(data=[], count=7)
+        server.sb.table.side_effect = lambda n: works_mock if n == "works" else _qm()
+
+        result = list_laws(exact_total=True)
+        works_mock.select.assert_called_once_with("*, regulation_types(code, name_id)", count="exact")
+        assert result["total"] == 7
+        assert result["total_is_exact"] is True
+
+    def test_search_ignores_cursor(self, reg_cache):
+        result = list_laws(search="pajak", cursor="2020:99", page=2, per_page=5)
+        assert server.sb.rpc.call_args[0][1]["p_offset"] == 5
+        assert result["next_cursor"] is None
+
+
+class TestListLawsSearch:
+
+    def _row(self, work_id, score, total):
+        return {"id": work_id, "frbr_uri": f"/a/{work_id}", "title_id": "UU Pajak", "number": str(work_id),
+                "year": 2020, "status": "berlaku", "regulation_type_id": 1, "score": score,
+                "total_count": total}
+
+    def test_ranked_results_keep_rpc_order(self, reg_cache):
+        server.sb.rpc.return_value.execute.return_value = MagicMock(
+            data=[self._row(2, 1.8, 5), self._row(1, 0.412345, 5)]
+        )
+
+        result = list_laws(search="pajak")
+        assert [law["number"] for law in result["laws"]] == ["2", "1"]
+        assert result["laws"][0]["regulation_type"] == "UU"
+        assert result["laws"][1]["score"] == 0.4123
+        assert result["total"] == 5
+        assert result["total_is_exact"] is True
+        assert "disclaimer" in result
+
+    def test_filters_passed_to_rpc(self, reg_cache):
+        list_laws(regulation_type="pp", year=2021, status="dicabut", search="pajak", page=3, per_page=10)
+        assert server.sb.rpc.call_args[0][1] == {
+            "p_query": "pajak", "p_type_id": 2, "p_year": 2021,
+            "p_status": "dicabut", "p_limit": 10, "p_offset": 20,
+        }
+
+    def test_blank_search_lists_normally(self, reg_cache):
+        works_mock = _qm(data=[], count=0)
+        server.sb.table.side_effect = lambda n: works_mock if n == "works" else _qm()
+
+        list_laws(search="   ")
+        server.sb.rpc.assert_not_called()
+        works_mock.range.assert_called_once()
+
+    def test_rpc_failure_returns_error(self, reg_cache):
+        server.sb.rpc.return_value.execute.side_effect = Exception("boom")
+        assert "error" in list_laws(search="pajak")
+
+
 # ===================================================================
 # _get_reg_types caching
 # ===================================================================
@@ -363,8 +692,8 @@ class TestGetRegTypesCaching:
             reg_mock if n == "regulation_types" else _qm()
         )
 
-        server._get_reg_types()
-        server._get_reg_types()
+        _sync(server._get_reg_types)()
+        _sync(server._get_reg_types)()
 
         # table() called only once — second call hits the cache
         assert server.sb.table.call_count == 1
@@ -391,10 +720,6 @@ class TestDisclaimer:
 
     def test_search_laws_no_results_has_disclaimer(self, reg_cache):
         server.sb.rpc.return_value.execute.return_value = MagicMock(data=[])
-        # _get_law_count needs works table
-        count_mock = _qm(data=[], count=19)
-        server.sb.table.side_effect = lambda n: count_mock
-
         result = search_laws("nonexistent query")
         assert len(result) == 1
         assert "disclaimer" in result[0]
@@ -406,12 +731,10 @@ class TestDisclaimer:
     def test_get_pasal_has_disclaimer(self, reg_cache):
         work = {"id": 1, "title_id": "T", "frbr_uri": "/a", "number": "1",
                 "year": 2020, "status": "berlaku", "regulation_type_id": 1, "source_url": ""}
-        node = {"id": 10, "content_text": "Text", "parent_id": None, "number": "1", "node_type": "pasal"}
-
-        node_calls = iter([_qm(data=[node]), _qm(data=[])])
-        server.sb.table.side_effect = lambda n: (
-            _qm(data=[work]) if n == "works" else next(node_calls)
-        )
+        node = {"id": 10, "content_text": "Text", "parent_id": None, "number": "1"}
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data={
+            "type_known": True, "work": work, "node": node, "ayat": [], "chapter": None,
+        })
 
         result = get_pasal("UU", "1", 2020, "1")
         assert "disclaimer" in result
@@ -463,12 +786,10 @@ class TestGetPasalNoParent:
     def test_parent_id_none_returns_empty_chapter(self, reg_cache):
         work = {"id": 1, "title_id": "T", "frbr_uri": "/a", "number": "1",
                 "year": 2020, "status": "berlaku", "regulation_type_id": 1, "source_url": ""}
-        node = {"id": 10, "content_text": "Text", "parent_id": None, "number": "5", "node_type": "pasal"}
-
-        node_calls = iter([_qm(data=[node]), _qm(data=[])])
-        server.sb.table.side_effect = lambda n: (
-            _qm(data=[work]) if n == "works" else next(node_calls)
-        )
+        node = {"id": 10, "content_text": "Text", "parent_id": None, "number": "5"}
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data={
+            "type_known": True, "work": work, "node": node, "ayat": [], "chapter": None,
+        })
 
         result = get_pasal("UU", "1", 2020, "5")
         assert result["chapter"] == ""
@@ -509,14 +830,13 @@ class TestListLawsFilters:
         ], count=1)
         server.sb.table.side_effect = lambda n: works_mock if n == "works" else _qm()
 
-        result = list_laws(regulation_type="UU", year=2020, status="berlaku", search="test")
+        result = list_laws(regulation_type="UU", year=2020, status="berlaku", exact_total=True)
 
         assert result["total"] == 1
         assert len(result["laws"]) == 1
         works_mock.eq.assert_any_call("regulation_type_id", 1)
         works_mock.eq.assert_any_call("year", 2020)
         works_mock.eq.assert_any_call("status", "berlaku")
-        works_mock.ilike.assert_called_once_with("title_id", "%test%")
 
     def test_type_only_filter(self, reg_cache):
         works_mock = _qm(data=[], count=0)
@@ -542,12 +862,23 @@ class TestListLawsFilters:
 class TestNoResultsMessage:
 
     def test_includes_law_count(self, reg_cache):
-        count_mock = _qm(data=[], count=19)
-        server.sb.table.side_effect = lambda n: count_mock
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=[
+            {"total_works": 19, "pasal_count": 400, "min_year": 1945, "max_year": 2026},
+        ])
 
-        msg = server._no_results_message("'test'")
+        msg = _sync(server._no_results_message)("'test'")
         assert "19" in msg
         assert "does NOT mean" in msg.lower() or "does NOT" in msg
+        server.sb.rpc.assert_called_once_with("get_landing_stats")
+        server.sb.table.assert_not_called()
+
+    def test_works_index_count_needs_no_db(self, reg_cache):
+        server._works_index.add(_work(1))
+        server._works_index.loaded = True
+
+        msg = _sync(server._no_results_message)("'test'")
+        assert "database of 1 laws" in msg
+        server.sb.rpc.assert_not_called()
 
 
 # ===================================================================
@@ -576,9 +907,967 @@ class TestTTLCache:
         cache = server.TTLCache(ttl_seconds=60)
         cache.set("k1", "v1")
         cache.set("k2", "v2")
+        cache.get("k1")
         cache.clear()
+        assert cache.stats()["hits"] == 1  # exported as a Prometheus total, so never reset
         assert cache.get("k1") is None
         assert cache.get("k2") is None
+        cache.reset_stats()
+        assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = server.TTLCache(ttl_seconds=60, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")          # "b" is now least recently used
+        cache.set("c", 3)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_hit_miss_counters(self):
+        cache = server.TTLCache(ttl_seconds=60)
+        cache.set("k", "v")
+        cache.get("k")
+        cache.get("k")
+        cache.get("missing")
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == round(2 / 3, 4)
+
+    def test_byte_budget_evicts(self):
+        cache = server.TTLCache(ttl_seconds=60, maxsize=100, max_bytes=10, sizeof=len)
+        cache.set("a", "xxxx")
+        cache.set("b", "xxxx")
+        cache.set("c", "xxxx")  # 12 bytes > 10 → evict "a"
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] == 8
+        assert len(cache) == 2
+
+    def test_oversized_entry_not_cached(self):
+        cache = server.TTLCache(ttl_seconds=60, max_bytes=5, sizeof=len)
+        cache.set("big", "x" * 10)
+        assert cache.get("big") is None
+        assert cache.stats()["bytes"] == 0
+
+    def test_overwrite_updates_byte_count(self):
+        cache = server.TTLCache(ttl_seconds=60, max_bytes=100, sizeof=len)
+        cache.set("k", "xxxx")
+        cache.set("k", "xx")
+        assert cache.stats()["bytes"] == 2
+        assert cache.get("k") == "xx"
+
+
+# ===================================================================
+# Persistent disk cache tier
+# ===================================================================
+
+class TestDiskCache:
+
+    def test_survives_restart(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        disk = server.DiskCache(path)
+        disk.set_version("v1")
+        cache = server.TTLCache(ttl_seconds=60)
+        cache.attach(disk, "pasal")
+        cache.set("UU:13:2003:81", {"content_id": "Text"})
+        disk.close()
+
+        # Fresh process: empty memory tier, same file and version
+        disk2 = server.DiskCache(path)
+        disk2.set_version("v1")
+        cache2 = server.TTLCache(ttl_seconds=60)
+        cache2.attach(disk2, "pasal")
+        assert len(cache2) == 0  # nothing bulk-loaded
+        assert cache2.get("UU:13:2003:81") == {"content_id": "Text"}
+        assert cache2.stats()["disk_hits"] == 1
+        assert len(cache2) == 1
+
+    def test_version_change_invalidates(self, tmp_path):
+        disk = server.DiskCache(str(tmp_path / "cache.sqlite"))
+        disk.set_version("v1")
+        disk.set("pasal", "k", {"a": 1}, ttl=60)
+        assert disk.set_version("v2") == 1
+        assert disk.get("pasal", "k") is None
+
+    def test_expired_entry_not_returned(self, tmp_path):
+        disk = server.DiskCache(str(tmp_path / "cache.sqlite"))
+        disk.set_version("v1")
+        disk.set("status", "k", {"a": 1}, ttl=-1)
+        assert disk.get("status", "k") is None
+
+    def test_namespaces_are_isolated(self, tmp_path):
+        disk = server.DiskCache(str(tmp_path / "cache.sqlite"))
+        disk.set_version("v1")
+        disk.set("pasal", "k", 1, ttl=60)
+        disk.set("status", "k", 2, ttl=60)
+        disk.clear("pasal")
+        assert disk.get("pasal", "k") is None
+        assert disk.get("status", "k") == (2, pytest.approx(60, abs=1))
+
+    def test_open_disk_cache_stamps_version(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("MCP_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+        monkeypatch.setattr(server, "_disk_cache", None)
+        for cache in (server._pasal_cache, server._status_cache, server._search_cache):
+            monkeypatch.setattr(cache, "_backing", None)
+        jobs = _qm(data=[{"extraction_version": 6}])
+        server.sb.table.side_effect = lambda n: jobs
+
+        _sync(server._open_disk_cache)()
+        assert server._disk_cache is not None
+        assert server._disk_cache.version == f"{server._CACHE_FORMAT_VERSION}:x6"
+        jobs.order.assert_called_once_with("extraction_version", desc=True)
+        server._disk_cache.close()
+
+    def test_feeds_resume_from_disk_watermark(self, tmp_path, monkeypatch, reg_cache):
+        disk = server.DiskCache(str(tmp_path / "cache.sqlite"))
+        monkeypatch.setattr(server, "_disk_cache", disk)
+        revisions = _qm(data=[{"id": 7}])
+        server.sb.table.side_effect = lambda n: revisions
+        _sync(server._poll_revisions)()
+        assert disk.get_meta("revision_watermark") == 7
+
+        # A restarted server picks up from the stored watermark instead of skipping ahead
+        server._revision_watermark = None
+        revisions.execute = AsyncMock(return_value=MagicMock(data=[]))
+        _sync(server._poll_revisions)()
+        revisions.gt.assert_called_once_with("id", 7)
+        disk.close()
+
+
+# ===================================================================
+# In-memory works index
+# ===================================================================
+
+def _work(work_id, number="13", year=2003, type_id=1, updated_at="2026-01-01T00:00:00+00:00"):
+    return {"id": work_id, "frbr_uri": f"/akn/id/act/uu/{year}/{number}", "title_id": f"UU {number}/{year}",
+            "number": number, "year": year, "status": "berlaku", "regulation_type_id": type_id,
+            "source_url": "", "date_enacted": None, "updated_at": updated_at}
+
+
+class TestWorksIndex:
+
+    def test_lookups_by_key_id_and_uri(self):
+        index = server.WorksIndex()
+        index.add(_work(1))
+        assert index.find(1, "13", 2003)["id"] == 1
+        assert index.get(1)["number"] == "13"
+        assert index.by_uri("/akn/id/act/uu/2003/13")["id"] == 1
+        assert index.find(2, "13", 2003) is None
+
+    def test_update_replaces_stale_aliases(self):
+        index = server.WorksIndex()
+        index.add(_work(1))
+        index.add({**_work(1, number="14"), "frbr_uri": "/akn/id/act/uu/2003/14"})
+        assert index.find(1, "13", 2003) is None
+        assert index.by_uri("/akn/id/act/uu/2003/13") is None
+        assert index.find(1, "14", 2003)["id"] == 1
+        assert len(index) == 1
+
+    def test_title_keys_updated_in_place(self, monkeypatch):
+        index = server.WorksIndex()
+        index.add({**_work(1), "tentang": "Ketenagakerjaan"})
+        index.add({**_work(2, number="2"), "tentang": "Perkawinan"})
+        index.build_titles()
+        monkeypatch.setattr(index, "build_titles", MagicMock(side_effect=AssertionError))
+
+        index.add({**_work(2, number="2"), "tentang": "Cipta Kerja"})
+        index.add({**_work(3, number="3"), "tentang": "Kesehatan"})
+        assert index.match_title("perkawinan") == []
+        assert [w["id"] for w in index.match_title("cipta")] == [2]
+        assert [w["id"] for w in index.match_title("ke")] == [3, 1]
+        assert index._titles == sorted(index._titles)
+
+    def test_refresh_pages_then_resumes_from_cursor(self, monkeypatch):
+        monkeypatch.setattr(server, "_WORKS_PAGE_SIZE", 2)
+        works = _qm()
+        works.execute = AsyncMock(side_effect=[
+            MagicMock(data=[_work(1), _work(2, number="2")]),
+            MagicMock(data=[_work(3, number="3")]),
+        ])
+        server.sb.table.return_value = works
+
+        assert _sync(server._refresh_works_index)() == 3
+        assert server._works_index.loaded
+        assert server._works_index.cursor == ("2026-01-01T00:00:00+00:00", 3)
+        assert works.or_.call_count == 1  # second page continues after work 2
+
+        works.execute = AsyncMock(return_value=MagicMock(data=[]))
+        works.or_.reset_mock()
+        assert _sync(server._refresh_works_index)() == 0
+        works.or_.assert_called_once_with(
+            'updated_at.gt."2026-01-01T00:00:00+00:00",'
+            'and(updated_at.eq."2026-01-01T00:00:00+00:00",id.gt.3)'
+        )
+
+    def test_refresh_evicts_reloaded_work(self, reg_cache):
+        server._works_index.add(_work(1))
+        server._works_index.add(_work(2, number="2"))
+        server._works_index.loaded = True
+        server._pasal_cache.set("UU:13:2003:81", {"content_id": "old"})
+        server._status_cache.set("UU:13:2003", {"status": "berlaku"})
+        server._pasal_cache.set("UU:2:2003:1", {"content_id": "untouched"})
+        works = _qm(data=[_work(1, updated_at="2026-02-01T00:00:00+00:00")])
+        server.sb.table.return_value = works
+
+        assert _sync(server._refresh_works_index)() == 1
+        assert server._pasal_cache.get("UU:13:2003:81") is None
+        assert server._status_cache.get("UU:13:2003") is None
+        assert server._pasal_cache.get("UU:2:2003:1") == {"content_id": "untouched"}
+
+    def test_refresh_evicts_from_disk_tier(self, reg_cache, tmp_path):
+        disk = server.DiskCache(str(tmp_path / "cache.db"))
+        server._pasal_cache.attach(disk, "pasal")
+        try:
+            server._works_index.add(_work(1))
+            server._works_index.loaded = True
+            server._pasal_cache.set("UU:13:2003:81", {"content_id": "old"})
+            server.sb.table.return_value = _qm(data=[_work(1, updated_at="2026-02-01T00:00:00+00:00")])
+
+            _sync(server._refresh_works_index)()
+            assert disk.get("pasal", "UU:13:2003:81") is None
+        finally:
+            server._pasal_cache._backing = None
+            disk.close()
+
+    def test_find_work_served_from_index(self, reg_cache):
+        server._works_index.add(_work(1))
+        server._works_index.loaded = True
+        work = _sync(server._find_work)("UU", "13", 2003)
+        assert work["id"] == 1
+        server.sb.table.assert_not_called()
+
+    def test_find_work_falls_back_on_index_miss(self, reg_cache):
+        server._works_index.loaded = True
+        server.sb.table.return_value = _qm(data=[_work(9, number="1", year=2024)])
+        assert _sync(server._find_work)("UU", "1", 2024)["id"] == 9
+        server.sb.table.assert_called_with("works")
+
+    def test_search_enrichment_skips_works_query(self, reg_cache):
+        server._works_index.add(_work(1))
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=[
+            {"id": 10, "work_id": 1, "content": "Isi", "score": 0.5, "metadata": {"pasal": "81"}},
+        ])
+        result = search_laws("upah")
+        assert result[0]["frbr_uri"] == "/akn/id/act/uu/2003/13"
+        server.sb.table.assert_not_called()
+
+
+# ===================================================================
+# Relationship graph and transitive amendment chains
+# ===================================================================
+
+_REL_TYPES = {
+    1: {"id": 1, "code": "mengubah", "name_id": "Mengubah", "name_en": "Amends"},
+    2: {"id": 2, "code": "diubah_oleh", "name_id": "Diubah oleh", "name_en": "Amended by"},
+    3: {"id": 3, "code": "mencabut", "name_id": "Mencabut", "name_en": "Revokes"},
+    4: {"id": 4, "code": "dicabut_oleh", "name_id": "Dicabut oleh", "name_en": "Revoked by"},
+}
+
+
+class TestLawResolution:
+
+    def _index(self, *works):
+        for w in works:
+            server._works_index.add(w)
+        server._works_index.loaded = True
+
+    def _titled(self, work_id, number, year, tentang, type_id=1, status="berlaku"):
+        return {**_work(work_id, number, year, type_id), "status": status, "tentang": tentang,
+                "title_id": f"Undang-Undang Nomor {number} Tahun {year} tentang {tentang}"}
+
+    def test_alias_resolves_without_db(self, reg_cache):
+        candidates = _sync(server._resolve_law)("UU ITE")
+        assert (candidates[0]["law_type"], candidates[0]["law_number"], candidates[0]["year"]) == ("UU", "11", 2008)
+        server.sb.table.assert_not_called()
+
+    def test_alias_without_type_prefix(self, reg_cache):
+        assert _sync(server._resolve_law)("pdp")[0]["law_number"] == "27"
+        assert _sync(server._resolve_law)("KUHP")[0]["year"] == 2023
+
+    def test_identifier_forms(self, reg_cache):
+        for text in ("UU 13/2003", "Undang-Undang Nomor 13 Tahun 2003", "uu no. 13 tahun 2003"):
+            top = _sync(server._resolve_law)(text)[0]
+            assert (top["law_type"], top["law_number"], top["year"]) == ("UU", "13", 2003)
+        assert _sync(server._resolve_law)("PP 35/2021")[0]["law_type"] == "PP"
+
+    def test_subject_prefix_ranking(self, reg_cache):
+        self._index(
+            self._titled(1, "13", 2003, "Ketenagakerjaan"),
+            self._titled(2, "14", 1969, "Ketenagakerjaan", status="dicabut"),
+            self._titled(3, "5", 2020, "Ketenagakerjaan Asing", type_id=2),
+        )
+        assert [c["law_number"] for c in _sync(server._resolve_law)("UU Ketenagakerjaan")] == ["13", "14"]
+        assert [c["law_number"] for c in _sync(server._resolve_law)("ketenaga")] == ["13", "5", "14"]
+        assert _sync(server._resolve_law)("ketenaga")[0]["title"].endswith("Ketenagakerjaan")
+
+    def test_title_used_when_tentang_missing(self, reg_cache):
+        self._index({**self._titled(1, "1", 1974, "Perkawinan"), "tentang": None})
+        assert _sync(server._resolve_law)("perkawinan")[0]["law_number"] == "1"
+
+    def test_index_rebuilds_after_update(self, reg_cache):
+        self._index(self._titled(1, "1", 1974, "Perkawinan"))
+        assert _sync(server._resolve_law)("perkawinan")
+        server._works_index.add(self._titled(1, "1", 1974, "Pernikahan"))
+        assert _sync(server._resolve_law)("perkawinan") == []
+        assert _sync(server._resolve_law)("pernikahan")[0]["law_number"] == "1"
+
+    def test_short_or_unknown_returns_empty(self, reg_cache):
+        self._index(self._titled(1, "1", 1974, "Perkawinan"))
+        assert _sync(server._resolve_law)("pe") == []
+        assert _sync(server._resolve_law)("FAKE perkawinan") == []
+
+    def test_get_pasal_accepts_law_name(self, reg_cache):
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data={
+            "type_known": True, "node": {"id": 10, "content_text": "Teks", "parent_id": None, "number": "27"},
+            "work": {"id": 1, "title_id": "UU ITE", "frbr_uri": "/a", "status": "diubah"},
+            "ayat": [], "chapter": None,
+        })
+
+        result = get_pasal(pasal_number="27", law="UU ITE")
+        assert result["content_id"] == "Teks"
+        server.sb.rpc.assert_called_once_with("get_pasal_bundle", {
+            "p_type_code": "UU", "p_number": "11", "p_year": 2008, "p_pasal": "27",
+        })
+
+    def test_unresolved_law_is_an_error(self, reg_cache):
+        assert "Could not identify" in get_pasal(pasal_number="1", law="zzz unknown")["error"]
+        assert "Could not identify" in get_law_status(law="zzz unknown")["error"]
+        server.sb.rpc.assert_not_called()
+
+    def test_missing_arguments(self, reg_cache):
+        assert "law_type" in get_law_status()["error"]
+        assert "pasal_number" in get_pasal("UU", "13", 2003)["error"]
+
+
+class TestRelationshipGraph:
+
+    def _load(self, works, edges):
+        """Index ``works`` and add ``(source, target, type_id)`` edges to the graph."""
+        for w in works:
+            server._works_index.add(w)
+        server._works_index.loaded = True
+        for i, (src, tgt, type_id) in enumerate(edges, start=1):
+            server._relationship_graph.add({
+                "id": i, "source_work_id": src, "target_work_id": tgt,
+                "relationship_type_id": type_id, "relationship_types": _REL_TYPES[type_id],
+            })
+        server._relationship_graph.loaded = True
+
+    def test_transitive_chain_without_db(self, reg_cache):
+        # UU 11/2008 <- amended by 19/2016 <- amended by 27/2024 (both directions stored)
+        self._load(
+            [_work(1, "11", 2008), _work(2, "19", 2016), _work(3, "27", 2024)],
+            [(2, 1, 1), (1, 2, 2), (3, 2, 1), (2, 3, 2)],
+        )
+        result = get_law_status("UU", "11", 2008)
+
+        server.sb.table.assert_not_called()
+        assert [(c["law"], c["of"]) for c in result["amendment_chain"]] == [
+            ("UU 19/2016", "UU 11/2008"), ("UU 27/2024", "UU 19/2016"),
+        ]
+        assert result["current_version"]["law"] == "UU 11/2008"
+        assert result["current_version"]["latest_amendment"] == "UU 27/2024"
+        # Direct neighbours are reported as before
+        assert {a["law"] for a in result["amendments"]} == {"UU 19/2016"}
+
+    def test_revocation_moves_current_version(self, reg_cache):
+        self._load(
+            [_work(1, "1", 1990), _work(2, "5", 2010), _work(3, "7", 2015)],
+            [(2, 1, 3), (3, 2, 1)],
+        )
+        result = get_law_status("UU", "1", 1990)
+        assert result["amendment_chain"][0]["relationship"] == "Revoked by"
+        assert result["current_version"]["law"] == "UU 5/2010"
+        assert result["current_version"]["latest_amendment"] == "UU 7/2015"
+
+    def test_cycle_terminates(self, reg_cache):
+        self._load([_work(1, "1", 2000), _work(2, "2", 2001)], [(1, 2, 1), (2, 1, 1)])
+        result = get_law_status("UU", "1", 2000)
+        assert len(result["amendment_chain"]) == 2
+
+    def test_no_relationships(self, reg_cache):
+        self._load([_work(1)], [])
+        result = get_law_status("UU", "13", 2003)
+        assert result["amendment_chain"] == []
+        assert result["current_version"] == {
+            "law": "UU 13/2003", "full_title": "UU 13/2003", "frbr_uri": "/akn/id/act/uu/2003/13",
+            "status": "berlaku", "latest_amendment": None,
+        }
+
+    def test_refresh_embeds_types_and_invalidates_status(self, reg_cache):
+        tables = {
+            "relationship_types": _qm(data=list(_REL_TYPES.values())),
+            "work_relationships": _qm(data=[
+                {"id": 5, "source_work_id": 2, "target_work_id": 1, "relationship_type_id": 1},
+            ]),
+        }
+        server.sb.table.side_effect = lambda n: tables[n]
+        server._relationship_types.clear()
+
+        assert _sync(server._refresh_relationship_graph)() == 1
+        assert server._relationship_graph.watermark == 5
+        assert server._relationship_graph.edges(1)[0]["relationship_types"]["code"] == "mengubah"
+        tables["work_relationships"].gt.assert_called_with("id", 0)
+
+        server._status_cache.set("UU:11:2008", {"status": "berlaku"})
+        tables["work_relationships"].execute.return_value = MagicMock(data=[
+            {"id": 6, "source_work_id": 3, "target_work_id": 2, "relationship_type_id": 1},
+        ])
+        _sync(server._refresh_relationship_graph)()
+        tables["work_relationships"].gt.assert_called_with("id", 5)
+        assert len(server._status_cache) == 0
+        assert len(server._relationship_graph) == 2
+
+
+# ===================================================================
+# Startup prewarm
+# ===================================================================
+
+class TestPrewarm:
+
+    _WORK = {"id": 1, "title_id": "UU 13/2003", "frbr_uri": "/akn/id/act/uu/2003/13",
+             "number": "13", "year": 2003, "status": "berlaku", "regulation_type_id": 1,
+             "source_url": "", "date_enacted": None, "updated_at": "2026-01-01T00:00:00+00:00"}
+    _NODES = [
+        {"id": 100, "node_type": "bab", "number": "X", "heading": "Hubungan Kerja",
+         "content_text": None, "parent_id": None, "sort_order": 1},
+        {"id": 101, "node_type": "pasal", "number": "81", "heading": None,
+         "content_text": "Isi pasal 81.", "parent_id": 100, "sort_order": 2},
+        {"id": 102, "node_type": "ayat", "number": "1", "heading": None,
+         "content_text": "Ayat satu.", "parent_id": 101, "sort_order": 3},
+        {"id": 103, "node_type": "pasal", "number": "82", "heading": None,
+         "content_text": "Isi pasal 82.", "parent_id": 100, "sort_order": 4},
+    ]
+
+    def _tables(self, nodes=None):
+        tables = {
+            "works": _qm(data=[self._WORK]),
+            "work_relationships": _qm(data=[]),
+            "document_nodes": _qm(data=self._NODES if nodes is None else nodes),
+        }
+        server.sb.table.side_effect = lambda n: tables.get(n, _qm())
+        return tables
+
+    def test_fills_status_and_pasal_caches(self, reg_cache, monkeypatch):
+        monkeypatch.setenv("MCP_PREWARM_URIS", "/akn/id/act/uu/2003/13")
+        self._tables()
+        _sync(server._prewarm)()
+
+        assert server._works_index.by_uri("/akn/id/act/uu/2003/13") == self._WORK
+        assert server._status_cache.get("UU:13:2003")["status"] == "berlaku"
+        assert len(server._pasal_cache) == 2
+
+        # Warmed entries are served without touching the DB
+        server.sb.reset_mock()
+        result = get_pasal("UU", "13", 2003, "81")
+        server.sb.rpc.assert_not_called()
+        assert result["chapter"] == "BAB X - Hubungan Kerja"
+        assert result["ayat"] == [{"number": "1", "text": "Ayat satu."}]
+
+    def test_matches_bundle_response(self, reg_cache, monkeypatch):
+        monkeypatch.setenv("MCP_PREWARM_URIS", "/akn/id/act/uu/2003/13")
+        self._tables()
+        _sync(server._prewarm)()
+        warmed = server._pasal_cache.get("UU:13:2003:81")
+
+        server._pasal_cache.clear()
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data={
+            "type_known": True, "work": self._WORK, "node": self._NODES[1],
+            "ayat": [{"number": "1", "content_text": "Ayat satu."}],
+            "chapter": {"node_type": "bab", "number": "X", "heading": "Hubungan Kerja"},
+        })
+        assert get_pasal("UU", "13", 2003, "81") == warmed
+
+    def test_pages_through_large_works(self, reg_cache, monkeypatch):
+        monkeypatch.setenv("MCP_PREWARM_URIS", "/akn/id/act/uu/2003/13")
+        monkeypatch.setattr(server, "_PREWARM_PAGE_SIZE", 3)
+        tables = self._tables()
+        nodes = tables["document_nodes"]
+        pages = [self._NODES[:3], self._NODES[3:]]
+        nodes.execute = AsyncMock(side_effect=[MagicMock(data=p) for p in pages])
+
+        _sync(server._prewarm)()
+        assert nodes.range.call_args_list[0].args == (0, 2)
+        assert nodes.range.call_args_list[1].args == (3, 5)
+        assert server._pasal_cache.get("UU:13:2003:82") is not None
+
+    def test_empty_uri_list_disables(self, reg_cache, monkeypatch):
+        monkeypatch.setenv("MCP_PREWARM_URIS", "")
+        self._tables()
+        _sync(server._prewarm)()
+        assert server._works_index.loaded
+        assert len(server._pasal_cache) == 0
+        assert len(server._status_cache) == 0
+
+    def test_startup_bounded_by_budget(self, monkeypatch):
+        monkeypatch.delenv("MCP_CACHE_PATH", raising=False)
+        monkeypatch.setenv("MCP_PREWARM_BUDGET_SECONDS", "0.05")
+        monkeypatch.setenv("MCP_INVALIDATION_POLL_SECONDS", "0")
+
+        async def slow_prewarm():
+            await asyncio.sleep(5)
+
+        monkeypatch.setattr(server, "_prewarm", slow_prewarm)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            t0 = loop.time()
+            await server._startup()
+            return loop.time() - t0
+
+        assert asyncio.run(run()) < 1
+
+
+# ===================================================================
+# Revision-driven cache invalidation
+# ===================================================================
+
+class TestRevisionInvalidation:
+
+    def _feed(self, revs):
+        tables = {
+            "revisions": _qm(data=revs),
+            "works": _qm(data=[{"id": 1, "number": "13", "year": 2003, "regulation_type_id": 1}]),
+        }
+        server.sb.table.side_effect = lambda n: tables.get(n, _qm())
+        return tables
+
+    def _fill(self):
+        for key in ("UU:13:2003:81", "UU:13:2003:82", "UU:1:1974:2"):
+            server._pasal_cache.set(key, {"content_id": key})
+        server._status_cache.set("UU:13:2003", {"status": "berlaku"})
+        server._status_cache.set("UU:1:1974", {"status": "berlaku"})
+
+    def test_first_poll_only_sets_watermark(self, reg_cache):
+        self._fill()
+        self._feed([{"id": 7}])
+        assert _sync(server._poll_revisions)() == 0
+        assert server._revision_watermark == 7
+        assert len(server._pasal_cache) == 3
+
+    def test_pasal_revision_evicts_exact_key(self, reg_cache):
+        self._fill()
+        server._revision_watermark = 7
+        tables = self._feed([{"id": 8, "work_id": 1, "node_type": "pasal", "node_number": "81"}])
+
+        assert _sync(server._poll_revisions)() == 2
+        tables["revisions"].gt.assert_called_with("id", 7)
+        assert server._revision_watermark == 8
+        assert server._pasal_cache.get("UU:13:2003:81") is None
+        assert server._pasal_cache.get("UU:13:2003:82") is not None
+        assert server._status_cache.get("UU:13:2003") is None
+        assert server._status_cache.get("UU:1:1974") is not None
+
+    def test_ayat_revision_evicts_whole_work(self, reg_cache):
+        self._fill()
+        server._revision_watermark = 7
+        self._feed([{"id": 9, "work_id": 1, "node_type": "ayat", "node_number": "2"}])
+
+        _sync(server._poll_revisions)()
+        assert server._pasal_cache.get("UU:13:2003:81") is None
+        assert server._pasal_cache.get("UU:13:2003:82") is None
+        assert server._pasal_cache.get("UU:1:1974:2") is not None
+
+    def test_no_new_revisions_keeps_cache(self, reg_cache):
+        self._fill()
+        server._revision_watermark = 7
+        self._feed([])
+        assert _sync(server._poll_revisions)() == 0
+        assert server._revision_watermark == 7
+        assert len(server._pasal_cache) == 3
+
+    def test_first_jobs_poll_only_sets_cursor(self, reg_cache):
+        self._fill()
+        server.sb.table.side_effect = lambda n: _qm(data=[{"id": 5, "updated_at": "2026-03-01T00:00:00+00:00"}])
+        assert _sync(server._poll_loaded_jobs)() == 0
+        assert server._loaded_jobs_cursor == ("2026-03-01T00:00:00+00:00", 5)
+        assert len(server._pasal_cache) == 3
+
+    def test_loaded_job_evicts_its_work(self, reg_cache):
+        self._fill()
+        server._loaded_jobs_cursor = ("2026-03-01T00:00:00+00:00", 5)
+        tables = self._feed([])
+        tables["crawl_jobs"] = _qm(data=[{"id": 6, "work_id": 1, "updated_at": "2026-03-02T00:00:00+00:00"}])
+
+        assert _sync(server._poll_loaded_jobs)() == 3
+        tables["crawl_jobs"].or_.assert_called_once_with(
+            'updated_at.gt."2026-03-01T00:00:00+00:00",'
+            'and(updated_at.eq."2026-03-01T00:00:00+00:00",id.gt.5)'
+        )
+        assert server._loaded_jobs_cursor == ("2026-03-02T00:00:00+00:00", 6)
+        assert server._pasal_cache.get("UU:13:2003:81") is None
+        assert server._status_cache.get("UU:13:2003") is None
+        assert server._pasal_cache.get("UU:1:1974:2") is not None
+
+    def test_prefix_delete_reaches_disk_tier(self, tmp_path):
+        disk = server.DiskCache(str(tmp_path / "cache.sqlite"))
+        disk.set_version("v1")
+        cache = server.TTLCache(ttl_seconds=60)
+        cache.attach(disk, "pasal")
+        cache.set("UU:13:2003:81", 1)
+        cache.set("UU:13:2003:82", 2)
+        cache.set("UU:13:20031:1", 3)
+
+        assert cache.delete_prefix("UU:13:2003:") == 2
+        assert disk.get("pasal", "UU:13:2003:81") is None
+        assert disk.get("pasal", "UU:13:20031:1") is not None
+        disk.close()
+
+
+# ===================================================================
+# Cross-references resolved at load time
+# ===================================================================
+
+class TestStoredCrossReferences:
+
+    _WORK = {"id": 1, "title_id": "T", "frbr_uri": "/akn/id/act/uu/2003/13", "number": "13",
+             "year": 2003, "status": "berlaku", "regulation_type_id": 1, "source_url": ""}
+    _NODE = {"id": 10, "number": "5", "content_text": "Lihat Pasal 3.", "parent_id": None}
+
+    def _bundle(self, refs):
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data={
+            "type_known": True, "work": self._WORK, "node": self._NODE, "ayat": [],
+            "chapter": None, "cross_references": refs,
+        })
+
+    def test_stored_references_returned(self, reg_cache):
+        stored = [{"pasal": "3", "frbr_uri": "/akn/id/act/uu/2003/13", "node_id": 8}]
+        self._bundle(stored)
+        assert get_pasal("UU", "13", 2003, "5")["cross_references"] == stored
+
+    def test_regex_fallback_when_none_stored(self, reg_cache):
+        self._bundle(None)
+        assert get_pasal("UU", "13", 2003, "5")["cross_references"] == [{"pasal": "3"}]
+
+    def test_prewarm_uses_stored_references(self, reg_cache, monkeypatch):
+        monkeypatch.setenv("MCP_PREWARM_URIS", "/akn/id/act/uu/2003/13")
+        work = {**self._WORK, "date_enacted": None, "updated_at": "2026-01-01T00:00:00+00:00"}
+        tables = {
+            "works": _qm(data=[work]),
+            "document_nodes": _qm(data=[{**self._NODE, "node_type": "pasal", "heading": None,
+                                         "sort_order": 1}]),
+            "cross_references": _qm(data=[{
+                "id": 1, "source_node_id": 10, "target_pasal": "3", "target_ayat": None,
+                "target_huruf": None, "target_law_number": None, "target_law_year": None,
+                "target_work_id": 1, "target_node_id": 8, "target_ayat_node_id": None,
+            }]),
+        }
+        server.sb.table.side_effect = lambda n: tables.get(n, _qm())
+        _sync(server._prewarm)()
+        assert server._pasal_cache.get("UU:13:2003:5")["cross_references"] == [
+            {"pasal": "3", "frbr_uri": "/akn/id/act/uu/2003/13", "node_id": 8},
+        ]
+
+
+# ===================================================================
+# get_citing_pasals (reverse citation index)
+# ===================================================================
+
+class TestGetCitingPasals:
+
+    def _setup(self, rows):
+        server._works_index.add(_work(1))
+        server._works_index.add(_work(2, "6", 2023))
+        server._works_index.loaded = True
+        xref = _qm(data=rows)
+        server.sb.table.side_effect = lambda n: xref if n == "cross_references" else _qm()
+        return xref
+
+    def _row(self, row_id, work_id=2, pasal="12", **extra):
+        return {"id": row_id, "work_id": work_id, "source_ayat": None, "target_ayat": None,
+                "target_huruf": None, "source": {"number": pasal}, **extra}
+
+    def test_lists_citing_articles(self, reg_cache):
+        xref = self._setup([
+            self._row(5, source_ayat="1", target_ayat="2"),
+            self._row(9, work_id=1, pasal="90"),
+        ])
+        result = get_citing_pasals("UU", "13", 2003, "81")
+
+        xref.eq.assert_any_call("target_work_id", 1)
+        xref.eq.assert_any_call("target_pasal", "81")
+        assert result["citing_pasals"][0] == {
+            "law": "UU 6/2023", "law_title": "UU 6/2023", "frbr_uri": "/akn/id/act/uu/2023/6",
+            "pasal": "12", "ayat": "1", "cites": "Pasal 81 ayat (2)",
+        }
+        assert result["citing_pasals"][1]["law"] == "UU 13/2003"
+        assert result["next_cursor"] is None
+
+    def test_keyset_pagination(self, reg_cache):
+        xref = self._setup([self._row(5), self._row(7), self._row(8)])
+        result = get_citing_pasals("UU", "13", 2003, "81", limit=2, cursor=3)
+
+        xref.gt.assert_called_with("id", 3)
+        xref.limit.assert_called_with(3)
+        assert len(result["citing_pasals"]) == 2
+        assert result["next_cursor"] == 7
+
+    def test_ayat_filter(self, reg_cache):
+        xref = self._setup([])
+        result = get_citing_pasals("UU", "13", 2003, "81", ayat="2")
+        xref.eq.assert_any_call("target_ayat", "2")
+        assert result["citing_pasals"] == []
+
+    def test_unknown_law(self, reg_cache):
+        self._setup([])
+        result = get_citing_pasals("XYZ", "1", 2000, "1")
+        assert "Unknown regulation type" in result["error"]
+
+
+# ===================================================================
+# get_law_text (paged full-law reading)
+# ===================================================================
+
+class TestGetLawText:
+
+    _NODES = [
+        {"node_type": "bab", "number": "I", "heading": "Ketentuan Umum", "content_text": "",
+         "depth": 0, "sort_order": 1},
+        {"node_type": "pasal", "number": "1", "heading": None, "content_text": "(1) Satu.\n(2) Dua.",
+         "depth": 1, "sort_order": 2},
+        {"node_type": "ayat", "number": "1", "heading": None, "content_text": "Satu.",
+         "depth": 2, "sort_order": 3},
+        {"node_type": "pasal", "number": "2", "heading": None, "content_text": "x" * 600,
+         "depth": 1, "sort_order": 4},
+        {"node_type": "pasal", "number": "3", "heading": None, "content_text": "y" * 600,
+         "depth": 1, "sort_order": 5},
+    ]
+
+    def _setup(self, pages):
+        server._works_index.add(_work(1))
+        server._works_index.loaded = True
+        nodes = _qm()
+        nodes.execute = AsyncMock(side_effect=[MagicMock(data=p) for p in pages])
+        server.sb.table.return_value = nodes
+        return nodes
+
+    def test_whole_small_law_in_one_page(self, reg_cache):
+        nodes = self._setup([self._NODES])
+        result = get_law_text("UU", "13", 2003)
+
+        nodes.gt.assert_called_once_with("sort_order", 0)
+        assert result["toc"] == ["BAB I - Ketentuan Umum", "  Pasal 1", "  Pasal 2", "  Pasal 3"]
+        assert result["nodes"][0] == {"node": "Pasal 1", "text": "(1) Satu.\n(2) Dua."}
+        assert result["next_cursor"] is None
+
+    def test_budget_sets_cursor_and_resumes(self, reg_cache, monkeypatch):
+        nodes = self._setup([self._NODES, self._NODES[4:]])
+        first = get_law_text("UU", "13", 2003, max_bytes=1000)
+        assert [n["node"] for n in first["nodes"]] == ["Pasal 1", "Pasal 2"]
+        assert first["next_cursor"] == 4
+
+        second = get_law_text("UU", "13", 2003, cursor=first["next_cursor"])
+        nodes.gt.assert_called_with("sort_order", 4)
+        assert [n["node"] for n in second["nodes"]] == ["Pasal 3"]
+        assert second["next_cursor"] is None
+
+    def test_keeps_fetching_until_budget(self, reg_cache, monkeypatch):
+        monkeypatch.setattr(server, "_LAW_TEXT_FETCH", 2)
+        nodes = self._setup([self._NODES[:2], self._NODES[2:4], self._NODES[4:]])
+        result = get_law_text("UU", "13", 2003)
+        assert nodes.execute.await_count == 3
+        assert len(result["toc"]) == 4
+
+    def test_oversized_node_is_truncated(self, reg_cache):
+        big = [{**self._NODES[3], "content_text": "z" * 5000}, self._NODES[4]]
+        self._setup([big])
+        result = get_law_text("UU", "13", 2003, max_bytes=1000)
+        assert result["nodes"][0]["text"].endswith("[...truncated]")
+        assert result["next_cursor"] == 4
+
+    def test_node_after_headings_moves_to_next_page_whole(self, reg_cache):
+        nodes = [self._NODES[0], {**self._NODES[3], "content_text": "z" * 1990}]
+        self._setup([nodes, nodes[1:]])
+        first = get_law_text("UU", "13", 2003, max_bytes=2000)
+        assert first["toc"] == ["BAB I - Ketentuan Umum"]
+        assert first["nodes"] == []
+        assert first["next_cursor"] == 1
+
+        second = get_law_text("UU", "13", 2003, cursor=1, max_bytes=2000)
+        assert second["nodes"][0]["text"] == "z" * 1990
+
+    def test_oversized_node_after_headings_cut_to_room_left(self, reg_cache):
+        nodes = [self._NODES[0], {**self._NODES[3], "content_text": "z" * 5000}]
+        self._setup([nodes])
+        result = get_law_text("UU", "13", 2003, max_bytes=1000)
+        text = result["nodes"][0]["text"]
+        assert text.endswith("[...truncated]")
+        assert len(text.removesuffix("\n\n[...truncated]")) == 1000 - len("BAB I - Ketentuan Umum") - len("Pasal 2")
+
+
+# ===================================================================
+# get_pasals batch tool
+# ===================================================================
+
+def _bundle_item(number, text=None, parent=None):
+    return {
+        "node": {"id": int("".join(c for c in number if c.isdigit()) or 0), "number": number,
+                 "content_text": text or f"Isi pasal {number}.", "parent_id": None},
+        "ayat": [],
+        "chapter": parent,
+    }
+
+
+class TestGetPasals:
+
+    def _setup(self, items):
+        server._works_index.add(_work(1))
+        server._works_index.loaded = True
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=items)
+
+    def test_expand_range(self):
+        assert server._expand_pasal_range("81-84") == ["81", "82", "83", "84"]
+        assert server._expand_pasal_range("84 – 82") == ["82", "83", "84"]
+        assert server._expand_pasal_range("81A") == ["81A"]
+
+    def test_range_resolved_with_one_rpc_in_order(self, reg_cache):
+        self._setup([_bundle_item("81"), _bundle_item("82"), _bundle_item("83")])
+        result = get_pasals([{"law_type": "uu", "law_number": "13", "year": 2003, "pasal": "81-83"}])
+
+        assert [r["pasal_number"] for r in result] == ["81", "82", "83"]
+        server.sb.rpc.assert_called_once_with(
+            "get_pasals_bundle", {"p_work_id": 1, "p_pasals": ["81", "82", "83"]},
+        )
+        assert server._pasal_cache.get("UU:13:2003:82")["content_id"] == "Isi pasal 82."
+
+    def test_cached_entries_skip_rpc(self, reg_cache):
+        server._pasal_cache.set("UU:13:2003:81", {"pasal_number": "81", "content_id": "cached"})
+        self._setup([_bundle_item("82")])
+        result = get_pasals([
+            {"law_type": "UU", "law_number": "13", "year": 2003, "pasal": "82"},
+            {"law_type": "UU", "law_number": "13", "year": 2003, "pasal": "81"},
+        ])
+        assert [r["pasal_number"] for r in result] == ["82", "81"]
+        assert result[1]["content_id"] == "cached"
+        server.sb.rpc.assert_called_once_with(
+            "get_pasals_bundle", {"p_work_id": 1, "p_pasals": ["82"]},
+        )
+
+    def test_one_rpc_per_work(self, reg_cache):
+        server._works_index.add(_work(2, "1", 1974))
+        self._setup([])
+        get_pasals([
+            {"law_type": "UU", "law_number": "13", "year": 2003, "pasal": "1"},
+            {"law_type": "UU", "law_number": "1", "year": 1974, "pasal": "2"},
+            {"law_type": "UU", "law_number": "13", "year": 2003, "pasal": "5"},
+        ])
+        calls = sorted(c.args[1]["p_work_id"] for c in server.sb.rpc.call_args_list)
+        assert calls == [1, 2]
+
+    def test_missing_pasal_and_unknown_work(self, reg_cache):
+        self._setup([_bundle_item("81")])
+        server.sb.table.return_value = _qm(data=[])  # index miss falls back to an empty works query
+        server.sb.table.return_value.execute.return_value.count = 5
+        result = get_pasals([
+            {"law_type": "UU", "law_number": "13", "year": 2003, "pasal": "81"},
+            {"law_type": "UU", "law_number": "13", "year": 2003, "pasal": "999"},
+            {"law_type": "UU", "law_number": "99", "year": 1900, "pasal": "1"},
+            {"law_type": "XYZ", "law_number": "1", "year": 2000, "pasal": "1"},
+        ])
+        assert "error" not in result[0]
+        assert "Pasal 999 not found" in result[1]["error"]
+        assert "No results found" in result[2]["error"]
+        assert "Unknown regulation type" in result[3]["error"]
+        assert all("disclaimer" in r for r in result)
+
+    def test_too_many_articles(self, reg_cache):
+        result = get_pasals([{"law_type": "UU", "law_number": "13", "year": 2003, "pasal": "1-51"}])
+        assert "Too many articles" in result[0]["error"]
+        server.sb.rpc.assert_not_called()
+
+    def test_huge_range_rejected_without_expanding(self, reg_cache, monkeypatch):
+        monkeypatch.setattr(server, "_expand_pasal_range", MagicMock(side_effect=AssertionError))
+        result = get_pasals([
+            {"law_type": "UU", "law_number": "13", "year": 2003, "pasal": "1-30"},
+            {"law_type": "UU", "law_number": "13", "year": 2003, "pasal": "3000000-1"},
+        ])
+        assert "Too many articles requested (3000030)" in result[0]["error"]
+
+
+# ===================================================================
+# resolve_citations
+# ===================================================================
+
+class TestResolveCitations:
+
+    _TEXT = (
+        "Pesangon diatur dalam Pasal 156 ayat (2) UU Nomor 13 Tahun 2003, "
+        "lihat juga Pasal 156 ayat (2) UU Nomor 13 Tahun 2003 dan Pasal 7 UU Nomor 1 Tahun 1974. "
+        "Ketentuan Pasal 5 berlaku."
+    )
+
+    def _setup(self):
+        server._works_index.add(_work(1))
+        server._works_index.add(_work(2, "1", 1974))
+        server._works_index.loaded = True
+
+        def rpc(name, params):
+            item = _bundle_item("156") if params["p_work_id"] == 1 else _bundle_item("7")
+            if params["p_work_id"] == 1:
+                item["ayat"] = [{"number": "1", "content_text": "Satu."},
+                                {"number": "2", "content_text": "Dua."}]
+            m = MagicMock()
+            m.execute = AsyncMock(return_value=MagicMock(data=[item]))
+            return m
+
+        server.sb.rpc.side_effect = rpc
+
+    def test_extracts_dedupes_and_resolves(self, reg_cache):
+        self._setup()
+        result = resolve_citations(self._TEXT)
+
+        assert [r["citation"] for r in result] == [
+            "Pasal 156 ayat (2) UU 13/2003", "Pasal 7 UU 1/1974", "Pasal 5",
+        ]
+        assert result[0]["cited_ayat"] == {"number": "2", "text": "Dua."}
+        assert result[1]["content_id"] == "Isi pasal 7."
+        assert "names no law" in result[2]["error"]
+        assert server.sb.rpc.call_count == 2  # one per cited work
+
+    def test_bare_citations_use_default_law(self, reg_cache):
+        self._setup()
+        server.sb.rpc.side_effect = None
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=[_bundle_item("5")])
+        result = resolve_citations("Ketentuan Pasal 5 berlaku.", "UU", "13", 2003)
+        assert result[0]["law_title"] == "UU 13/2003"
+        assert result[0]["pasal_number"] == "5"
+
+    def test_no_and_nomor_forms_name_the_law(self, reg_cache):
+        self._setup()
+        for text in ("Lihat Pasal 7 UU No. 1 Tahun 1974.", "Lihat Pasal 7 UU Nomor 1 Tahun 1974."):
+            result = resolve_citations(text, "UU", "13", 2003)
+            assert result[0]["citation"] == "Pasal 7 UU 1/1974"
+            assert result[0]["content_id"] == "Isi pasal 7."
+
+    def test_named_laws_resolved_locally(self, reg_cache):
+        self._setup()
+        server._works_index.add(_work(3, "11", 2008))
+        server.sb.rpc.side_effect = None
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=[_bundle_item("27")])
+
+        result = resolve_citations("Pasal 27 UU ITE dan Pasal 27 UU No. 11 Tahun 2008.", "UU", "13", 2003)
+        assert [r["citation"] for r in result] == ["Pasal 27 UU ITE", "Pasal 27 UU 11/2008"]
+        assert result[0]["law_title"] == "UU 11/2008"
+        server.sb.rpc.assert_called_once_with("get_pasals_bundle", {"p_work_id": 3, "p_pasals": ["27"]})
+
+    def test_unidentified_law_never_uses_default(self, reg_cache):
+        self._setup()
+        result = resolve_citations("Pasal 27 KUHPerdata dilanggar.", "UU", "13", 2003)
+        assert result[0]["citation"] == "Pasal 27 KUHPerdata"
+        assert "Could not identify the law 'KUHPerdata'" in result[0]["error"]
+        server.sb.rpc.assert_not_called()
+
+    def test_this_law_is_bare(self):
+        refs = server.extract_cross_references("Pasal 5 Undang-Undang ini dan Pasal 6 Peraturan Pemerintah ini")
+        assert refs == [{"pasal": "5"}, {"pasal": "6"}]
+
+    def test_no_citations(self):
+        result = resolve_citations("Tidak ada rujukan di sini.")
+        assert "No article citations" in result[0]["error"]
+        server.sb.rpc.assert_not_called()
 
 
 # ===================================================================
@@ -592,10 +1881,9 @@ class TestPasalCaching:
                 "year": 2020, "status": "berlaku", "regulation_type_id": 1, "source_url": ""}
         node = {"id": 10, "content_text": "Text", "parent_id": None, "number": "5", "node_type": "pasal"}
 
-        node_calls = iter([_qm(data=[node]), _qm(data=[])])
-        server.sb.table.side_effect = lambda n: (
-            _qm(data=[work]) if n == "works" else next(node_calls)
-        )
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data={
+            "type_known": True, "work": work, "node": node, "ayat": [], "chapter": None,
+        })
 
         result1 = get_pasal("UU", "1", 2020, "5")
         assert "error" not in result1
@@ -606,7 +1894,7 @@ class TestPasalCaching:
         result2 = get_pasal("UU", "1", 2020, "5")
         assert result2 == result1
         # DB should NOT have been called
-        server.sb.table.assert_not_called()
+        server.sb.rpc.assert_not_called()
 
 
 # ===================================================================
@@ -640,9 +1928,358 @@ class TestRateLimiter:
         # Fill up the limiter
         limiter = server._rate_limiters["search_laws"]
         for _ in range(30):
-            limiter.check()
+            limiter.check("local")
 
         server.sb.rpc.return_value.execute.return_value = MagicMock(data=[])
         result = search_laws("test")
         assert isinstance(result, list)
         assert result[0].get("error") == "Rate limit exceeded"
+
+    def test_buckets_are_per_client(self):
+        rl = server.RateLimiter(1, window_seconds=60)
+        assert rl.check("a") is None
+        assert rl.check("a") is not None
+        assert rl.check("b") is None
+
+    def test_tokens_refill_on_monotonic_clock(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+        rl = server.RateLimiter(2, window_seconds=60)
+        rl.check("a")
+        rl.check("a")
+        assert rl.check("a") == 30
+        now[0] += 30
+        assert rl.remaining("a") == 1
+        assert rl.check("a") is None
+        now[0] += 600
+        assert rl.remaining("a") == 2  # capped at the burst size
+
+    def test_idle_clients_are_bounded(self):
+        rl = server.RateLimiter(1, window_seconds=60, max_clients=2)
+        for client in ("a", "b", "c"):
+            rl.check(client)
+        assert len(rl._buckets) == 2
+        assert rl.check("a") is None  # evicted, so it starts with a full bucket again
+        assert rl.check("c") is not None
+
+    def test_request_client_identity(self):
+        assert server._request_client({"mcp-session-id": "s1", "x-forwarded-for": "1.2.3.4"}, "10.0.0.1") == "session:s1"
+        assert server._request_client({"x-forwarded-for": "1.2.3.4"}, "10.0.0.1") == "ip:1.2.3.4"
+        assert server._request_client({}, "10.0.0.1") == "ip:10.0.0.1"
+        assert server._client_id() == "local"
+
+    def test_spoofed_forwarded_for_cannot_pick_a_bucket(self, monkeypatch):
+        # The client sends its own X-Forwarded-For; the trusted proxy appends the real address
+        for spoofed in ("1.1.1.1", "2.2.2.2"):
+            headers = {"x-forwarded-for": f"{spoofed}, 203.0.113.7"}
+            assert server._request_client(headers, "10.0.0.1") == "ip:203.0.113.7"
+
+        monkeypatch.setattr(server, "_TRUSTED_PROXY_HOPS", 2)
+        headers = {"x-forwarded-for": "1.1.1.1, 203.0.113.7, 10.0.0.2"}
+        assert server._request_client(headers, "10.0.0.1") == "ip:203.0.113.7"
+        assert server._request_client({"x-forwarded-for": "203.0.113.7"}, "10.0.0.1") == "ip:10.0.0.1"
+
+        monkeypatch.setattr(server, "_TRUSTED_PROXY_HOPS", 0)
+        assert server._request_client({"x-forwarded-for": "1.1.1.1"}, "10.0.0.1") == "ip:10.0.0.1"
+
+    def test_middleware_reports_remaining_budget(self):
+        server._rate_limiters["search_laws"].check("session:s1")
+        sent = []
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "headers": [(b"mcp-session-id", b"s1")], "client": ("10.0.0.1", 1234)}
+        asyncio.run(server.RateLimitHeaders(app)(scope, None, send))
+        budget = dict(sent[0]["headers"])[b"x-ratelimit-remaining"].decode()
+        assert "search_laws=29" in budget
+        assert "get_pasal=60" in budget
+
+
+# ===================================================================
+# Metrics
+# ===================================================================
+
+class TestMetrics:
+
+    def test_histogram_buckets_are_cumulative_and_inclusive(self):
+        h = server.Histogram("t_seconds", "Test.", "tool", (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            h.observe("x", value)
+        lines = h.render()
+        assert 't_seconds_bucket{tool="x",le="0.1"} 2' in lines
+        assert 't_seconds_bucket{tool="x",le="1.0"} 3' in lines
+        assert 't_seconds_bucket{tool="x",le="+Inf"} 4' in lines
+        assert 't_seconds_count{tool="x"} 4' in lines
+        assert h.count("x") == 4
+
+    def test_label_values_are_escaped(self):
+        c = server.Counter("t_total", "Test.", "kind")
+        c.inc('a"b\\c')
+        assert 't_total{kind="a\\"b\\\\c"} 1' in c.render()
+
+    def test_tools_record_latency_and_payload(self, reg_cache):
+        list_laws()
+        assert server._tool_latency.count("list_laws") == 1
+        assert server._tool_payload.count("list_laws") == 1
+
+    def test_rate_limit_rejections_counted(self, reg_cache):
+        limiter = server._rate_limiters["list_laws"]
+        for _ in range(30):
+            limiter.check("local")
+        list_laws()
+        assert server._rate_limited.get("list_laws") == 1
+
+    def test_transport_times_round_trips_by_kind(self):
+        import gzip
+        import httpx
+
+        body = b'[{"id": 1}]'
+
+        def handler(request):
+            return httpx.Response(200, content=gzip.compress(body), headers={"content-encoding": "gzip"})
+
+        async def run():
+            async with httpx.AsyncClient(transport=server.MeteredTransport(httpx.MockTransport(handler))) as client:
+                rpc = await client.post("http://db/rest/v1/rpc/search_works", json={})
+                table = await client.get("http://db/rest/v1/works?select=id")
+            return rpc, table
+
+        rpc, table = asyncio.run(run())
+        assert rpc.json() == [{"id": 1}]
+        assert table.content == body
+        assert server._db_latency.count("rpc:search_works") == 1
+        assert server._db_latency.count("table:works") == 1
+        assert server._db_payload.count("table:works") == 1
+
+    def test_metrics_route_exposes_caches(self, reg_cache):
+        server._pasal_cache.set("k", {"v": 1})
+        server._pasal_cache.get("k")
+        server._pasal_cache.get("missing")
+
+        response = asyncio.run(server.metrics(None))
+        text = response.body.decode()
+        assert response.media_type.startswith("text/plain")
+        assert 'mcp_cache_hits_total{cache="pasal"} 1' in text
+        assert 'mcp_cache_hit_ratio{cache="pasal"} 0.5' in text
+        assert "# TYPE mcp_tool_duration_seconds histogram" in text
+        assert 'mcp_singleflight_deduplicated_total{flight="search"} 0' in text
+
+
+# ===================================================================
+# Tracing
+# ===================================================================
+
+class TestTracing:
+
+    def test_spans_nest_under_current_span(self):
+        root = server.Span("tool")
+        token = server._current_span.set(root)
+        try:
+            with server._span("outer") as outer:
+                with server._span("inner") as inner:
+                    inner.rows = 3
+        finally:
+            server._current_span.reset(token)
+        tree = root.to_dict()
+        assert tree["spans"][0]["name"] == "outer"
+        assert (tree["spans"][0]["spans"][0]["name"], tree["spans"][0]["spans"][0]["rows"]) == ("inner", 3)
+        assert outer.end is not None
+
+    def test_span_is_noop_outside_tool_call(self):
+        with server._span("db") as span:
+            assert span is None
+
+    def test_content_range_rows(self):
+        assert server._content_range_rows("0-24/*") == 25
+        assert server._content_range_rows("*/0") == 0
+        assert server._content_range_rows("0-0/1200") == 1
+        assert server._content_range_rows(None) is None
+
+    def test_transport_records_db_span(self):
+        import httpx
+
+        def handler(request):
+            return httpx.Response(200, content=b'[{"id": 1}, {"id": 2}]', headers={"content-range": "0-1/*"})
+
+        @server._metered
+        async def probe():
+            async with httpx.AsyncClient(transport=server.MeteredTransport(httpx.MockTransport(handler))) as client:
+                await client.get("http://db/rest/v1/work_relationships?select=*")
+            return {"ok": True}
+
+        result = asyncio.run(probe(debug=True))
+        span = result["_trace"]["spans"][0]
+        assert result["_trace"]["name"] == "probe"
+        assert (span["name"], span["rows"], span["bytes"]) == ("table:work_relationships", 2, 22)
+
+    def test_debug_field_is_opt_in_and_leaves_cache_untouched(self, reg_cache):
+        work = {"id": 1, "title_id": "T", "frbr_uri": "/a", "number": "1", "year": 2020,
+                "status": "berlaku", "regulation_type_id": 1, "date_enacted": None}
+        server._works_index.add(work)
+        server._relationship_graph.loaded = True
+
+        plain = get_law_status("UU", "1", 2020)
+        traced = get_law_status("UU", "1", 2020, debug=True)
+        assert "_trace" not in plain
+        assert traced["_trace"]["name"] == "get_law_status"
+        assert "_trace" not in server._status_cache.get("UU:1:2020")
+
+    def test_list_responses_get_trailing_trace(self, reg_cache):
+        result = search_laws("upah", debug=True)
+        assert "_trace" in result[-1]
+
+    def test_slow_calls_are_logged(self, reg_cache, monkeypatch, caplog):
+        monkeypatch.setattr(server, "_TRACE_SLOW_MS", 0)
+        with caplog.at_level("INFO", logger="pasal.mcp.trace"):
+            list_laws()
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record["name"] == "list_laws"
+        assert "trace_id" in record
+
+    def test_debug_in_tool_schema(self):
+        assert "debug" in server.get_law_status.parameters["properties"]
+        assert "debug" not in server.get_law_status.parameters.get("required", [])
+
+
+# ===================================================================
+# Lazy startup
+# ===================================================================
+
+class TestLazyStartup:
+
+    def test_import_needs_no_env_and_skips_supabase(self):
+        import os
+        import subprocess
+        import sys
+
+        env = {k: v for k, v in os.environ.items() if not k.startswith("SUPABASE_")}
+        code = "import sys, server; assert 'supabase' not in sys.modules; print(type(server.sb).__name__)"
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(server.__file__)),
+            env=env, capture_output=True, text=True,
+        )
+        assert out.returncode == 0, out.stderr
+        assert out.stdout.strip() == "LazyClient"
+
+    def test_missing_key_raises_on_first_use(self, monkeypatch):
+        monkeypatch.delenv("SUPABASE_ANON_KEY", raising=False)
+        with pytest.raises(RuntimeError, match="SUPABASE_ANON_KEY"):
+            server.LazyClient().table("works")
+
+    def test_client_built_once_on_first_use(self, monkeypatch):
+        built = []
+        monkeypatch.setattr(server, "_create_client", lambda: built.append(1) or MagicMock())
+        client = server.LazyClient()
+        client.table("works")
+        client.rpc("get_pasal_bundle", {})
+        assert built == [1]
+
+
+# ===================================================================
+# Liveness / readiness
+# ===================================================================
+
+class TestHealth:
+
+    _STATS = {"total_works": 40000, "pasal_count": 900000, "min_year": 1945, "max_year": 2026}
+
+    def test_liveness_never_touches_db(self):
+        response = asyncio.run(server.healthz(None))
+        assert response.status_code == 200
+        server.sb.rpc.assert_not_called()
+        server.sb.table.assert_not_called()
+
+    def test_readiness_uses_cached_stats(self):
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=[self._STATS])
+
+        first = asyncio.run(server.readyz(None))
+        second = asyncio.run(server.readyz(None))
+        assert first.status_code == second.status_code == 200
+        body = json.loads(second.body)
+        assert (body["status"], body["laws"], body["pasals"]) == ("ready", 40000, 900000)
+        assert server.sb.rpc.call_count == 1
+        server.sb.table.assert_not_called()
+
+    def test_readiness_fails_when_db_unreachable(self):
+        server.sb.rpc.return_value.execute.side_effect = Exception("connection refused")
+
+        response = asyncio.run(server.readyz(None))
+        assert response.status_code == 503
+        assert json.loads(response.body)["status"] == "unavailable"
+
+    def test_ping_reports_count_without_exact_count(self):
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=[self._STATS])
+
+        assert "40000 laws" in asyncio.run(server.ping.fn())
+        server.sb.table.assert_not_called()
+
+    def test_ping_reports_db_failure(self):
+        server.sb.rpc.return_value.execute.side_effect = Exception("down")
+        assert "failed" in asyncio.run(server.ping.fn())
+
+
+
+# ===================================================================
+# Compact response mode
+# ===================================================================
+
+class TestCompactMode:
+
+    def _search_setup(self):
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=[
+            {"work_id": 1, "content": "a", "score": 0.9, "metadata": {"pasal": "1"}},
+            {"work_id": 2, "content": "b", "score": 0.8, "metadata": {"pasal": "7"}},
+            {"work_id": 1, "content": "c", "score": 0.7, "metadata": {"pasal": "2"}},
+        ])
+        works_mock = _qm(data=[
+            {"id": 1, "frbr_uri": "/a", "title_id": "A", "number": "1",
+             "year": 2020, "status": "berlaku", "regulation_type_id": 1},
+            {"id": 2, "frbr_uri": "/b", "title_id": "B", "number": "2",
+             "year": 2021, "status": "berlaku", "regulation_type_id": 1},
+        ])
+        server.sb.table.side_effect = lambda n: works_mock if n == "works" else _qm()
+
+    def test_search_groups_by_work_with_one_disclaimer(self, reg_cache):
+        self._search_setup()
+        result = search_laws("test", compact=True)
+
+        assert [law["frbr_uri"] for law in result["laws"]] == ["/a", "/b"]
+        first = result["laws"][0]
+        assert first["law_title"] == "A"
+        assert [r["pasal"] for r in first["results"]] == ["Pasal 1", "Pasal 2"]
+        assert all("law_title" not in r and "disclaimer" not in r for r in first["results"])
+        assert json.dumps(result).count(server.DISCLAIMER) == 1
+
+    def test_compact_is_smaller_and_leaves_cache_intact(self, reg_cache):
+        self._search_setup()
+        full = search_laws("test")
+        compact = search_laws("test", compact=True)
+
+        assert len(json.dumps(compact)) < len(json.dumps(full))
+        cached = next(iter(server._search_cache._data.values()))[-1]["rows"]
+        assert all("law_title" in r and "disclaimer" not in r for r in cached)
+
+    def test_messages_become_notices(self, reg_cache):
+        server.sb.rpc.return_value.execute.return_value = MagicMock(data=[])
+        result = search_laws("nothing", compact=True)
+        assert result["laws"] == []
+        assert "message" in result["notices"][0]
+        assert "disclaimer" not in result["notices"][0]
+
+    def test_get_pasals_compact(self, reg_cache):
+        server._works_index.add(_work(1))
+        server._works_index.loaded = True
+        server.sb.rpc.return_value.execute.return_value = MagicMock(
+            data=[_bundle_item("81"), _bundle_item("82")],
+        )
+        result = get_pasals(
+            [{"law_type": "UU", "law_number": "13", "year": 2003, "pasal": "81-82"}], compact=True,
+        )
+        assert len(result["laws"]) == 1
+        assert [p["pasal_number"] for p in result["laws"][0]["results"]] == ["81", "82"]
+        assert "disclaimer" in result
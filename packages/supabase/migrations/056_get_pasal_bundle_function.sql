@@ -0,0 +1,108 @@
+-- Migration 056: Single round-trip pasal lookup for the MCP server
+--
+-- Problem: get_pasal made 4-5 sequential PostgREST calls (work lookup, pasal
+-- node, ayat children, parent BAB, and on a miss the available pasal list).
+-- From Railway to Supabase each hop costs tens of milliseconds.
+--
+-- Solution: get_pasal_bundle() resolves everything server-side and returns one
+-- JSONB payload:
+--   {
+--     "type_known": bool,              -- false → unknown regulation type code
+--     "work": {...} | null,            -- null → no such work
+--     "node": {...} | null,            -- null → pasal not found in work
+--     "ayat": [{number, content_text}],-- ordered by sort_order
+--     "chapter": {node_type, number, heading} | null,
+--     "available_pasals": [text]       -- only on a pasal miss, capped at 200
+--   }
+
+CREATE OR REPLACE FUNCTION get_pasal_bundle(
+    p_type_code TEXT,
+    p_number TEXT,
+    p_year INT,
+    p_pasal TEXT
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+STABLE
+SET search_path = 'public', 'extensions'
+AS $$
+DECLARE
+    v_type_id INTEGER;
+    v_work RECORD;
+    v_node RECORD;
+BEGIN
+    SELECT rt.id INTO v_type_id
+    FROM regulation_types rt
+    WHERE rt.code = UPPER(p_type_code);
+
+    IF v_type_id IS NULL THEN
+        RETURN jsonb_build_object('type_known', false);
+    END IF;
+
+    SELECT w.id, w.frbr_uri, w.title_id, w.number, w.year, w.status,
+           w.source_url, w.date_enacted, w.regulation_type_id
+    INTO v_work
+    FROM works w
+    WHERE w.regulation_type_id = v_type_id
+      AND w.number = p_number
+      AND w.year = p_year
+    LIMIT 1;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('type_known', true, 'work', NULL);
+    END IF;
+
+    SELECT d.id, d.number, d.content_text, d.parent_id
+    INTO v_node
+    FROM document_nodes d
+    WHERE d.work_id = v_work.id
+      AND d.node_type = 'pasal'
+      AND d.number = p_pasal
+    ORDER BY d.sort_order
+    LIMIT 1;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object(
+            'type_known', true,
+            'work', to_jsonb(v_work),
+            'node', NULL,
+            'available_pasals', COALESCE((
+                SELECT jsonb_agg(s.number ORDER BY s.sort_order)
+                FROM (
+                    SELECT d.number, d.sort_order
+                    FROM document_nodes d
+                    WHERE d.work_id = v_work.id
+                      AND d.node_type = 'pasal'
+                    ORDER BY d.sort_order
+                    LIMIT 200
+                ) s
+            ), '[]'::jsonb)
+        );
+    END IF;
+
+    RETURN jsonb_build_object(
+        'type_known', true,
+        'work', to_jsonb(v_work),
+        'node', to_jsonb(v_node),
+        'ayat', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object('number', a.number, 'content_text', a.content_text)
+                ORDER BY a.sort_order
+            )
+            FROM document_nodes a
+            WHERE a.work_id = v_work.id
+              AND a.parent_id = v_node.id
+              AND a.node_type = 'ayat'
+        ), '[]'::jsonb),
+        'chapter', (
+            SELECT jsonb_build_object(
+                'node_type', p.node_type,
+                'number', p.number,
+                'heading', p.heading
+            )
+            FROM document_nodes p
+            WHERE p.id = v_node.parent_id
+        )
+    );
+END;
+$$;
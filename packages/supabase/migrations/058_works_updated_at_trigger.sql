@@ -0,0 +1,30 @@
+-- Migration 058: Maintain works.updated_at for incremental readers
+--
+-- Problem: works.updated_at only gets its DEFAULT on insert. Upserts from the
+-- loader and status changes leave it untouched, so the MCP server's in-memory
+-- works index cannot tell which rows changed since its last refresh.
+--
+-- Solution: a BEFORE UPDATE trigger stamps updated_at = NOW(), and an index on
+-- (updated_at, id) serves the keyset scan the server pages through.
+
+-- Backfill before the trigger exists so this UPDATE keeps the original stamps
+UPDATE works SET updated_at = COALESCE(created_at, NOW()) WHERE updated_at IS NULL;
+
+ALTER TABLE works ALTER COLUMN updated_at SET NOT NULL;
+
+CREATE OR REPLACE FUNCTION set_works_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_works_updated_at ON works;
+
+CREATE TRIGGER trg_works_updated_at
+    BEFORE UPDATE ON works
+    FOR EACH ROW
+    EXECUTE FUNCTION set_works_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_works_updated_at ON works(updated_at, id);
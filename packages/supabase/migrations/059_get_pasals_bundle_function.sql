@@ -0,0 +1,67 @@
+-- Migration 059: Many pasals of one work in a single round trip
+--
+-- Problem: answering one question often needs 5-15 articles from two or three
+-- laws. Fetching them through get_pasal_bundle() costs one RPC per article.
+--
+-- Solution: get_pasals_bundle() takes a work id and a list of pasal numbers
+-- and returns every match in reading order, each with the same node / ayat /
+-- chapter shape as get_pasal_bundle() (migration 056):
+--   [
+--     {
+--       "node": {id, number, content_text, parent_id},
+--       "ayat": [{number, content_text}],      -- ordered by sort_order
+--       "chapter": {node_type, number, heading} | null
+--     }, ...
+--   ]
+-- Numbers with no pasal are simply absent. When a number occurs more than
+-- once in a work, the first one in reading order wins, as in 056.
+
+CREATE OR REPLACE FUNCTION get_pasals_bundle(
+    p_work_id INT,
+    p_pasals TEXT[]
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SET search_path = 'public', 'extensions'
+AS $$
+    SELECT COALESCE(jsonb_agg(
+        jsonb_build_object(
+            'node', jsonb_build_object(
+                'id', n.id,
+                'number', n.number,
+                'content_text', n.content_text,
+                'parent_id', n.parent_id
+            ),
+            'ayat', COALESCE((
+                SELECT jsonb_agg(
+                    jsonb_build_object('number', a.number, 'content_text', a.content_text)
+                    ORDER BY a.sort_order
+                )
+                FROM document_nodes a
+                WHERE a.work_id = p_work_id
+                  AND a.parent_id = n.id
+                  AND a.node_type = 'ayat'
+            ), '[]'::jsonb),
+            'chapter', (
+                SELECT jsonb_build_object(
+                    'node_type', p.node_type,
+                    'number', p.number,
+                    'heading', p.heading
+                )
+                FROM document_nodes p
+                WHERE p.id = n.parent_id
+            )
+        )
+        ORDER BY n.sort_order
+    ), '[]'::jsonb)
+    FROM (
+        SELECT DISTINCT ON (d.number)
+               d.id, d.number, d.content_text, d.parent_id, d.sort_order
+        FROM document_nodes d
+        WHERE d.work_id = p_work_id
+          AND d.node_type = 'pasal'
+          AND d.number = ANY(p_pasals)
+        ORDER BY d.number, d.sort_order
+    ) n;
+$$;
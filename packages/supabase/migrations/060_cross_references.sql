@@ -0,0 +1,223 @@
+-- Migration 060: Cross-references extracted and resolved at load time
+--
+-- Problem: every uncached get_pasal ran the cross-reference regex over the
+-- article text at request time, and the result was only a list of numbers:
+-- a bare "Pasal 5" (same law) or "Pasal 5 UU Nomor 13 Tahun 2003" was never
+-- linked to a document node.
+--
+-- Solution: the loader (load_nodes_by_level) extracts references once per
+-- pasal and stores them here with the resolved target work / node ids.
+-- get_pasal_bundle() and get_pasals_bundle() now return them as
+-- "cross_references":
+--   [{pasal, ayat?, huruf?, law_number?, law_year?, frbr_uri?, node_id?, ayat_node_id?}]
+-- The key is null when the work has no stored references at all (e.g. it was
+-- loaded before this table existed), so callers can fall back to extracting
+-- at request time. target_node_id is indexed for the
+-- reverse "which articles cite this one" lookup.
+
+CREATE TABLE cross_references (
+    id BIGINT PRIMARY KEY GENERATED ALWAYS AS IDENTITY,
+    work_id INTEGER NOT NULL REFERENCES works(id) ON DELETE CASCADE,
+    source_node_id INTEGER NOT NULL REFERENCES document_nodes(id) ON DELETE CASCADE,
+    source_ayat VARCHAR(50),                 -- ayat of the citing pasal the reference sits in
+    target_work_id INTEGER REFERENCES works(id) ON DELETE SET NULL,
+    target_node_id INTEGER REFERENCES document_nodes(id) ON DELETE SET NULL,
+    target_ayat_node_id INTEGER REFERENCES document_nodes(id) ON DELETE SET NULL,
+    target_pasal VARCHAR(50) NOT NULL,
+    target_ayat VARCHAR(50),
+    target_huruf VARCHAR(10),
+    target_law_number VARCHAR(50),           -- null for a bare reference to the same law
+    target_law_year INTEGER
+);
+
+CREATE INDEX idx_xref_work ON cross_references(work_id);
+CREATE INDEX idx_xref_source ON cross_references(source_node_id);
+CREATE INDEX idx_xref_target_node ON cross_references(target_node_id);
+CREATE INDEX idx_xref_target_pasal ON cross_references(target_work_id, target_pasal);
+
+-- RLS: public read, service_role full access
+ALTER TABLE cross_references ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Public read cross_references" ON cross_references FOR SELECT TO anon, authenticated USING (true);
+CREATE POLICY "Service role full access cross_references" ON cross_references FOR ALL TO service_role USING (true) WITH CHECK (true);
+
+
+-- ============================================================
+-- get_pasal_bundle / get_pasals_bundle with stored references
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION get_pasal_bundle(
+    p_type_code TEXT,
+    p_number TEXT,
+    p_year INT,
+    p_pasal TEXT
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+STABLE
+SET search_path = 'public', 'extensions'
+AS $$
+DECLARE
+    v_type_id INTEGER;
+    v_work RECORD;
+    v_node RECORD;
+BEGIN
+    SELECT rt.id INTO v_type_id
+    FROM regulation_types rt
+    WHERE rt.code = UPPER(p_type_code);
+
+    IF v_type_id IS NULL THEN
+        RETURN jsonb_build_object('type_known', false);
+    END IF;
+
+    SELECT w.id, w.frbr_uri, w.title_id, w.number, w.year, w.status,
+           w.source_url, w.date_enacted, w.regulation_type_id
+    INTO v_work
+    FROM works w
+    WHERE w.regulation_type_id = v_type_id
+      AND w.number = p_number
+      AND w.year = p_year
+    LIMIT 1;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('type_known', true, 'work', NULL);
+    END IF;
+
+    SELECT d.id, d.number, d.content_text, d.parent_id
+    INTO v_node
+    FROM document_nodes d
+    WHERE d.work_id = v_work.id
+      AND d.node_type = 'pasal'
+      AND d.number = p_pasal
+    ORDER BY d.sort_order
+    LIMIT 1;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object(
+            'type_known', true,
+            'work', to_jsonb(v_work),
+            'node', NULL,
+            'available_pasals', COALESCE((
+                SELECT jsonb_agg(s.number ORDER BY s.sort_order)
+                FROM (
+                    SELECT d.number, d.sort_order
+                    FROM document_nodes d
+                    WHERE d.work_id = v_work.id
+                      AND d.node_type = 'pasal'
+                    ORDER BY d.sort_order
+                    LIMIT 200
+                ) s
+            ), '[]'::jsonb)
+        );
+    END IF;
+
+    RETURN jsonb_build_object(
+        'type_known', true,
+        'work', to_jsonb(v_work),
+        'node', to_jsonb(v_node),
+        'ayat', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object('number', a.number, 'content_text', a.content_text)
+                ORDER BY a.sort_order
+            )
+            FROM document_nodes a
+            WHERE a.work_id = v_work.id
+              AND a.parent_id = v_node.id
+              AND a.node_type = 'ayat'
+        ), '[]'::jsonb),
+        'chapter', (
+            SELECT jsonb_build_object(
+                'node_type', p.node_type,
+                'number', p.number,
+                'heading', p.heading
+            )
+            FROM document_nodes p
+            WHERE p.id = v_node.parent_id
+        ),
+        'cross_references', COALESCE((
+            SELECT jsonb_agg(jsonb_strip_nulls(jsonb_build_object(
+                'pasal', x.target_pasal,
+                'ayat', x.target_ayat,
+                'huruf', x.target_huruf,
+                'law_number', x.target_law_number,
+                'law_year', x.target_law_year,
+                'frbr_uri', tw.frbr_uri,
+                'node_id', x.target_node_id,
+                'ayat_node_id', x.target_ayat_node_id
+            )) ORDER BY x.id)
+            FROM cross_references x
+            LEFT JOIN works tw ON tw.id = x.target_work_id
+            WHERE x.source_node_id = v_node.id
+        ), CASE WHEN EXISTS (
+            SELECT 1 FROM cross_references x0 WHERE x0.work_id = v_work.id
+        ) THEN '[]'::jsonb END)
+    );
+END;
+$$;
+
+
+CREATE OR REPLACE FUNCTION get_pasals_bundle(
+    p_work_id INT,
+    p_pasals TEXT[]
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SET search_path = 'public', 'extensions'
+AS $$
+    SELECT COALESCE(jsonb_agg(
+        jsonb_build_object(
+            'node', jsonb_build_object(
+                'id', n.id,
+                'number', n.number,
+                'content_text', n.content_text,
+                'parent_id', n.parent_id
+            ),
+            'ayat', COALESCE((
+                SELECT jsonb_agg(
+                    jsonb_build_object('number', a.number, 'content_text', a.content_text)
+                    ORDER BY a.sort_order
+                )
+                FROM document_nodes a
+                WHERE a.work_id = p_work_id
+                  AND a.parent_id = n.id
+                  AND a.node_type = 'ayat'
+            ), '[]'::jsonb),
+            'chapter', (
+                SELECT jsonb_build_object(
+                    'node_type', p.node_type,
+                    'number', p.number,
+                    'heading', p.heading
+                )
+                FROM document_nodes p
+                WHERE p.id = n.parent_id
+            ),
+            'cross_references', COALESCE((
+                SELECT jsonb_agg(jsonb_strip_nulls(jsonb_build_object(
+                    'pasal', x.target_pasal,
+                    'ayat', x.target_ayat,
+                    'huruf', x.target_huruf,
+                    'law_number', x.target_law_number,
+                    'law_year', x.target_law_year,
+                    'frbr_uri', tw.frbr_uri,
+                    'node_id', x.target_node_id,
+                    'ayat_node_id', x.target_ayat_node_id
+                )) ORDER BY x.id)
+                FROM cross_references x
+                LEFT JOIN works tw ON tw.id = x.target_work_id
+                WHERE x.source_node_id = n.id
+            ), CASE WHEN EXISTS (
+                SELECT 1 FROM cross_references x0 WHERE x0.work_id = p_work_id
+            ) THEN '[]'::jsonb END)
+        )
+        ORDER BY n.sort_order
+    ), '[]'::jsonb)
+    FROM (
+        SELECT DISTINCT ON (d.number)
+               d.id, d.number, d.content_text, d.parent_id, d.sort_order
+        FROM document_nodes d
+        WHERE d.work_id = p_work_id
+          AND d.node_type = 'pasal'
+          AND d.number = ANY(p_pasals)
+        ORDER BY d.number, d.sort_order
+    ) n;
+$$;
@@ -0,0 +1,75 @@
+-- Migration 061: Keep the reverse citation index linked across reloads
+--
+-- Problem: cross_references (migration 060) stores target node ids resolved
+-- when the *citing* work was loaded. Reloading the *cited* work deletes and
+-- re-inserts its document_nodes, so incoming target_node_id values fall to
+-- NULL (ON DELETE SET NULL). Citations of a law that was not loaded yet never
+-- get a target_work_id at all.
+--
+-- Solution: relink_cross_references(work_id), called by the loader right
+-- after a work's nodes are inserted:
+--   1. adopts unresolved "UU Nomor X Tahun Y" references that name this work
+--   2. re-resolves target_node_id / target_ayat_node_id of every reference
+--      from another work that points at it
+-- Returns the number of references relinked. Reverse lookups ("which
+-- articles cite Pasal 81 of UU 13/2003") use (target_work_id, target_pasal),
+-- which is stable across reloads; the node ids serve direct links.
+
+CREATE INDEX IF NOT EXISTS idx_xref_target_law
+    ON cross_references(target_law_number, target_law_year)
+    WHERE target_work_id IS NULL;
+
+CREATE OR REPLACE FUNCTION relink_cross_references(p_work_id INT)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SET search_path = 'public', 'extensions'
+AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    UPDATE cross_references x
+    SET target_work_id = w.id
+    FROM works w
+    JOIN regulation_types rt ON rt.id = w.regulation_type_id
+    WHERE w.id = p_work_id
+      AND rt.code = 'UU'
+      AND x.target_work_id IS NULL
+      AND x.target_law_number = w.number
+      AND x.target_law_year = w.year;
+
+    UPDATE cross_references x
+    SET target_node_id = (
+        SELECT d.id
+        FROM document_nodes d
+        WHERE d.work_id = p_work_id
+          AND d.node_type = 'pasal'
+          AND d.number = x.target_pasal
+        ORDER BY d.sort_order
+        LIMIT 1
+    )
+    WHERE x.target_work_id = p_work_id
+      AND x.work_id <> p_work_id;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+
+    UPDATE cross_references x
+    SET target_ayat_node_id = (
+        SELECT a.id
+        FROM document_nodes a
+        WHERE a.parent_id = x.target_node_id
+          AND a.node_type = 'ayat'
+          AND a.number = x.target_ayat
+        ORDER BY a.sort_order
+        LIMIT 1
+    )
+    WHERE x.target_work_id = p_work_id
+      AND x.work_id <> p_work_id
+      AND x.target_ayat IS NOT NULL;
+
+    RETURN v_count;
+END;
+$$;
+
+-- Mutation function: service_role only (same policy as migration 051)
+REVOKE EXECUTE ON FUNCTION relink_cross_references(int) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION relink_cross_references(int) TO service_role;
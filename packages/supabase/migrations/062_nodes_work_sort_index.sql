@@ -0,0 +1,11 @@
+-- Migration 062: Composite index for reading a work in document order
+--
+-- Problem: get_law_text pages through a work with
+--   WHERE work_id = $1 AND sort_order > $cursor ORDER BY sort_order LIMIT n
+-- Only idx_nodes_work (work_id) existed, so every page fetched and sorted all
+-- nodes of the work — thousands for omnibus laws such as UU 6/2023.
+--
+-- Solution: a (work_id, sort_order, id) btree serves each page as a range scan.
+-- The same order is used by the MCP server's cache prewarm.
+
+CREATE INDEX IF NOT EXISTS idx_nodes_work_sort ON document_nodes(work_id, sort_order, id);
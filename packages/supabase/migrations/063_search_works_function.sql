@@ -0,0 +1,81 @@
+-- Migration 063: Ranked title search over works for list_laws
+--
+-- Problem: list_laws(search=...) filtered with ilike('title_id', '%term%').
+-- A leading wildcard cannot use a btree index, so every keystroke-style query
+-- scanned all of works, matched title_id only (not tentang), and returned rows
+-- in year order rather than by relevance.
+--
+-- Solution:
+--   1. GIN trigram indexes on title_id and tentang (pg_trgm, migration 011,
+--      now in the extensions schema per 049). These serve ILIKE '%term%' and
+--      the word-similarity operator for typo-tolerant matches.
+--   2. search_works() combines those with works.search_fts (migration 039)
+--      and returns ranked matches with the same type / year / status filters
+--      as list_laws. total_count is the number of matches before paging.
+
+SET search_path = 'public', 'extensions';
+
+CREATE INDEX IF NOT EXISTS idx_works_title_trgm
+    ON works USING gin (title_id extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_works_tentang_trgm
+    ON works USING gin (tentang extensions.gin_trgm_ops);
+
+
+CREATE OR REPLACE FUNCTION search_works(
+    p_query TEXT,
+    p_type_id INT DEFAULT NULL,
+    p_year INT DEFAULT NULL,
+    p_status TEXT DEFAULT NULL,
+    p_limit INT DEFAULT 20,
+    p_offset INT DEFAULT 0
+)
+RETURNS TABLE (
+    id INTEGER,
+    frbr_uri VARCHAR,
+    title_id TEXT,
+    number VARCHAR,
+    year INTEGER,
+    status VARCHAR,
+    regulation_type_id INTEGER,
+    score FLOAT,
+    total_count BIGINT
+)
+LANGUAGE sql
+STABLE
+SET search_path = 'public', 'extensions'
+AS $$
+    WITH q AS (
+        SELECT
+            lower(trim(p_query)) AS term,
+            -- Escape LIKE wildcards so "%" and "_" match literally
+            '%' || replace(replace(replace(lower(trim(p_query)),
+                '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern,
+            -- plainto_tsquery ignores punctuation such as "/" (see 039)
+            plainto_tsquery('indonesian', p_query) AS tsq
+    ),
+    matches AS (
+        SELECT
+            w.id, w.frbr_uri, w.title_id, w.number, w.year, w.status,
+            w.regulation_type_id,
+            (CASE WHEN w.title_id ILIKE q.pattern OR w.tentang ILIKE q.pattern
+                  THEN 1.0 ELSE 0.0 END
+             + ts_rank(w.search_fts, q.tsq)
+             + greatest(word_similarity(q.term, w.title_id),
+                        word_similarity(q.term, COALESCE(w.tentang, ''))))::float AS score
+        FROM works w, q
+        WHERE q.term <> ''
+          AND (w.title_id ILIKE q.pattern
+               OR w.tentang ILIKE q.pattern
+               OR w.search_fts @@ q.tsq
+               OR q.term <% w.title_id
+               OR q.term <% w.tentang)
+          AND (p_type_id IS NULL OR w.regulation_type_id = p_type_id)
+          AND (p_year IS NULL OR w.year = p_year)
+          AND (p_status IS NULL OR w.status = p_status)
+    )
+    SELECT m.*, count(*) OVER () AS total_count
+    FROM matches m
+    ORDER BY m.score DESC, m.year DESC, m.id DESC
+    LIMIT p_limit
+    OFFSET p_offset;
+$$;
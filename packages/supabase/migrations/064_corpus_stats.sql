@@ -0,0 +1,167 @@
+-- Migration 064: Pre-aggregated corpus stats
+--
+-- Problem: get_landing_stats() (migration 050) counts works and ~3M
+-- document_nodes on every call (~15s, hence its own 30s timeout), and the MCP
+-- server's ping / no-results message ran select(count='exact') on works.
+-- Health checks and error paths hit these often, and they slow down as the
+-- corpus grows.
+--
+-- Solution: a single-row corpus_stats table kept current by statement-level
+-- triggers, so a bulk insert costs one UPDATE rather than one per row:
+--   - works:          recount (works is small and year is indexed)
+--   - document_nodes: add/subtract the pasal rows in the transition table
+-- refresh_corpus_stats() recomputes everything from scratch (after TRUNCATE
+-- or manual fixes). get_landing_stats() keeps its name and columns but now
+-- reads the row, falling back to the live counts if the row is missing.
+
+SET search_path = 'public', 'extensions';
+
+CREATE TABLE IF NOT EXISTS corpus_stats (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    total_works BIGINT NOT NULL DEFAULT 0,
+    pasal_count BIGINT NOT NULL DEFAULT 0,
+    min_year INT,
+    max_year INT,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- RLS: public read, service_role full access
+ALTER TABLE corpus_stats ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Public read corpus_stats" ON corpus_stats FOR SELECT TO anon, authenticated USING (true);
+CREATE POLICY "Service role full access corpus_stats" ON corpus_stats FOR ALL TO service_role USING (true) WITH CHECK (true);
+
+
+-- ============================================================
+-- Full recompute
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION refresh_corpus_stats()
+RETURNS corpus_stats
+LANGUAGE sql
+SET statement_timeout = '60s'
+SET search_path = 'public', 'extensions'
+AS $$
+    INSERT INTO corpus_stats AS s (id, total_works, pasal_count, min_year, max_year, refreshed_at, updated_at)
+    SELECT
+        TRUE,
+        (SELECT COUNT(*) FROM works),
+        (SELECT COUNT(*) FROM document_nodes WHERE node_type = 'pasal'),
+        (SELECT MIN(year) FROM works),
+        (SELECT MAX(year) FROM works),
+        NOW(),
+        NOW()
+    ON CONFLICT (id) DO UPDATE SET
+        total_works = EXCLUDED.total_works,
+        pasal_count = EXCLUDED.pasal_count,
+        min_year = EXCLUDED.min_year,
+        max_year = EXCLUDED.max_year,
+        refreshed_at = EXCLUDED.refreshed_at,
+        updated_at = EXCLUDED.updated_at
+    RETURNING s.*;
+$$;
+
+-- Mutation function: service_role only (same policy as migration 051)
+REVOKE EXECUTE ON FUNCTION refresh_corpus_stats() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_corpus_stats() TO service_role;
+
+
+-- ============================================================
+-- Incremental maintenance
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION corpus_stats_works_changed()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SET search_path = 'public', 'extensions'
+AS $$
+BEGIN
+    UPDATE corpus_stats SET
+        total_works = (SELECT COUNT(*) FROM works),
+        min_year = (SELECT MIN(year) FROM works),
+        max_year = (SELECT MAX(year) FROM works),
+        updated_at = NOW();
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_corpus_stats_works ON works;
+CREATE TRIGGER trg_corpus_stats_works
+    AFTER INSERT OR DELETE OR UPDATE OF year ON works
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION corpus_stats_works_changed();
+
+
+-- Transition tables allow only one event per trigger, hence two functions
+CREATE OR REPLACE FUNCTION corpus_stats_nodes_inserted()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SET search_path = 'public', 'extensions'
+AS $$
+DECLARE
+    v_pasals BIGINT;
+BEGIN
+    SELECT COUNT(*) INTO v_pasals FROM new_nodes WHERE node_type = 'pasal';
+    IF v_pasals > 0 THEN
+        UPDATE corpus_stats SET pasal_count = pasal_count + v_pasals, updated_at = NOW();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION corpus_stats_nodes_deleted()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SET search_path = 'public', 'extensions'
+AS $$
+DECLARE
+    v_pasals BIGINT;
+BEGIN
+    SELECT COUNT(*) INTO v_pasals FROM old_nodes WHERE node_type = 'pasal';
+    IF v_pasals > 0 THEN
+        UPDATE corpus_stats SET pasal_count = GREATEST(pasal_count - v_pasals, 0), updated_at = NOW();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_corpus_stats_nodes_insert ON document_nodes;
+CREATE TRIGGER trg_corpus_stats_nodes_insert
+    AFTER INSERT ON document_nodes
+    REFERENCING NEW TABLE AS new_nodes
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION corpus_stats_nodes_inserted();
+
+DROP TRIGGER IF EXISTS trg_corpus_stats_nodes_delete ON document_nodes;
+CREATE TRIGGER trg_corpus_stats_nodes_delete
+    AFTER DELETE ON document_nodes
+    REFERENCING OLD TABLE AS old_nodes
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION corpus_stats_nodes_deleted();
+
+
+-- Seed the row
+SELECT refresh_corpus_stats();
+
+
+-- ============================================================
+-- get_landing_stats(): same signature as migration 050, O(1)
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION get_landing_stats()
+RETURNS TABLE(total_works bigint, pasal_count bigint, min_year int, max_year int)
+LANGUAGE sql STABLE
+SET statement_timeout = '30s'
+SET search_path = 'public', 'extensions'
+AS $$
+  SELECT s.total_works, s.pasal_count, s.min_year, s.max_year
+  FROM corpus_stats s
+  UNION ALL
+  SELECT
+    (SELECT COUNT(*) FROM works)::bigint,
+    (SELECT COUNT(*) FROM document_nodes WHERE node_type = 'pasal')::bigint,
+    (SELECT MIN(year) FROM works),
+    (SELECT MAX(year) FROM works)
+  WHERE NOT EXISTS (SELECT 1 FROM corpus_stats)
+  LIMIT 1;
+$$;
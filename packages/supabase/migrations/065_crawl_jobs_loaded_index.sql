@@ -0,0 +1,13 @@
+-- Migration 065: Index loaded crawl jobs by (updated_at, id)
+--
+-- Problem: the MCP server polls crawl_jobs for jobs that reached
+-- status='loaded' since its last poll, so it can evict reloaded works from its
+-- caches once their document_nodes are back. idx_crawl_status narrows to the
+-- loaded jobs but cannot serve the keyset on updated_at, so every poll would
+-- sort all of them.
+--
+-- Solution: a partial index on (updated_at, id) for loaded jobs, matching the
+-- poll's filter and order.
+
+CREATE INDEX IF NOT EXISTS idx_crawl_jobs_loaded_updated
+    ON crawl_jobs (updated_at, id) WHERE status = 'loaded';
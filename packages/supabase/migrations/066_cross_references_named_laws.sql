@@ -0,0 +1,199 @@
+-- Migration 066: Keep citations of laws named other than by number
+--
+-- Problem: the loader's citation grammar recognises "Pasal N UU Nomor X Tahun
+-- Y" and also spots laws named any other way ("UU ITE", "KUHP", "PP No. 35
+-- Tahun 2021"). The loader dropped the latter, so get_pasal omitted them for
+-- newly loaded works, while the request-time fallback (works loaded before
+-- migration 060) kept them with a "law" field.
+--
+-- Solution: store the law as written in cross_references.target_law (target
+-- work and node stay null), and return it as "law" from get_pasal_bundle()
+-- and get_pasals_bundle(). The functions are otherwise unchanged from 060.
+
+SET search_path = 'public', 'extensions';
+
+ALTER TABLE cross_references ADD COLUMN IF NOT EXISTS target_law TEXT;
+
+
+-- ============================================================
+-- get_pasal_bundle / get_pasals_bundle with target_law
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION get_pasal_bundle(
+    p_type_code TEXT,
+    p_number TEXT,
+    p_year INT,
+    p_pasal TEXT
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+STABLE
+SET search_path = 'public', 'extensions'
+AS $$
+DECLARE
+    v_type_id INTEGER;
+    v_work RECORD;
+    v_node RECORD;
+BEGIN
+    SELECT rt.id INTO v_type_id
+    FROM regulation_types rt
+    WHERE rt.code = UPPER(p_type_code);
+
+    IF v_type_id IS NULL THEN
+        RETURN jsonb_build_object('type_known', false);
+    END IF;
+
+    SELECT w.id, w.frbr_uri, w.title_id, w.number, w.year, w.status,
+           w.source_url, w.date_enacted, w.regulation_type_id
+    INTO v_work
+    FROM works w
+    WHERE w.regulation_type_id = v_type_id
+      AND w.number = p_number
+      AND w.year = p_year
+    LIMIT 1;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('type_known', true, 'work', NULL);
+    END IF;
+
+    SELECT d.id, d.number, d.content_text, d.parent_id
+    INTO v_node
+    FROM document_nodes d
+    WHERE d.work_id = v_work.id
+      AND d.node_type = 'pasal'
+      AND d.number = p_pasal
+    ORDER BY d.sort_order
+    LIMIT 1;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object(
+            'type_known', true,
+            'work', to_jsonb(v_work),
+            'node', NULL,
+            'available_pasals', COALESCE((
+                SELECT jsonb_agg(s.number ORDER BY s.sort_order)
+                FROM (
+                    SELECT d.number, d.sort_order
+                    FROM document_nodes d
+                    WHERE d.work_id = v_work.id
+                      AND d.node_type = 'pasal'
+                    ORDER BY d.sort_order
+                    LIMIT 200
+                ) s
+            ), '[]'::jsonb)
+        );
+    END IF;
+
+    RETURN jsonb_build_object(
+        'type_known', true,
+        'work', to_jsonb(v_work),
+        'node', to_jsonb(v_node),
+        'ayat', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object('number', a.number, 'content_text', a.content_text)
+                ORDER BY a.sort_order
+            )
+            FROM document_nodes a
+            WHERE a.work_id = v_work.id
+              AND a.parent_id = v_node.id
+              AND a.node_type = 'ayat'
+        ), '[]'::jsonb),
+        'chapter', (
+            SELECT jsonb_build_object(
+                'node_type', p.node_type,
+                'number', p.number,
+                'heading', p.heading
+            )
+            FROM document_nodes p
+            WHERE p.id = v_node.parent_id
+        ),
+        'cross_references', COALESCE((
+            SELECT jsonb_agg(jsonb_strip_nulls(jsonb_build_object(
+                'pasal', x.target_pasal,
+                'ayat', x.target_ayat,
+                'huruf', x.target_huruf,
+                'law_number', x.target_law_number,
+                'law_year', x.target_law_year,
+                'law', x.target_law,
+                'frbr_uri', tw.frbr_uri,
+                'node_id', x.target_node_id,
+                'ayat_node_id', x.target_ayat_node_id
+            )) ORDER BY x.id)
+            FROM cross_references x
+            LEFT JOIN works tw ON tw.id = x.target_work_id
+            WHERE x.source_node_id = v_node.id
+        ), CASE WHEN EXISTS (
+            SELECT 1 FROM cross_references x0 WHERE x0.work_id = v_work.id
+        ) THEN '[]'::jsonb END)
+    );
+END;
+$$;
+
+
+CREATE OR REPLACE FUNCTION get_pasals_bundle(
+    p_work_id INT,
+    p_pasals TEXT[]
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SET search_path = 'public', 'extensions'
+AS $$
+    SELECT COALESCE(jsonb_agg(
+        jsonb_build_object(
+            'node', jsonb_build_object(
+                'id', n.id,
+                'number', n.number,
+                'content_text', n.content_text,
+                'parent_id', n.parent_id
+            ),
+            'ayat', COALESCE((
+                SELECT jsonb_agg(
+                    jsonb_build_object('number', a.number, 'content_text', a.content_text)
+                    ORDER BY a.sort_order
+                )
+                FROM document_nodes a
+                WHERE a.work_id = p_work_id
+                  AND a.parent_id = n.id
+                  AND a.node_type = 'ayat'
+            ), '[]'::jsonb),
+            'chapter', (
+                SELECT jsonb_build_object(
+                    'node_type', p.node_type,
+                    'number', p.number,
+                    'heading', p.heading
+                )
+                FROM document_nodes p
+                WHERE p.id = n.parent_id
+            ),
+            'cross_references', COALESCE((
+                SELECT jsonb_agg(jsonb_strip_nulls(jsonb_build_object(
+                    'pasal', x.target_pasal,
+                    'ayat', x.target_ayat,
+                    'huruf', x.target_huruf,
+                    'law_number', x.target_law_number,
+                    'law_year', x.target_law_year,
+                    'law', x.target_law,
+                    'frbr_uri', tw.frbr_uri,
+                    'node_id', x.target_node_id,
+                    'ayat_node_id', x.target_ayat_node_id
+                )) ORDER BY x.id)
+                FROM cross_references x
+                LEFT JOIN works tw ON tw.id = x.target_work_id
+                WHERE x.source_node_id = n.id
+            ), CASE WHEN EXISTS (
+                SELECT 1 FROM cross_references x0 WHERE x0.work_id = p_work_id
+            ) THEN '[]'::jsonb END)
+        )
+        ORDER BY n.sort_order
+    ), '[]'::jsonb)
+    FROM (
+        SELECT DISTINCT ON (d.number)
+               d.id, d.number, d.content_text, d.parent_id, d.sort_order
+        FROM document_nodes d
+        WHERE d.work_id = p_work_id
+          AND d.node_type = 'pasal'
+          AND d.number = ANY(p_pasals)
+        ORDER BY d.number, d.sort_order
+    ) n;
+$$;
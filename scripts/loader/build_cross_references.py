@@ -0,0 +1,90 @@
+"""Build the cross-reference index for works already in the database.
+
+Works loaded before migration 060 have no cross_references rows. This
+re-reads each work's pasal/ayat nodes, extracts and resolves citations with
+the loader's load_cross_references(), and relinks citations pointing at it.
+Works that already have rows are skipped unless --force.
+
+Usage:
+    python build_cross_references.py [--work-id ID] [--force]
+"""
+import argparse
+
+from load_to_supabase import init_supabase, load_cross_references
+
+PAGE_SIZE = 1000
+
+
+def _fetch_pages(query_fn) -> list[dict]:
+    """Collect every row of a PostgREST query, PAGE_SIZE rows at a time."""
+    rows: list[dict] = []
+    while True:
+        page = query_fn().range(len(rows), len(rows) + PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+
+
+def flat_from_nodes(nodes: list[dict]) -> tuple[list[dict], dict[int, int]]:
+    """Rebuild the (flat, idx_to_db_id) pair load_nodes_by_level produces from DB rows."""
+    flat: list[dict] = []
+    idx_to_db_id: dict[int, int] = {}
+    idx_by_db_id: dict[int, int] = {}
+    for i, row in enumerate(nodes):
+        flat.append({
+            "node": {"type": row["node_type"], "number": row["number"], "content": row["content_text"]},
+            "parent_idx": idx_by_db_id.get(row["parent_id"]),
+        })
+        idx_to_db_id[i] = row["id"]
+        idx_by_db_id[row["id"]] = i
+    return flat, idx_to_db_id
+
+
+def build_for_work(sb, work_id: int, force: bool = False) -> int:
+    """Extract and store references for one work. Returns rows inserted (0 if skipped)."""
+    existing = sb.table("cross_references").select("id").eq("work_id", work_id).limit(1).execute()
+    if existing.data:
+        if not force:
+            return 0
+        sb.table("cross_references").delete().eq("work_id", work_id).execute()
+
+    nodes = _fetch_pages(lambda: sb.table("document_nodes").select(
+        "id, node_type, number, content_text, parent_id"
+    ).eq("work_id", work_id).in_("node_type", ["pasal", "ayat"]).order("sort_order").order("id"))
+    flat, idx_to_db_id = flat_from_nodes(nodes)
+    count = load_cross_references(sb, work_id, flat, idx_to_db_id)
+    sb.rpc("relink_cross_references", {"p_work_id": work_id}).execute()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build cross_references for loaded works")
+    parser.add_argument("--work-id", type=int, help="Only this work")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild works that already have cross-references")
+    args = parser.parse_args()
+
+    sb = init_supabase()
+    if args.work_id:
+        work_ids = [args.work_id]
+    else:
+        work_ids = [w["id"] for w in _fetch_pages(
+            lambda: sb.table("works").select("id").order("id")
+        )]
+
+    total = 0
+    for n, work_id in enumerate(work_ids, start=1):
+        try:
+            count = build_for_work(sb, work_id, args.force)
+        except Exception as e:
+            print(f"  ERROR work {work_id}: {e}")
+            continue
+        total += count
+        if count:
+            print(f"[{n}/{len(work_ids)}] work {work_id}: {count} cross-references")
+
+    print(f"\nDone: {total} cross-references across {len(work_ids)} works")
+
+
+if __name__ == "__main__":
+    main()
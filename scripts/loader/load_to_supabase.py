@@ -3,6 +3,7 @@
 Reads JSON files from data/parsed/ and inserts into:
 - works (law metadata)
 - document_nodes (hierarchical structure with FTS)
+- cross_references (article citations resolved to target nodes)
 
 Usage:
     python load_to_supabase.py [options]
@@ -12,6 +13,7 @@ Usage:
 import argparse
 import json
 import os
+import re
 import sys
 from pathlib import Path
 
@@ -288,9 +290,179 @@ def load_nodes_by_level(sb, work_id: int, nodes: list[dict]) -> list[dict]:
                 except Exception as e2:
                     print(f"  ERROR inserting node {node_data['node_type']} {node_data['number']}: {e2}")
 
+    try:
+        ref_count = load_cross_references(sb, work_id, flat, idx_to_db_id)
+        if ref_count:
+            print(f"  Stored {ref_count} cross-references")
+        # Other works' citations of this one lost their node ids when it was reloaded
+        relinked = sb.rpc("relink_cross_references", {"p_work_id": work_id}).execute().data
+        if relinked:
+            print(f"  Relinked {relinked} incoming cross-references")
+    except Exception as e:
+        print(f"  Warning: cross-reference extraction failed for work {work_id}: {e}")
+
     return pasal_nodes
 
 
+# Same citation grammar as CROSS_REF_PATTERN in apps/mcp-server/server.py
+CROSS_REF_PATTERN = re.compile(
+    r'(?:sebagaimana\s+dimaksud\s+(?:dalam|pada)\s+)?'
+    r'Pasal\s+(\d+[A-Z]?)'
+    r'(?:\s+ayat\s+\((\d+)\))?'
+    r'(?:\s+(?:huruf\s+([a-z])\.?))?'
+    r'(?:\s+(?:Undang-Undang|UU)\s+(?:(?:Nomor|No\.?)\s*)?(\d+)\s+Tahun\s+(\d{4})'
+    r'|\s+((?:Undang-Undang|UU|Peraturan|PP|Perppu|Perpres|Permen\w*|Perda|KUHP\w*)\b'
+    r'(?:\s+(?:Nomor|No\.?|Tahun|\d[\w/.]*|(?-i:[A-Z][\w.-]*)))*+)(?!\s+ini\b))?',
+    re.IGNORECASE,
+)
+# Ayat markers inside pasal content, as split by parser.parse_structure._parse_ayat
+_AYAT_MARKER = re.compile(r'^\((\d+)\)\s*', re.MULTILINE)
+_XREF_BATCH_SIZE = 500
+
+
+def extract_cross_references(text: str) -> list[dict]:
+    """Extract article citations from pasal text.
+
+    Each entry: {pasal, ayat, huruf, law_number, law_year, law, source_ayat}.
+    law_number/law_year are None for a bare "Pasal N" (same law); ``law`` holds
+    a law named any other way ("UU ITE", "PP No. 35 Tahun 2021") as written.
+    source_ayat is the ayat of ``text`` the citation appears in, if any.
+    """
+    markers = [(m.start(), m.group(1)) for m in _AYAT_MARKER.finditer(text)]
+    refs, seen = [], set()
+    for m in CROSS_REF_PATTERN.finditer(text):
+        source_ayat = None
+        for pos, number in markers:
+            if pos > m.start():
+                break
+            source_ayat = number
+        has_law = bool(m.group(4) and m.group(5))
+        ref = {
+            "pasal": m.group(1).upper(),
+            "ayat": m.group(2),
+            "huruf": m.group(3).lower() if m.group(3) else None,
+            "law_number": m.group(4) if has_law else None,
+            "law_year": int(m.group(5)) if has_law else None,
+            "law": m.group(6).rstrip(" .,") if m.group(6) else None,
+            "source_ayat": source_ayat,
+        }
+        key = tuple(ref.values())
+        if key in seen:
+            continue
+        seen.add(key)
+        refs.append(ref)
+    return refs
+
+
+def _find_uu_work_id(sb, number: str, year: int, cache: dict) -> int | None:
+    """Resolve "UU Nomor {number} Tahun {year}" to a work id (memoised in ``cache``)."""
+    key = (number, year)
+    if key not in cache:
+        result = sb.table("works").select("id").match({
+            "regulation_type_id": _load_reg_type_map(sb).get("UU", REG_TYPE_MAP["UU"]),
+            "number": number,
+            "year": year,
+        }).limit(1).execute()
+        cache[key] = result.data[0]["id"] if result.data else None
+    return cache[key]
+
+
+def _load_target_nodes(
+    sb, work_id: int, pasal_numbers: set[str],
+) -> tuple[dict[str, int], dict[tuple[int, str], int]]:
+    """Pasal ids by number and ayat ids by (pasal id, ayat number) for an already-loaded work."""
+    pasals = sb.table("document_nodes").select("id, number").eq(
+        "work_id", work_id
+    ).eq("node_type", "pasal").in_("number", sorted(pasal_numbers)).order("sort_order").execute()
+    pasal_ids: dict[str, int] = {}
+    for row in pasals.data or []:
+        pasal_ids.setdefault(row["number"], row["id"])
+    ayat_ids: dict[tuple[int, str], int] = {}
+    if pasal_ids:
+        ayat = sb.table("document_nodes").select("id, number, parent_id").eq(
+            "node_type", "ayat"
+        ).in_("parent_id", list(pasal_ids.values())).order("sort_order").execute()
+        for row in ayat.data or []:
+            ayat_ids.setdefault((row["parent_id"], row["number"]), row["id"])
+    return pasal_ids, ayat_ids
+
+
+def load_cross_references(
+    sb, work_id: int, flat: list[dict], idx_to_db_id: dict[int, int],
+) -> int:
+    """Extract citations from a freshly inserted work's pasals and store them resolved.
+
+    A bare "Pasal N" targets the same work; "Pasal N UU Nomor X Tahun Y" targets
+    that UU if it is loaded. A law named any other way is kept as written in
+    target_law, with no target work. Targets that cannot be found keep their
+    numbers with null node ids. Returns the number of rows inserted.
+    """
+    # Targets inside this work come straight from the flattened tree
+    local_pasals: dict[str, int] = {}
+    local_ayat: dict[tuple[int, str], int] = {}
+    for i, f in enumerate(flat):
+        db_id = idx_to_db_id.get(i)
+        if db_id is None:
+            continue
+        node = f["node"]
+        if node["type"] == "pasal":
+            local_pasals.setdefault(node.get("number", ""), db_id)
+        elif node["type"] == "ayat" and f["parent_idx"] is not None:
+            parent_id = idx_to_db_id.get(f["parent_idx"])
+            if parent_id is not None:
+                local_ayat.setdefault((parent_id, node.get("number", "")), db_id)
+
+    cited: list[tuple[int, dict]] = []
+    for i, f in enumerate(flat):
+        if f["node"]["type"] == "pasal" and i in idx_to_db_id:
+            for ref in extract_cross_references(f["node"].get("content", "") or ""):
+                cited.append((idx_to_db_id[i], ref))
+    if not cited:
+        return 0
+
+    # One lookup per distinct external law, then one node fetch per resolved law
+    work_cache: dict = {}
+    wanted: dict[int, set[str]] = {}
+    target_work: dict[tuple[str, int], int | None] = {}
+    for _, ref in cited:
+        if ref["law_number"]:
+            key = (ref["law_number"], ref["law_year"])
+            if key not in target_work:
+                target_work[key] = _find_uu_work_id(sb, *key, work_cache)
+            if target_work[key] is not None and target_work[key] != work_id:
+                wanted.setdefault(target_work[key], set()).add(ref["pasal"])
+    targets = {work_id: (local_pasals, local_ayat)}
+    for other_id, numbers in wanted.items():
+        targets[other_id] = _load_target_nodes(sb, other_id, numbers)
+
+    rows = []
+    for source_id, ref in cited:
+        if ref["law_number"]:
+            target_id = target_work[(ref["law_number"], ref["law_year"])]
+        else:
+            target_id = None if ref["law"] else work_id
+        pasal_ids, ayat_ids = targets.get(target_id, ({}, {}))
+        node_id = pasal_ids.get(ref["pasal"])
+        rows.append({
+            "work_id": work_id,
+            "source_node_id": source_id,
+            "source_ayat": ref["source_ayat"],
+            "target_work_id": target_id,
+            "target_node_id": node_id,
+            "target_ayat_node_id": ayat_ids.get((node_id, ref["ayat"])) if node_id and ref["ayat"] else None,
+            "target_pasal": ref["pasal"],
+            "target_ayat": ref["ayat"],
+            "target_huruf": ref["huruf"],
+            "target_law_number": ref["law_number"],
+            "target_law_year": ref["law_year"],
+            "target_law": ref["law"],
+        })
+
+    for start in range(0, len(rows), _XREF_BATCH_SIZE):
+        sb.table("cross_references").insert(rows[start:start + _XREF_BATCH_SIZE]).execute()
+    return len(rows)
+
+
 def render_page_images(sb, pdf_path: Path, slug: str) -> int:
     """Render each PDF page as PNG and upload to Supabase Storage.
 
@@ -326,9 +498,9 @@ def render_page_images(sb, pdf_path: Path, slug: str) -> int:
 def cleanup_work_data(sb, work_id: int) -> None:
     """Delete existing document_nodes for a specific work.
 
-    Order matters: suggestions/revisions reference nodes via FK.
+    Order matters: suggestions/revisions/cross_references reference nodes via FK.
     """
-    tables = ["suggestions", "revisions", "document_nodes"]
+    tables = ["suggestions", "revisions", "cross_references", "document_nodes"]
     for table in tables:
         try:
             sb.table(table).delete().eq("work_id", work_id).execute()
@@ -10,12 +10,22 @@ os.environ.setdefault("SUPABASE_KEY", "fake-key")
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from load_to_supabase import load_work, load_nodes_recursive
+from load_to_supabase import (
+    extract_cross_references,
+    load_cross_references,
+    load_nodes_by_level,
+    load_nodes_recursive,
+    load_work,
+)
 
 _CHAINABLE = ("select", "eq", "neq", "in_", "ilike", "or_", "match",
               "order", "range", "limit", "single", "upsert", "insert", "delete")
 
 
+def _pasal(number, content, children=()):
+    return {"type": "pasal", "number": number, "content": content, "children": list(children)}
+
+
 def _qm(data=None, count=0):
     """Return a chainable query mock with preset execute result."""
     m = MagicMock()
@@ -152,3 +162,96 @@ class TestLoadNodesRecursive:
         assert insert_calls[1]["parent_id"] == 1
 
 
+class TestExtractCrossReferences:
+    def test_bare_and_external_references(self):
+        refs = extract_cross_references(
+            "sebagaimana dimaksud dalam Pasal 5 ayat (2) huruf b dan "
+            "Pasal 7 UU Nomor 13 Tahun 2003"
+        )
+        assert refs[0] == {"pasal": "5", "ayat": "2", "huruf": "b", "law_number": None,
+                           "law_year": None, "law": None, "source_ayat": None}
+        assert refs[1]["law_number"] == "13"
+        assert refs[1]["law_year"] == 2003
+
+    def test_no_abbreviation_and_unidentified_laws(self):
+        refs = extract_cross_references(
+            "Pasal 27 UU No. 11 Tahun 2008, Pasal 28 UU ITE dan Pasal 5 Undang-Undang ini"
+        )
+        assert [(r["pasal"], r["law_number"], r["law"]) for r in refs] == [
+            ("27", "11", None), ("28", None, "UU ITE"), ("5", None, None),
+        ]
+
+    def test_source_ayat_and_dedupe(self):
+        text = "(1) Lihat Pasal 3.\n(2) Lihat Pasal 3 dan Pasal 3."
+        refs = extract_cross_references(text)
+        assert [(r["pasal"], r["source_ayat"]) for r in refs] == [("3", "1"), ("3", "2")]
+
+
+class TestLoadCrossReferences:
+    def _flat(self):
+        # Pasal 1 (id 10) with ayat (1) (id 11); Pasal 2 (id 20) cites both laws
+        flat = [
+            {"node": _pasal("1", "(1) Isi."), "parent_idx": None},
+            {"node": {"type": "ayat", "number": "1", "content": "Isi."}, "parent_idx": 0},
+            {"node": _pasal("2", "Pasal 1 ayat (1) dan Pasal 9 UU Nomor 1 Tahun 1974"), "parent_idx": None},
+        ]
+        return flat, {0: 10, 1: 11, 2: 20}
+
+    def test_resolves_same_work_and_external_targets(self):
+        sb = _sb()
+        tables = {
+            "works": _qm(data=[{"id": 7}]),
+            "document_nodes": _qm(data=[{"id": 70, "number": "9", "parent_id": None}]),
+            "cross_references": _qm(),
+            "regulation_types": _qm(data=[{"id": 3, "code": "UU"}]),
+        }
+        sb.table.side_effect = lambda name: tables[name]
+
+        flat, ids = self._flat()
+        assert load_cross_references(sb, 1, flat, ids) == 2
+
+        rows = tables["cross_references"].insert.call_args.args[0]
+        assert rows[0]["source_node_id"] == 20
+        assert rows[0]["target_work_id"] == 1
+        assert rows[0]["target_node_id"] == 10
+        assert rows[0]["target_ayat_node_id"] == 11
+        assert rows[1]["target_work_id"] == 7
+        assert rows[1]["target_node_id"] == 70
+        assert rows[1]["target_law_year"] == 1974
+
+    def test_unknown_external_law_keeps_numbers(self):
+        sb = _sb()
+        tables = {"works": _qm(data=[]), "cross_references": _qm(),
+                  "regulation_types": _qm(data=[{"id": 3, "code": "UU"}])}
+        sb.table.side_effect = lambda name: tables[name]
+
+        flat = [{"node": _pasal("1", "Pasal 4 UU Nomor 99 Tahun 1900"), "parent_idx": None}]
+        load_cross_references(sb, 1, flat, {0: 10})
+        row = tables["cross_references"].insert.call_args.args[0][0]
+        assert row["target_work_id"] is None
+        assert row["target_node_id"] is None
+        assert row["target_pasal"] == "4"
+
+    def test_named_law_stored_without_target(self):
+        sb = _sb()
+        tables = {"cross_references": _qm()}
+        sb.table.side_effect = lambda name: tables[name]
+
+        flat = [{"node": _pasal("1", "Pasal 27 UU ITE"), "parent_idx": None}]
+        assert load_cross_references(sb, 1, flat, {0: 10}) == 1
+        row = tables["cross_references"].insert.call_args.args[0][0]
+        assert row["target_law"] == "UU ITE"
+        assert row["target_work_id"] is None
+        assert row["target_node_id"] is None
+
+    def test_no_citations_inserts_nothing(self):
+        sb = _sb()
+        flat = [{"node": _pasal("1", "Tanpa rujukan."), "parent_idx": None}]
+        assert load_cross_references(sb, 1, flat, {0: 10}) == 0
+        sb.table.assert_not_called()
+
+    def test_load_nodes_by_level_relinks_incoming_references(self):
+        sb = _sb()
+        sb.table.return_value = _qm(data=[{"id": 10}])
+        load_nodes_by_level(sb, work_id=4, nodes=[_pasal("1", "Tanpa rujukan.")])
+        sb.rpc.assert_called_once_with("relink_cross_references", {"p_work_id": 4})